@@ -1,26 +1,39 @@
 import os
+import sys
 from playwright.sync_api import sync_playwright
 
+# The visual diff stage is shared with the sns capture scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sns"))
+from perf_capture import LAUNCH_ARGS, PERF_DIR, PERF_INIT_JS, PerfLog, PerfRecorder  # noqa: E402
+from visual_diff import STAGING_DIR, report, sync  # noqa: E402
+
 BASE_URL = "http://127.0.0.1:8000"
 OUTPUT_DIR = "screenshots"
+# Screenshots are taken here and only replace OUTPUT_DIR's when they really changed
+CAPTURE_DIR = os.path.join(OUTPUT_DIR, STAGING_DIR)
+PERF_REPORT = os.path.join(OUTPUT_DIR, PERF_DIR, "take_screenshots.json")
 
-def take_screenshots():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+def take_screenshots(perf_log):
+    if not os.path.exists(CAPTURE_DIR):
+        os.makedirs(CAPTURE_DIR)
 
     with sync_playwright() as p:
         print("Launching browser...")
         # Launch browser (headless by default)
-        browser = p.chromium.launch()
+        browser = p.chromium.launch(args=LAUNCH_ARGS)
         context = browser.new_context(viewport={"width": 1280, "height": 720})
+        context.add_init_script(PERF_INIT_JS)
         page = context.new_page()
+        perf = PerfRecorder(page, perf_log)
 
         # 1. Login Page
         print("Navigating to Login...")
         try:
-            page.goto(f"{BASE_URL}/login")
-            page.screenshot(path=f"{OUTPUT_DIR}/login.png")
-            print(f"Captured: {OUTPUT_DIR}/login.png")
+            with perf.sync_step("laravel login"):
+                page.goto(f"{BASE_URL}/login")
+                page.wait_for_load_state("load")
+            page.screenshot(path=f"{CAPTURE_DIR}/login.png")
+            print(f"Captured: {CAPTURE_DIR}/login.png")
         except Exception as e:
             print(f"Failed to load login page: {e}")
             browser.close()
@@ -37,8 +50,9 @@ def take_screenshots():
             page.fill('input[name="password"]', "test@example.com")
             
             # Click login and wait for navigation to dashboard
-            with page.expect_navigation(url="**/dashboard"):
-                page.click('button[type="submit"]')
+            with perf.sync_step("laravel dashboard"):
+                with page.expect_navigation(url="**/dashboard"):
+                    page.click('button[type="submit"]')
         except Exception as e:
             print(f"Login failed: {e}")
             browser.close()
@@ -49,8 +63,8 @@ def take_screenshots():
         try:
             # Wait for a key element on the dashboard (e.g., header) to ensure load
             page.wait_for_selector('h2', state="visible", timeout=10000)
-            page.screenshot(path=f"{OUTPUT_DIR}/dashboard.png")
-            print(f"Captured: {OUTPUT_DIR}/dashboard.png")
+            page.screenshot(path=f"{CAPTURE_DIR}/dashboard.png")
+            print(f"Captured: {CAPTURE_DIR}/dashboard.png")
         except Exception as e:
              print(f"Failed to capture dashboard: {e}")
 
@@ -58,4 +72,7 @@ def take_screenshots():
         print("Done.")
 
 if __name__ == "__main__":
-    take_screenshots()
\ No newline at end of file
+    perf_log = PerfLog()
+    take_screenshots(perf_log)
+    print(report(sync(CAPTURE_DIR, OUTPUT_DIR)))
+    sys.exit(1 if perf_log.finish(PERF_REPORT) else 0)
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""Small asyncio JSON client with a pool of keep-alive HTTP/1.1 connections.
+
+Standard library only, so the seeding, benchmark and capture tooling can use
+it without extra installs. At most `pool_size` requests are in flight at once;
+idle connections are reused until the server closes them (PHP's built-in
+server closes after every response, which the pool handles transparently).
+A request is only resent on a fresh connection if it never reached the server
+or its method is idempotent; a POST that was sent but got no response raises
+ConnectionError instead of possibly being applied twice.
+
+    async with ApiClient("http://localhost:8000/api", token=token) as api:
+        res = await api.post("/posts", {"type": "blog", "title": "t", "content": "c"})
+        post_id = res.json()["id"]
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+class ApiError(Exception):
+    def __init__(self, response, message=None):
+        self.response = response
+        super().__init__(message or f"HTTP {response.status}: {response.body[:200]!r}")
+
+
+class ApiResponse:
+    def __init__(self, status, headers, body, elapsed):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed  # seconds from sending the request to the last body byte
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise ApiError(self)
+        return self
+
+
+# Methods that may be sent twice without changing the outcome (RFC 9110, 9.2.2)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class _StaleConnection(Exception):
+    def __init__(self, written):
+        self.written = written  # the request may have reached the server
+        super().__init__()
+
+
+class ApiClient:
+    def __init__(self, base_url, token=None, pool_size=8, timeout=10.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def get(self, path, params=None, headers=None):
+        return await self.request("GET", path, params=params, headers=headers)
+
+    async def post(self, path, body=None, headers=None):
+        return await self.request("POST", path, body=body, headers=headers)
+
+    async def put(self, path, body=None, headers=None):
+        return await self.request("PUT", path, body=body, headers=headers)
+
+    async def delete(self, path, headers=None):
+        return await self.request("DELETE", path, headers=headers)
+
+    async def request(self, method, path, body=None, params=None, headers=None):
+        target = self.prefix + path
+        if params:
+            target += "?" + urlencode(params)
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        if self.token:
+            lines.append(f"Authorization: Bearer {self.token}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        raw = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + payload
+
+        async with self._slots:
+            reused = bool(self._idle)
+            try:
+                return await asyncio.wait_for(self._send(raw, method), self.timeout)
+            except _StaleConnection as e:
+                if not reused:
+                    raise ConnectionError(f"{self.host}:{self.port} closed the connection")
+                if e.written and method not in IDEMPOTENT_METHODS:
+                    # The server may already have applied it; sending it again could duplicate the write
+                    raise ConnectionError(
+                        f"{self.host}:{self.port} closed the connection after {method} {target} was sent"
+                    )
+                # The server dropped an idle keep-alive connection; retry once on a fresh one
+                return await asyncio.wait_for(self._send(raw, method, fresh=True), self.timeout)
+
+    async def _send(self, raw, method, fresh=False):
+        if self._idle and not fresh:
+            reader, writer = self._idle.pop()
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+        start = time.perf_counter()
+        try:
+            # An idle connection the server has already closed is seen as EOF before writing
+            if reader.at_eof() or writer.is_closing():
+                raise ConnectionError()
+            writer.write(raw)
+            await writer.drain()
+        except ConnectionError:
+            writer.close()
+            raise _StaleConnection(written=False)
+        try:
+            status, headers, body, keep_alive = await self._read_response(reader, method)
+        except (ConnectionError, asyncio.IncompleteReadError, _StaleConnection):
+            writer.close()
+            raise _StaleConnection(written=True)
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep_alive:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+        return ApiResponse(status, headers, body, time.perf_counter() - start)
+
+    async def _read_response(self, reader, method):
+        status_line = await reader.readline()
+        if not status_line:
+            raise _StaleConnection(written=True)
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+        status = int(status)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, headers, body, keep_alive
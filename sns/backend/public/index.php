@@ -3,6 +3,7 @@
 header("Access-Control-Allow-Origin: *");
 header("Access-Control-Allow-Methods: GET, POST, OPTIONS, PUT, DELETE");
 header("Access-Control-Allow-Headers: Content-Type, Authorization");
+header("Access-Control-Expose-Headers: X-Next-Cursor");
 
 ini_set('log_errors', 1);
 ini_set('error_log', __DIR__ . '/php_errors.log');
@@ -47,6 +48,13 @@ if ($uri === '/api/login' && $method === 'POST') {
     exit;
 }
 
+if ($uri === '/api/logout' && $method === 'POST') {
+    header('Content-Type: application/json');
+    $controller = new UserController();
+    echo $controller->logout();
+    exit;
+}
+
 if ($uri === '/api/posts' && $method === 'GET') {
     header('Content-Type: application/json');
     $controller = new PostController();
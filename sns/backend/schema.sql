@@ -40,10 +40,14 @@ CREATE TABLE IF NOT EXISTS reactions (
     FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS rate_limits (
+-- RateLimiter (GCRA): tat is the theoretical arrival time in microseconds
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
     ip_address VARCHAR(45) NOT NULL,
     endpoint VARCHAR(100) NOT NULL,
-    window_start INT NOT NULL,
-    request_count INT DEFAULT 1,
+    tat INTEGER NOT NULL,
+    allowed INTEGER NOT NULL,
     PRIMARY KEY (ip_address, endpoint)
 );
+
+-- Feed listing and cursor pagination walk posts by (type, created_at)
+CREATE INDEX IF NOT EXISTS posts_type_created_at_index ON posts(type, created_at);
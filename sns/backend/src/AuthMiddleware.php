@@ -1,5 +1,8 @@
 <?php
 
+require_once __DIR__ . '/Database.php';
+require_once __DIR__ . '/TokenCache.php';
+
 class AuthMiddleware
 {
     private $db;
@@ -11,18 +14,14 @@ class AuthMiddleware
 
     public function authenticate()
     {
-        $headers = apache_request_headers();
-        $authHeader = $headers['Authorization'] ?? $_SERVER['HTTP_AUTHORIZATION'] ?? '';
+        $token = $this->token();
 
-        if (!preg_match('/Bearer\s(\S+)/', $authHeader, $matches)) {
-            http_response_code(401);
-            echo json_encode(['error' => 'Unauthorized: No token provided']);
-            exit;
+        $userId = TokenCache::get($token);
+        if ($userId !== null) {
+            return $userId;
         }
 
-        $token = $matches[1];
-
-        $stmt = $this->db->prepare("SELECT id FROM users WHERE api_token = :token");
+        $stmt = Database::statement("SELECT id FROM users WHERE api_token = :token");
         $stmt->execute([':token' => $token]);
         $user = $stmt->fetch();
 
@@ -32,6 +31,24 @@ class AuthMiddleware
             exit;
         }
 
+        TokenCache::put($token, $user['id']);
         return $user['id'];
     }
+
+    /**
+     * Bearer token of the current request (responds 401 if there is none)
+     */
+    public function token()
+    {
+        $headers = apache_request_headers();
+        $authHeader = $headers['Authorization'] ?? $_SERVER['HTTP_AUTHORIZATION'] ?? '';
+
+        if (!preg_match('/Bearer\s(\S+)/', $authHeader, $matches)) {
+            http_response_code(401);
+            echo json_encode(['error' => 'Unauthorized: No token provided']);
+            exit;
+        }
+
+        return $matches[1];
+    }
 }
@@ -60,11 +60,39 @@ class PostController
             $params[':search'] = "%$search%";
         }
 
+        // Keyset (cursor) mode: opt in with ?cursor= (empty for the first page) or ?before_id=
+        $cursorMode = isset($_GET['cursor']) || isset($_GET['before_id']);
+        if ($cursorMode) {
+            $position = null;
+            if (!empty($_GET['cursor'])) {
+                $position = $this->decodeCursor($_GET['cursor']);
+                if (!$position) {
+                    http_response_code(400);
+                    return json_encode(['error' => 'Invalid cursor.']);
+                }
+            } elseif (!empty($_GET['before_id'])) {
+                $aStmt = Database::statement("SELECT created_at, id FROM posts WHERE id = :id");
+                $aStmt->execute([':id' => (int) $_GET['before_id']]);
+                $anchor = $aStmt->fetch(PDO::FETCH_ASSOC);
+                if (!$anchor) {
+                    http_response_code(400);
+                    return json_encode(['error' => 'Invalid before_id.']);
+                }
+                $position = [$anchor['created_at'], (int) $anchor['id']];
+            }
+
+            if ($position) {
+                $whereConditions[] = "(p.created_at < :cursor_at OR (p.created_at = :cursor_at AND p.id < :cursor_id))";
+                $params[':cursor_at'] = $position[0];
+                $params[':cursor_id'] = $position[1];
+            }
+        }
+
         if (!empty($whereConditions)) {
             $query .= " WHERE " . implode(" AND ", $whereConditions);
         }
 
-        $query .= " ORDER BY p.created_at DESC";
+        $query .= $cursorMode ? " ORDER BY p.created_at DESC, p.id DESC" : " ORDER BY p.created_at DESC";
 
         $limit = isset($_GET['limit']) ? (int) $_GET['limit'] : 20;
         $page = isset($_GET['page']) ? (int) $_GET['page'] : 1;
@@ -72,20 +100,31 @@ class PostController
             $limit = 20;
         if ($page < 1)
             $page = 1;
-        $offset = ($page - 1) * $limit;
+        $offset = $cursorMode ? 0 : ($page - 1) * $limit;
 
         $query .= " LIMIT :limit OFFSET :offset";
 
-        $stmt = $this->db->prepare($query);
+        // Filter combinations are few, so each variant of the query is prepared once
+        $stmt = Database::statement($query);
         foreach ($params as $key => $val) {
-            $stmt->bindValue($key, $val);
+            $stmt->bindValue($key, $val, is_int($val) ? PDO::PARAM_INT : PDO::PARAM_STR);
         }
-        $stmt->bindValue(':limit', $limit, PDO::PARAM_INT);
+        // Cursor mode fetches one extra row to know whether there is a next page
+        $stmt->bindValue(':limit', $cursorMode ? $limit + 1 : $limit, PDO::PARAM_INT);
         $stmt->bindValue(':offset', $offset, PDO::PARAM_INT);
 
         $stmt->execute();
         $posts = $stmt->fetchAll();
 
+        if ($cursorMode) {
+            // The response body stays a plain array; the next cursor travels in a header
+            if (count($posts) > $limit) {
+                $posts = array_slice($posts, 0, $limit);
+                $last = end($posts);
+                header('X-Next-Cursor: ' . $this->encodeCursor($last['created_at'], (int) $last['id']));
+            }
+        }
+
         if (!empty($posts)) {
             $postIds = array_column($posts, 'id');
             $idsStr = implode(',', array_map('intval', $postIds));
@@ -126,6 +165,22 @@ class PostController
         return json_encode($posts);
     }
 
+    private function encodeCursor($createdAt, $id)
+    {
+        $json = json_encode([$createdAt, $id]);
+        return rtrim(strtr(base64_encode($json), '+/', '-_'), '=');
+    }
+
+    private function decodeCursor($cursor)
+    {
+        $json = base64_decode(strtr((string) $cursor, '-_', '+/'), true);
+        $data = $json === false ? null : json_decode($json, true);
+        if (!is_array($data) || count($data) !== 2 || !is_string($data[0]) || !is_int($data[1])) {
+            return null;
+        }
+        return $data;
+    }
+
     public function store($data)
     {
         $userId = $this->auth->authenticate();
@@ -230,7 +285,7 @@ class PostController
                     $success = move_uploaded_file($fileTmpPath, $destPath);
                 }
             } else {
-                error_log("GD extension not loaded. Skipping metadata removal.");
+                Database::debug("GD extension not loaded. Skipping metadata removal.");
                 $success = move_uploaded_file($fileTmpPath, $destPath);
             }
 
@@ -270,7 +325,7 @@ class PostController
             $this->db->beginTransaction();
 
             $query = "INSERT INTO posts (user_id, type, content, title, image_path, reply_to_id, created_at) VALUES (:user_id, :type, :content, :title, :image_path, :reply_to_id, datetime('now'))";
-            $stmt = $this->db->prepare($query);
+            $stmt = Database::statement($query);
             $stmt->execute([
                 ':user_id' => $userId,
                 ':type' => $type,
@@ -283,7 +338,7 @@ class PostController
 
             if ($quotedPostId) {
                 $qQuery = "INSERT INTO quotes (quoter_post_id, quoted_post_id) VALUES (:quoter, :quoted)";
-                $qStmt = $this->db->prepare($qQuery);
+                $qStmt = Database::statement($qQuery);
                 $qStmt->execute([':quoter' => $postId, ':quoted' => $quotedPostId]);
             }
 
@@ -314,7 +369,7 @@ class PostController
         }
 
         // Verify Question Ownership
-        $qStmt = $this->db->prepare("SELECT user_id, type FROM posts WHERE id = :id");
+        $qStmt = Database::statement("SELECT user_id, type FROM posts WHERE id = :id");
         $qStmt->execute([':id' => $questionId]);
         $question = $qStmt->fetch(PDO::FETCH_ASSOC);
 
@@ -337,7 +392,7 @@ class PostController
         }
 
         // Verify Answer belongs to Question
-        $aStmt = $this->db->prepare("SELECT reply_to_id, type FROM posts WHERE id = :id");
+        $aStmt = Database::statement("SELECT reply_to_id, type FROM posts WHERE id = :id");
         $aStmt->execute([':id' => $answerId]);
         $answer = $aStmt->fetch(PDO::FETCH_ASSOC);
 
@@ -348,7 +403,7 @@ class PostController
         }
 
         // Update
-        $uStmt = $this->db->prepare("UPDATE posts SET best_answer_id = :aid WHERE id = :qid");
+        $uStmt = Database::statement("UPDATE posts SET best_answer_id = :aid WHERE id = :qid");
         $uStmt->execute([':aid' => $answerId, ':qid' => $questionId]);
 
         echo json_encode(['message' => 'Best answer set successfully.']);
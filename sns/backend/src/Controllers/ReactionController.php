@@ -27,19 +27,19 @@ class ReactionController
             return json_encode(['error' => 'Post ID and Emoji are required.']);
         }
 
-        $check = $this->db->prepare("SELECT id FROM reactions WHERE user_id = :uid AND post_id = :pid AND emoji_char = :emoji");
+        $check = Database::statement("SELECT id FROM reactions WHERE user_id = :uid AND post_id = :pid AND emoji_char = :emoji");
         $check->execute([':uid' => $userId, ':pid' => $postId, ':emoji' => $emoji]);
 
         $existing = $check->fetch(PDO::FETCH_ASSOC);
 
         if ($existing) {
-            $del = $this->db->prepare("DELETE FROM reactions WHERE id = :id");
+            $del = Database::statement("DELETE FROM reactions WHERE id = :id");
             $del->execute([':id' => $existing['id']]);
             return json_encode(['message' => 'Reaction removed.']);
         }
 
         $query = "INSERT INTO reactions (user_id, post_id, emoji_char) VALUES (:uid, :pid, :emoji)";
-        $stmt = $this->db->prepare($query);
+        $stmt = Database::statement($query);
         if ($stmt->execute([':uid' => $userId, ':pid' => $postId, ':emoji' => $emoji])) {
             return json_encode(['message' => 'Reaction added.']);
         }
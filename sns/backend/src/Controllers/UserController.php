@@ -1,6 +1,8 @@
 <?php
 
 require_once __DIR__ . '/../Database.php';
+require_once __DIR__ . '/../AuthMiddleware.php';
+require_once __DIR__ . '/../TokenCache.php';
 
 class UserController
 {
@@ -24,7 +26,7 @@ class UserController
         }
 
         // Check if user exists
-        $stmt = $this->db->prepare("SELECT id FROM users WHERE username = :username");
+        $stmt = Database::statement("SELECT id FROM users WHERE username = :username");
         $stmt->bindParam(':username', $username);
         $stmt->execute();
         $existingUser = $stmt->fetch(PDO::FETCH_ASSOC);
@@ -46,7 +48,7 @@ class UserController
 
         $query = "INSERT INTO users (username, display_name, password_hash) VALUES (:username, :display_name, :password)";
 
-        $stmt = $this->db->prepare($query);
+        $stmt = Database::statement($query);
         $stmt->bindParam(':username', $username);
         $stmt->bindParam(':display_name', $displayName);
         $stmt->bindParam(':password', $passwordHash); // Store hash
@@ -62,30 +64,33 @@ class UserController
 
     public function login($data)
     {
-        error_log("Login attempt: " . print_r($data, true));
         $username = $data['username'] ?? '';
         $password = $data['password'] ?? '';
 
-        $stmt = $this->db->prepare("SELECT id, username, password_hash FROM users WHERE username = :username");
+        $stmt = Database::statement("SELECT id, username, password_hash, api_token FROM users WHERE username = :username");
         $stmt->bindParam(':username', $username);
         $stmt->execute();
 
         $row = $stmt->fetch(PDO::FETCH_ASSOC);
 
         if ($row) {
-            error_log("User found: " . $row['username']);
-            error_log("Stored Hash: " . $row['password_hash']);
-            error_log("Provided Password: " . $password);
+            Database::debug("User found: " . $row['username']);
 
             if (password_verify($password, $row['password_hash'])) {
-                error_log("Password verify success");
+                Database::debug("Password verify success");
                 // Generate simple token (for MVP)
                 $token = bin2hex(random_bytes(16));
 
                 // Save token to DB
-                $update = $this->db->prepare("UPDATE users SET api_token = :token WHERE id = :id");
+                $update = Database::statement("UPDATE users SET api_token = :token WHERE id = :id");
                 $update->execute([':token' => $token, ':id' => $row['id']]);
 
+                // The previous token stops working; the new one is ready in the cache
+                if (!empty($row['api_token'])) {
+                    TokenCache::forget($row['api_token']);
+                }
+                TokenCache::put($token, $row['id']);
+
                 return json_encode([
                     'message' => 'Login successful.',
                     'token' => $token,
@@ -95,10 +100,10 @@ class UserController
                     ]
                 ]);
             } else {
-                error_log("Password verify failed");
+                Database::debug("Password verify failed");
             }
         } else {
-            error_log("User not found: " . $username);
+            Database::debug("User not found: " . $username);
         }
 
         http_response_code(401);
@@ -112,4 +117,17 @@ class UserController
 
         return json_encode(['error' => $errorDetail]);
     }
+
+    public function logout()
+    {
+        $auth = new AuthMiddleware($this->db);
+        $token = $auth->token();
+        $userId = $auth->authenticate();
+
+        $update = Database::statement("UPDATE users SET api_token = NULL WHERE id = :id");
+        $update->execute([':id' => $userId]);
+        TokenCache::forget($token);
+
+        return json_encode(['message' => 'Logged out.']);
+    }
 }
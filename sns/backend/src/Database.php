@@ -2,33 +2,75 @@
 
 class Database
 {
-    // Use relative path resolution from __DIR__
-    private $db_file;
+    // One connection shared by every controller in a request; persistent, so the
+    // SQLite handle itself stays open in the worker process between requests
+    private static $shared = null;
+    // Prepared statements of the shared connection, keyed by SQL
+    private static $statements = [];
+
     public $conn;
 
     public function getConnection()
     {
-        // backend/src/Database.php -> ../../sns_debug.db
-        // Use dirname to resolve path without requiring file existence (unlike realpath)
-        $this->db_file = dirname(__DIR__, 2) . '/sns_debug.db';
+        $this->conn = self::connection();
+        return $this->conn;
+    }
 
-        error_log("Raw Path: " . __DIR__ . '/../../sns_debug.db');
-        error_log("Resolved DB File Path: " . $this->db_file);
+    public static function connection()
+    {
+        if (self::$shared !== null) {
+            return self::$shared;
+        }
 
-        $this->conn = null;
+        // backend/src/Database.php -> ../../sns_debug.db
+        // Use dirname to resolve path without requiring file existence (unlike realpath)
+        $dbFile = dirname(__DIR__, 2) . '/sns_debug.db';
+        self::debug("Connecting to SQLite database at: " . $dbFile);
 
         try {
-            error_log("Connecting to SQLite database at: " . $this->db_file);
-            $this->conn = new PDO("sqlite:" . $this->db_file);
-            $this->conn->setAttribute(PDO::ATTR_ERRMODE, PDO::ERRMODE_EXCEPTION);
-            $this->conn->setAttribute(PDO::ATTR_DEFAULT_FETCH_MODE, PDO::FETCH_ASSOC);
-            $this->conn->exec("PRAGMA foreign_keys = ON;");
+            $conn = new PDO("sqlite:" . $dbFile, null, null, [
+                PDO::ATTR_PERSISTENT => true,
+                PDO::ATTR_TIMEOUT => 5, // busy timeout while another request holds the write lock
+            ]);
+            $conn->setAttribute(PDO::ATTR_ERRMODE, PDO::ERRMODE_EXCEPTION);
+            $conn->setAttribute(PDO::ATTR_DEFAULT_FETCH_MODE, PDO::FETCH_ASSOC);
+            // WAL lets readers run while a request writes; it is stored in the file, the rest is per connection
+            $conn->exec("PRAGMA journal_mode = WAL;
+                         PRAGMA synchronous = NORMAL;
+                         PRAGMA foreign_keys = ON;
+                         PRAGMA temp_store = MEMORY;
+                         PRAGMA cache_size = -8000;");
         } catch (PDOException $exception) {
             error_log("Connection error: " . $exception->getMessage());
             echo json_encode(['error' => 'Connection error: ' . $exception->getMessage()]);
             exit;
         }
 
-        return $this->conn;
+        self::$shared = $conn;
+        return $conn;
+    }
+
+    /**
+     * Prepared statement for $sql, prepared once per request and reused.
+     * Pass all parameters to execute() so none are left over from the last use.
+     */
+    public static function statement($sql)
+    {
+        if (!isset(self::$statements[$sql])) {
+            self::$statements[$sql] = self::connection()->prepare($sql);
+        } else {
+            self::$statements[$sql]->closeCursor();
+        }
+        return self::$statements[$sql];
+    }
+
+    /**
+     * error_log only when the SNS_DEBUG environment variable is set
+     */
+    public static function debug($message)
+    {
+        if (getenv('SNS_DEBUG')) {
+            error_log($message);
+        }
     }
 }
@@ -1,5 +1,14 @@
 <?php
 
+/**
+ * Per-IP, per-endpoint rate limit (GCRA, which behaves like a token bucket).
+ *
+ * A client may burst `limit` requests, which then refill evenly over the
+ * window. The only state per key is the theoretical arrival time (TAT, in
+ * microseconds) in rate_limit_buckets, and checking and consuming is one
+ * atomic upsert, so concurrent requests cannot over-admit. Same algorithm
+ * as sns2's SqliteRateLimitStore.
+ */
 class RateLimiter
 {
     private $db;
@@ -9,42 +18,32 @@ class RateLimiter
     public function __construct($dbConnection, $limit = 60, $window = 60)
     {
         $this->db = $dbConnection;
-        $this->limit = $limit;   // Max requests
-        $this->window = $window; // Window size in seconds
+        $this->limit = $limit;   // Max requests (burst size)
+        $this->window = $window; // Seconds for a full bucket to refill
     }
 
     public function check($ip, $endpoint)
     {
-        $currentTime = time();
-        $windowStart = $currentTime - ($currentTime % $this->window);
+        $now = (int) (microtime(true) * 1000000);
+        $interval = intdiv($this->window * 1000000, $this->limit); // time one request uses up
+        $window = $this->window * 1000000;
 
-        // Check existing record
-        $stmt = $this->db->prepare("SELECT window_start, request_count FROM rate_limits WHERE ip_address = :ip AND endpoint = :endpoint");
-        $stmt->execute([':ip' => $ip, ':endpoint' => $endpoint]);
-        $row = $stmt->fetch();
+        // The bucket advances only if the request fits; SET expressions all see the old row.
+        // Integers are bound as such, since SQLite compares text and numbers as strings.
+        $stmt = $this->db->prepare("INSERT INTO rate_limit_buckets (ip_address, endpoint, tat, allowed)
+                                    VALUES (:ip, :endpoint, :now + :interval, :interval <= :window)
+                                    ON CONFLICT (ip_address, endpoint) DO UPDATE SET
+                                        tat = CASE WHEN MAX(tat, :now) + :interval - :now <= :window
+                                                   THEN MAX(tat, :now) + :interval ELSE tat END,
+                                        allowed = MAX(tat, :now) + :interval - :now <= :window
+                                    RETURNING allowed");
+        $stmt->bindValue(':ip', $ip);
+        $stmt->bindValue(':endpoint', $endpoint);
+        $stmt->bindValue(':now', $now, PDO::PARAM_INT);
+        $stmt->bindValue(':interval', $interval, PDO::PARAM_INT);
+        $stmt->bindValue(':window', $window, PDO::PARAM_INT);
+        $stmt->execute();
 
-        if ($row) {
-            if ($row['window_start'] < $windowStart) {
-                // Window expired, reset
-                $update = $this->db->prepare("UPDATE rate_limits SET window_start = :start, request_count = 1 WHERE ip_address = :ip AND endpoint = :endpoint");
-                $update->execute([':start' => $windowStart, ':ip' => $ip, ':endpoint' => $endpoint]);
-                return true;
-            } else {
-                // Within window
-                if ($row['request_count'] >= $this->limit) {
-                    return false; // Limit exceeded
-                } else {
-                    // Increment
-                    $update = $this->db->prepare("UPDATE rate_limits SET request_count = request_count + 1 WHERE ip_address = :ip AND endpoint = :endpoint");
-                    $update->execute([':ip' => $ip, ':endpoint' => $endpoint]);
-                    return true;
-                }
-            }
-        } else {
-            // New record
-            $insert = $this->db->prepare("INSERT INTO rate_limits (ip_address, endpoint, window_start, request_count) VALUES (:ip, :endpoint, :start, 1)");
-            $insert->execute([':ip' => $ip, ':endpoint' => $endpoint, ':start' => $windowStart]);
-            return true;
-        }
+        return (bool) $stmt->fetchColumn();
     }
 }
@@ -0,0 +1,72 @@
+<?php
+
+/**
+ * API token -> user id cache for AuthMiddleware.
+ *
+ * Entries live in APCu, the only memory that outlives a request, so every
+ * PHP-FPM / mod_php worker on the host shares them. Without APCu nothing is
+ * cached and every lookup goes to the database. The keyspace is a fixed
+ * table of CAPACITY slots chosen by token hash, so the cache never holds
+ * more than CAPACITY entries; a colliding token simply replaces the slot.
+ * Entries expire after TTL seconds and are dropped on logout and on login
+ * (token rotation). Only valid tokens are cached; unknown tokens always go
+ * to the database.
+ */
+class TokenCache
+{
+    const CAPACITY = 1000;
+    const TTL = 60;
+    const APCU_PREFIX = 'sns_token:';
+
+    public static function get($token)
+    {
+        if (!self::apcuEnabled()) {
+            return null;
+        }
+
+        $key = self::key($token);
+        $entry = apcu_fetch(self::slot($key), $found);
+        // The slot may hold another token that hashed to it
+        if ($found && $entry[0] === $key) {
+            return $entry[1];
+        }
+        return null;
+    }
+
+    public static function put($token, $userId)
+    {
+        if (self::apcuEnabled()) {
+            $key = self::key($token);
+            apcu_store(self::slot($key), [$key, (int) $userId], self::TTL);
+        }
+    }
+
+    public static function forget($token)
+    {
+        if (!self::apcuEnabled()) {
+            return;
+        }
+
+        $key = self::key($token);
+        $entry = apcu_fetch(self::slot($key), $found);
+        if ($found && $entry[0] === $key) {
+            apcu_delete(self::slot($key));
+        }
+    }
+
+    // Keys are hashes so raw tokens never sit in shared memory
+    private static function key($token)
+    {
+        return hash('sha256', $token);
+    }
+
+    private static function slot($key)
+    {
+        return self::APCU_PREFIX . (hexdec(substr($key, 0, 8)) % self::CAPACITY);
+    }
+
+    private static function apcuEnabled()
+    {
+        return function_exists('apcu_enabled') && apcu_enabled();
+    }
+}
@@ -0,0 +1,286 @@
+"""Open-loop load test and latency benchmark for the sns and sns2 APIs.
+
+Requests are fired on a fixed schedule per endpoint (`--rate` per second,
+constant or Poisson arrivals) whether or not earlier ones have finished, and
+latency is measured from the scheduled send time, so a slow server shows up
+as latency instead of silently lowering the load. Results are written as JSON
+with p50/p95/p99, throughput and error rates per endpoint, and can be
+compared against a stored baseline:
+
+    python bench_api.py --target sns --rate 20 --duration 30 --save-baseline
+    python bench_api.py --target sns --rate 20 --duration 30 --baseline bench_baseline.json
+
+The exit status is 1 when any endpoint regressed past `--max-regression`.
+
+`--suite pagination` compares offset paging at page 1 and at `--deep-page`
+(default 10,000) with keyset paging (`cursor` / `before_id`) from the same
+depth; the table needs at least deep-page x 20 posts of the listed type:
+
+    python bench_api.py --target sns2 --suite pagination --rate 5 --duration 20
+sns2 rate-limits to 100 req/min per client, so raise the limit in
+config/routes.php before benchmarking it; 429s are reported as `rate_limited`.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from api_client import ApiClient
+
+TARGETS = {
+    "sns": {"api_url": "http://localhost:8000/api", "login": "testuser", "password": "password123"},
+    "sns2": {"api_url": "http://localhost:8080/api", "login": "test@example.com", "password": "password123"},
+}
+EMOJIS = ["👍", "❤️", "😂", "🤔", "🎉", "😢", "🔥", "👀"]
+SEARCH_TERMS = ["テスト", "あ", "Playwright", "blog", "質問", "hello"]
+PAGE_SIZE = 20
+
+
+@dataclass
+class Endpoint:
+    name: str
+    build: callable  # (ctx, rng) -> (method, path, params, body)
+
+
+def _sns_endpoints():
+    types = ["microblog", "blog", "question"]
+    return [
+        Endpoint("posts", lambda ctx, rng: ("GET", "/posts", {"type": rng.choice(types)}, None)),
+        Endpoint("posts_search", lambda ctx, rng: ("GET", "/posts", {"q": rng.choice(SEARCH_TERMS)}, None)),
+        Endpoint("posts_deep_page", lambda ctx, rng: (
+            "GET", "/posts", {"type": "microblog", "page": rng.randint(2, 50), "limit": 20}, None)),
+        Endpoint("posts_large_limit", lambda ctx, rng: ("GET", "/posts", {"limit": 100}, None)),
+    ]
+
+
+def _sns2_reaction_toggle(ctx, rng):
+    # Alternate add/remove per (post, emoji) so both directions are exercised and succeed
+    key = (rng.choice(ctx["post_ids"]), rng.choice(EMOJIS))
+    if key in ctx["reacted"]:
+        ctx["reacted"].discard(key)
+        return "DELETE", f"/posts/{key[0]}/reactions/{quote(key[1])}", None, None
+    ctx["reacted"].add(key)
+    return "POST", f"/posts/{key[0]}/reactions", None, {"emoji": key[1]}
+
+
+def _sns2_endpoints():
+    return [
+        Endpoint("feeds", lambda ctx, rng: ("GET", "/feeds", {"page": rng.randint(1, 5), "per_page": 20}, None)),
+        Endpoint("search", lambda ctx, rng: ("GET", "/search", {"q": rng.choice(SEARCH_TERMS)}, None)),
+        Endpoint("qa", lambda ctx, rng: ("GET", "/qa", {"page": rng.randint(1, 3)}, None)),
+        Endpoint("blogs", lambda ctx, rng: ("GET", "/blogs", {"page": rng.randint(1, 3)}, None)),
+        Endpoint("reactions", lambda ctx, rng: ("GET", f"/posts/{rng.choice(ctx['post_ids'])}/reactions", None, None)),
+        Endpoint("reaction_toggle", _sns2_reaction_toggle),
+    ]
+
+
+def _sns_pagination_endpoints():
+    listing = {"type": "microblog", "limit": PAGE_SIZE}
+    return [
+        Endpoint("page_1_offset", lambda ctx, rng: ("GET", "/posts", {**listing, "page": 1}, None)),
+        Endpoint("page_deep_offset", lambda ctx, rng: ("GET", "/posts", {**listing, "page": ctx["deep_page"]}, None)),
+        Endpoint("page_1_cursor", lambda ctx, rng: ("GET", "/posts", {**listing, "cursor": ""}, None)),
+        Endpoint("page_deep_cursor", lambda ctx, rng: (
+            "GET", "/posts", {**listing, "before_id": ctx["deep_anchor"]}, None)),
+    ]
+
+
+def _sns2_pagination_endpoints():
+    listing = {"per_page": PAGE_SIZE}
+    return [
+        Endpoint("page_1_offset", lambda ctx, rng: ("GET", "/feeds", {**listing, "page": 1}, None)),
+        Endpoint("page_deep_offset", lambda ctx, rng: ("GET", "/feeds", {**listing, "page": ctx["deep_page"]}, None)),
+        Endpoint("page_1_cursor", lambda ctx, rng: ("GET", "/feeds", {**listing, "cursor": ""}, None)),
+        Endpoint("page_deep_cursor", lambda ctx, rng: (
+            "GET", "/feeds", {**listing, "before_id": ctx["deep_anchor"]}, None)),
+    ]
+
+
+ENDPOINTS = {"sns": _sns_endpoints, "sns2": _sns2_endpoints}
+PAGINATION_ENDPOINTS = {"sns": _sns_pagination_endpoints, "sns2": _sns2_pagination_endpoints}
+
+
+async def login(target, api_url, login_name, password):
+    async with ApiClient(api_url) as api:
+        if target == "sns":
+            res = await api.post("/login", {"username": login_name, "password": password})
+        else:
+            res = await api.post("/auth/login", {"email": login_name, "password": password})
+        return res.raise_for_status().json()["token"]
+
+
+async def discover_post_ids(api):
+    res = await api.get("/feeds", params={"per_page": 50})
+    ids = [post["id"] for post in (res.json() or {}).get("data", [])] if res.ok else []
+    if not ids:
+        raise SystemExit("sns2 has no feed posts to react to; seed some first")
+    return ids
+
+
+async def discover_deep_anchor(api, target, deep_page):
+    """ID of the last post before `deep_page`, so keyset paging starts at the same depth."""
+    if target == "sns":
+        res = await api.get("/posts", params={"type": "microblog", "limit": PAGE_SIZE, "page": deep_page - 1})
+        posts = res.json() if res.ok else []
+    else:
+        res = await api.get("/feeds", params={"per_page": PAGE_SIZE, "page": deep_page - 1})
+        posts = (res.json() or {}).get("data", []) if res.ok else []
+    if not posts:
+        raise SystemExit(f"Fewer than {(deep_page - 1) * PAGE_SIZE} posts; generate a larger dataset first")
+    return posts[-1]["id"]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, duration):
+    latencies = sorted(s[1] for s in samples)
+    errors = sum(1 for status, _ in samples if status is None or status >= 400 and status != 429)
+    limited = sum(1 for status, _ in samples if status == 429)
+    total = len(samples)
+    ms = lambda v: None if v is None else round(v * 1000, 2)
+    return {
+        "requests": total,
+        "throughput_rps": round(total / duration, 2) if duration else 0,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0,
+        "rate_limited": limited,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / total) if total else None,
+        "max_ms": ms(latencies[-1]) if latencies else None,
+    }
+
+
+async def drive(api, endpoint, ctx, rate, duration, arrival, seed):
+    """Fire `endpoint` open-loop at `rate` req/s for `duration` seconds."""
+    rng = random.Random(seed)
+    samples = []
+    in_flight = []
+
+    async def fire(scheduled):
+        method, path, params, body = endpoint.build(ctx, rng)
+        try:
+            res = await api.request(method, path, body=body, params=params)
+            status = res.status
+        except Exception:
+            status = None
+        samples.append((status, time.perf_counter() - scheduled))
+
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        in_flight.append(asyncio.create_task(fire(next_at)))
+        next_at += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+
+    await asyncio.gather(*in_flight)
+    return samples, time.perf_counter() - start
+
+
+async def run(args):
+    defaults = TARGETS[args.target]
+    api_url = args.api_url or defaults["api_url"]
+    token = await login(args.target, api_url, args.login or defaults["login"], args.password or defaults["password"])
+
+    endpoints = (PAGINATION_ENDPOINTS if args.suite == "pagination" else ENDPOINTS)[args.target]()
+    if args.endpoints:
+        wanted = set(args.endpoints.split(","))
+        endpoints = [e for e in endpoints if e.name in wanted]
+
+    async with ApiClient(api_url, token=token, pool_size=args.connections, timeout=args.timeout) as api:
+        ctx = {"reacted": set(), "deep_page": args.deep_page}
+        if args.suite == "pagination":
+            ctx["deep_anchor"] = await discover_deep_anchor(api, args.target, args.deep_page)
+        elif args.target == "sns2":
+            ctx["post_ids"] = await discover_post_ids(api)
+
+        runs = await asyncio.gather(*(
+            drive(api, endpoint, ctx, args.rate, args.duration, args.arrival, args.seed + i)
+            for i, endpoint in enumerate(endpoints)
+        ))
+
+    return {
+        "target": args.target,
+        "suite": args.suite,
+        "api_url": api_url,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rate_per_endpoint": args.rate,
+        "duration_s": args.duration,
+        "arrival": args.arrival,
+        "endpoints": {e.name: summarize(samples, elapsed) for e, (samples, elapsed) in zip(endpoints, runs)},
+    }
+
+
+def compare(report, baseline, max_regression):
+    """Return human-readable regressions of `report` against `baseline`."""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if base[metric] and current[metric] and current[metric] > base[metric] * (1 + max_regression):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {current[metric]}")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error_rate {base['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop latency benchmark for the sns/sns2 APIs")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="sns")
+    parser.add_argument("--api-url", help="Override the target's API base URL")
+    parser.add_argument("--login", help="sns username or sns2 email")
+    parser.add_argument("--password")
+    parser.add_argument("--suite", choices=["default", "pagination"], default="default")
+    parser.add_argument("--deep-page", type=int, default=10000, help="Page number for the deep pagination case")
+    parser.add_argument("--endpoints", help="Comma-separated subset of endpoint names")
+    parser.add_argument("--rate", type=float, default=10.0, help="Requests per second per endpoint")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per endpoint")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="constant")
+    parser.add_argument("--connections", type=int, default=32, help="Keep-alive connection pool size")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to bench_baseline.json")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed latency increase (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open("bench_baseline.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report["endpoints"], ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
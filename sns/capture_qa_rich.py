@@ -1,34 +1,33 @@
 
-import time
+import asyncio
+import os
 import random
-from playwright.sync_api import sync_playwright
+import sys
+from playwright.async_api import async_playwright
+from capture_screenshots import CAPTURE_DIR, QA_META, SCREENSHOT_DIR
+from perf_capture import LAUNCH_ARGS, PERF_DIR, PERF_INIT_JS, PerfLog, PerfRecorder
+from readiness import Readiness
+from seeding import PostSeed, seed
+from session_cache import authenticated_state, session_token
+from visual_diff import element_boxes, report, sync
 
-def run():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1280, "height": 800})
-        page = context.new_page()
+EMOJIS = ['👍', '❤️', '😂', '🤔']
+
+async def run():
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    masks = {}
+    perf_log = PerfLog()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        storage_state = await authenticated_state(p)
+        context = await browser.new_context(viewport={"width": 1280, "height": 800}, storage_state=storage_state)
+        await context.add_init_script(PERF_INIT_JS)
+        page = await context.new_page()
+        perf = PerfRecorder(page, perf_log)
         page.on("dialog", lambda dialog: dialog.accept())
+        ready = Readiness(page)
 
-        # Register & Login
         try:
-            username = f"user_{random.randint(100000,999999)}"
-            print(f"Creating user: {username}")
-            
-            page.goto("http://localhost:5173/register")
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button[type="submit"]')
-            
-            page.wait_for_selector('h2:has-text("ログイン")', timeout=10000)
-            
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button:has-text("ログイン")')
-            
-            page.wait_for_selector('.post-card', timeout=10000)
-            print("Login successful")
-
             # Create specific posts
             posts = [
                 {"title": "salndfjnas", "content": "salndfjnas"},
@@ -37,60 +36,35 @@ def run():
                 {"title": "dsjafjsd", "content": "dsjafjsd"},
             ]
 
-            for post in posts:
-                page.evaluate(f"""
-                    async () => {{
-                        const token = localStorage.getItem('token');
-                        // Create Post
-                        const res = await fetch('http://localhost:8000/api/posts', {{
-                            method: 'POST',
-                            headers: {{
-                                'Content-Type': 'application/json',
-                                'Authorization': `Bearer ${{token}}` 
-                            }},
-                            body: JSON.stringify({{
-                                type: 'question', 
-                                title: '{post['title']}', 
-                                content: '{post['content']}'
-                            }})
-                        }});
-                        const data = await res.json();
-                        
-                        // Add Reaction (Randomly)
-                        const emojis = ['👍', '❤️', '😂', '🤔'];
-                        const emoji = emojis[Math.floor(Math.random() * emojis.length)];
-                        await fetch('http://localhost:8000/api/reactions', {{
-                             method: 'POST',
-                             headers: {{
-                                'Content-Type': 'application/json',
-                                'Authorization': `Bearer ${{token}}` 
-                             }},
-                             body: JSON.stringify({{
-                                 post_id: data.id,
-                                 emoji: emoji
-                             }})
-                        }});
-                    }}
-                """)
-                time.sleep(0.5)
-
+            # Add Reaction (Randomly)
+            await seed(
+                [PostSeed("question", post["content"], title=post["title"], reactions=[random.choice(EMOJIS)])
+                 for post in posts],
+                session_token(storage_state),
+            )
             print("Created posts with reactions")
 
-            # Go to Q&A List
-            page.click('a[href="/qa"]')
-            page.wait_for_selector('.qa-list', timeout=5000)
-            
-            # Additional wait to ensure data is fetched and rendered
-            time.sleep(2) 
+            # Reuse the cached session instead of registering a new user
+            await page.goto("http://localhost:5173/home")
+            await page.wait_for_selector('.post-card', timeout=10000)
+
+            # Go to Q&A List; wait until the list is fetched and rendered
+            async with perf.step("qa list"):
+                async with ready.after("Q&A list", responses=["GET /api/posts"], settle=".qa-list", replaces=2.0):
+                    await page.click('a[href="/qa"]')
             
-            page.screenshot(path="screenshots/qa_list.png")
+            masks["qa_list.png"] = await element_boxes(page, [QA_META])
+            await page.screenshot(path=f"{CAPTURE_DIR}/qa_list.png")
             print("Captured qa_list.png")
 
         except Exception as e:
             print(f"Error: {e}")
-            page.screenshot(path="screenshots/error_qa.png")
+            await page.screenshot(path="screenshots/error_qa.png")
 
-        browser.close()
+        await browser.close()
+        print(ready.log.summary())
+    print(report(sync(CAPTURE_DIR, SCREENSHOT_DIR, masks=masks)))
+    return perf_log.finish(os.path.join(SCREENSHOT_DIR, PERF_DIR, "capture_qa_rich.json"))
 
 if __name__ == "__main__":
-    run()
+    sys.exit(1 if asyncio.run(run()) else 0)
@@ -1,149 +1,191 @@
+import argparse
+import asyncio
+import os
+import sys
+from playwright.async_api import async_playwright
+from perf_capture import BUDGETS_FILE, LAUNCH_ARGS, PERF_DIR, PERF_INIT_JS, PerfLog, PerfRecorder, load_budgets
+from readiness import DEFAULT_TIMEOUT, Readiness, WaitLog
+from seeding import PostSeed, seed
+from session_cache import authenticated_state, session_token
+from visual_diff import STAGING_DIR, element_boxes, report, sync
+
+API_DOCS_URL = "http://localhost:8000/docs.html"
+FRONTEND_URL = "http://localhost:5173"
+SCREENSHOT_DIR = "screenshots"
+# Captures land here first; only screenshots that really changed replace SCREENSHOT_DIR's
+CAPTURE_DIR = os.path.join(SCREENSHOT_DIR, STAGING_DIR)
+PERF_REPORT = os.path.join(SCREENSHOT_DIR, PERF_DIR, "capture_screenshots.json")
+VIEWPORT = {"width": 1280, "height": 800}
+# Author line (random capture user) and timestamp of each post
+POST_META = ".post-item > div:first-child"
+QA_META = ".qa-list >> text=/Posted by/"
+
+# Regions that differ on every run, per screenshot; filled in by the scenarios
+masks = {}
+
+
+async def capture_api_docs(page, ready, perf):
+    async with perf.step("api docs"):
+        await page.goto(API_DOCS_URL)
+        await page.wait_for_load_state("networkidle")
+    await page.screenshot(path=f"{CAPTURE_DIR}/api_docs.png")
+    print("Captured api_docs.png")
+
+
+async def capture_auth(page, ready, perf):
+    # Only the empty forms are captured; the session comes from the cache
+    async with perf.step("register"):
+        await page.goto(f"{FRONTEND_URL}/register")
+        await page.wait_for_selector('input[placeholder="ユーザー名"]')
+    await page.screenshot(path=f"{CAPTURE_DIR}/register.png")
+    print("Captured register.png")
+
+    async with perf.step("login"):
+        await page.goto(f"{FRONTEND_URL}/login")
+        await page.wait_for_selector('input[placeholder="ユーザー名"]')
+    await page.screenshot(path=f"{CAPTURE_DIR}/login.png")
+    print("Captured login.png")
+
+
+async def open_home(page, ready, replaces=0.0):
+    async with ready.after("home", responses=["GET /api/posts"], settle=".container", replaces=replaces):
+        await page.goto(f"{FRONTEND_URL}/home")
+    await page.wait_for_selector('.post-card')
+
+
+async def capture_feed(page, ready, perf):
+    async with perf.step("feed"):
+        await open_home(page, ready, replaces=2.0)
+
+    # Create 3 Posts (each post triggers a refetch of the list)
+    for i in range(3):
+        await page.fill('textarea', f'Post Number {i+1} by Playwright')
+        async with perf.step(f"post {i + 1}"):
+            async with ready.after("post", responses=["POST /api/posts", "GET /api/posts"], settle=".container", replaces=1.0):
+                await page.click('button:has-text("投稿")')
+
+    await ready.settled("feed posts", ".container", replaces=1.0)
+
+    # Reaction - trigger
+    try:
+        async with perf.step("reaction picker"):
+            # Click reaction on the first post (latest)
+            await page.locator('button:has-text("リアクション")').first.click()
+
+            # Assuming .EmojiPickerReact is the container class
+            await ready.settled("emoji picker", ".EmojiPickerReact", replaces=1.0)
+
+        # Try clicking the first clickable element inside the picker container
+        picker_emoji = page.locator('.EmojiPickerReact button, .EmojiPickerReact img[data-emoji]').first
+        if await picker_emoji.count() > 0:
+            async with perf.step("reaction"):
+                async with ready.after("reaction", responses=["POST /api/reactions"], settle=".container", replaces=1.0):
+                    await picker_emoji.click()
+    except Exception as e:
+        print(f"Reaction interaction warning: {e}")
+
+    # Screenshot Feed with content
+    masks["feed_with_post.png"] = await element_boxes(page, [POST_META])
+    await page.screenshot(path=f"{CAPTURE_DIR}/feed_with_post.png")
+    print("Captured feed_with_post.png")
+
+    # Create Post Screen (focused)
+    await page.locator('.post-card').screenshot(path=f"{CAPTURE_DIR}/create_post.png")
+    print("Captured create_post.png")
+
+
+async def capture_blog(page, ready, perf):
+    await open_home(page, ready)
+    async with perf.step("blog"):
+        async with ready.after("blog tab", responses=["GET /api/posts"], settle=".container", replaces=1.0):
+            await page.click('text=ブログ')
+
+    # Create Blog Post
+    await page.fill('input[placeholder="タイトル"]', 'My First Blog')
+    await page.fill('textarea', 'This is a long blog post courtesy of Playwright.')
+    async with perf.step("blog post"):
+        async with ready.after("blog post", responses=["POST /api/posts", "GET /api/posts"], settle=".container", replaces=2.0):
+            await page.click('button:has-text("投稿")')
+
+    masks["blog_list.png"] = await element_boxes(page, [POST_META])
+    await page.screenshot(path=f"{CAPTURE_DIR}/blog_list.png")  # Main blog view
+    print("Captured blog_list.png")
+
+
+async def capture_qa(page, ready, perf):
+    await open_home(page, ready)
+
+    async with perf.step("qa list"):
+        async with ready.after("Q&A list", responses=["GET /api/posts"], settle=".qa-list", replaces=2.0):
+            await page.click('a[href="/qa"]')
+        await page.wait_for_url("**/qa")
 
-import time
-from playwright.sync_api import sync_playwright
-
-def run():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1280, "height": 800})
-        page = context.new_page()
+    masks["qa_list.png"] = await element_boxes(page, [QA_META])
+    await page.screenshot(path=f"{CAPTURE_DIR}/qa_list.png")
+    print("Captured qa_list.png")
+
+
+async def run_scenario(browser, slots, log, perf_log, timeout, name, scenario, storage_state=None):
+    # Each scenario gets its own context so cookies/localStorage never leak between them
+    async with slots:
+        context = await browser.new_context(viewport=VIEWPORT, storage_state=storage_state)
+        await context.add_init_script(PERF_INIT_JS)
+        page = await context.new_page()
+        perf = PerfRecorder(page, perf_log)
 
         # Handle alerts (essential for this app's register/post flow)
         page.on("dialog", lambda dialog: dialog.accept())
 
-        # 1. API Docs
         try:
-            page.goto("http://localhost:8000/docs.html")
-            page.wait_for_load_state("networkidle")
-            page.screenshot(path="screenshots/api_docs.png")
-            print("Captured api_docs.png")
+            return await scenario(page, Readiness(page, timeout, log), perf)
         except Exception as e:
-            print(f"Error capturing api_docs: {e}")
-
-        # 2. Register
+            print(f"Error in {name}: {e}")
+            return None
+        finally:
+            await context.close()
+
+
+async def run(workers=4, timeout=DEFAULT_TIMEOUT, budgets=BUDGETS_FILE):
+    """Captures every scenario; returns the performance budget violations."""
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    log = WaitLog()
+    # Parallel scenarios share the CPU, so their timings are only checked against budgets when run one at a time
+    perf_log = PerfLog(load_budgets(budgets), enforce=workers <= 1)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        slots = asyncio.Semaphore(max(1, workers))
+        scenario = lambda *args: run_scenario(browser, slots, log, perf_log, timeout, *args)
+
+        scenarios = [
+            scenario("api_docs", capture_api_docs),
+            scenario("register/login", capture_auth),
+        ]
         try:
-            page.goto("http://localhost:5173/register")
-            page.wait_for_selector('input[placeholder="ユーザー名"]')
-            page.screenshot(path="screenshots/register.png")
-            print("Captured register.png")
-
-            # Register Logic - use unique name to avoid conflict on re-run
-            import random
-            username = f"user_{random.randint(1000,9999)}"
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button[type="submit"]')
-            
-            # Wait for navigation to login (handled by App logic after alert)
-            page.wait_for_url("**/login")
-        except Exception as e:
-            print(f"Error in register: {e}")
-
-        # 3. Login
-        try:
-            page.goto("http://localhost:5173/login") 
-            page.wait_for_selector('input[placeholder="ユーザー名"]')
-            page.screenshot(path="screenshots/login.png")
-            print("Captured login.png")
-
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button:has-text("ログイン")')
-            
-            # Wait for home
-            page.wait_for_url("**/home") 
+            storage_state = await authenticated_state(p)
+            # Create a Q&A post via API to ensure list is not empty
+            await seed([PostSeed("question", "あ", title="あ")], session_token(storage_state))
+            scenarios += [
+                scenario("feed", capture_feed, storage_state),
+                scenario("blog", capture_blog, storage_state),
+                scenario("Q&A", capture_qa, storage_state),
+            ]
         except Exception as e:
-            print(f"Error in login: {e}")
-
-        # 4. Feed (Logged in)
-        try:
-            page.wait_for_selector('.post-card') 
-            time.sleep(2) 
-            
-            # Create 3 Posts
-            for i in range(3):
-                page.fill('textarea', f'Post Number {i+1} by Playwright')
-                page.click('button:has-text("投稿")')
-                time.sleep(1)
-            
-            time.sleep(1)
-            
-            # Reaction - trigger
-            try:
-                # Click reaction on the first post (latest)
-                page.locator('button:has-text("リアクション")').first.click()
-                time.sleep(1)
-                
-                # Attempt to click an emoji in the picker
-                # Checking generic emoji picker structure
-                # Many pickers use explicit images or buttons
-                # Try clicking the first clickable element inside the picker container
-                # Assuming .EmojiPickerReact is the container class
-                picker_emoji = page.locator('.EmojiPickerReact button, .EmojiPickerReact img[data-emoji]').first
-                if picker_emoji.count() > 0:
-                     picker_emoji.click()
-                     time.sleep(1) # Wait for reaction to apply
-            except Exception as e:
-                 print(f"Reaction interaction warning: {e}")
-
-            # Screenshot Feed with content
-            page.screenshot(path="screenshots/feed_with_post.png")
-            print("Captured feed_with_post.png")
-
-            # Create Post Screen (focused)
-            page.locator('.post-card').screenshot(path="screenshots/create_post.png")
-            print("Captured create_post.png")
+            print(f"Skipping feed, blog and Q&A: no logged-in session ({e})")
 
-        except Exception as e:
-            print(f"Error in Feed/Post: {e}")
+        await asyncio.gather(*scenarios)
 
-        # 5. Blog
-        try:
-            page.click('text=ブログ')
-            time.sleep(1)
-            
-            # Create Blog Post
-            page.fill('input[placeholder="タイトル"]', 'My First Blog')
-            page.fill('textarea', 'This is a long blog post courtesy of Playwright.')
-            page.click('button:has-text("投稿")')
-            time.sleep(2)
-            
-            page.screenshot(path="screenshots/blog_list.png") # Main blog view
-            print("Captured blog_list.png")
-        except Exception as e:
-            print(f"Error in Blog: {e}")
+        await browser.close()
 
-        # 6. Q&A
-        try:
-            # Create a Q&A post via API to ensure list is not empty
-            page.evaluate("""
-                async () => {
-                    const token = localStorage.getItem('token');
-                    await fetch('http://localhost:8000/api/posts', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                            'Authorization': `Bearer ${token}` 
-                        },
-                        body: JSON.stringify({
-                            type: 'question', 
-                            title: 'あ', 
-                            content: 'あ'
-                        })
-                    });
-                }
-            """)
-            
-            page.click('a[href="/qa"]')
-            page.wait_for_url("**/qa")
-            time.sleep(2)
-            
-            page.screenshot(path="screenshots/qa_list.png")
-            print("Captured qa_list.png")
-        except Exception as e:
-            print(f"Error in Q&A: {e}")
+    print(log.summary())
+    print(report(sync(CAPTURE_DIR, SCREENSHOT_DIR, masks=masks)))
+    return perf_log.finish(PERF_REPORT)
 
-        browser.close()
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="Capture README screenshots")
+    parser.add_argument("--workers", type=int, default=4, help="Number of browser contexts run at the same time")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds each readiness wait may take")
+    parser.add_argument("--budgets", default=BUDGETS_FILE, help="Per-step performance budgets (JSON); enforced with --workers 1")
+    args = parser.parse_args()
+    violations = asyncio.run(run(args.workers, args.timeout, args.budgets))
+    sys.exit(1 if violations else 0)
@@ -1,34 +1,33 @@
 
-import time
+import asyncio
+import os
 import random
-from playwright.sync_api import sync_playwright
+import sys
+from playwright.async_api import async_playwright
+from capture_screenshots import CAPTURE_DIR, POST_META, QA_META, SCREENSHOT_DIR
+from perf_capture import LAUNCH_ARGS, PERF_DIR, PERF_INIT_JS, PerfLog, PerfRecorder
+from readiness import Readiness
+from seeding import PostSeed, seed
+from session_cache import authenticated_state, session_token
+from visual_diff import element_boxes, report, sync
 
-def run():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(viewport={"width": 1280, "height": 800})
-        page = context.new_page()
+EMOJIS = ['👍', '❤️', '😂', '🤔']
+
+async def run():
+    os.makedirs(CAPTURE_DIR, exist_ok=True)
+    masks = {}
+    perf_log = PerfLog()
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        storage_state = await authenticated_state(p)
+        context = await browser.new_context(viewport={"width": 1280, "height": 800}, storage_state=storage_state)
+        await context.add_init_script(PERF_INIT_JS)
+        page = await context.new_page()
+        perf = PerfRecorder(page, perf_log)
         page.on("dialog", lambda dialog: dialog.accept())
+        ready = Readiness(page)
 
-        # Register & Login
         try:
-            username = f"user_{random.randint(100000,999999)}"
-            print(f"Creating user: {username}")
-            
-            page.goto("http://localhost:5173/register")
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button[type="submit"]')
-            
-            page.wait_for_selector('h2:has-text("ログイン")', timeout=10000)
-            
-            page.fill('input[placeholder="ユーザー名"]', username)
-            page.fill('input[placeholder="パスワード"]', 'password123')
-            page.click('button:has-text("ログイン")')
-            
-            page.wait_for_selector('.post-card', timeout=10000)
-            print("Login successful")
-
             # Trashy contents as requested
             trashy_contents = [
                 {"title": "dsfaskdf", "content": "dsfaskdf"},
@@ -37,84 +36,42 @@ def run():
                 {"title": "あsfdhjkl", "content": "あsfdhjkl"},
             ]
 
-            # Create Blogs
-            print("Creating Blogs...")
-            for post in trashy_contents:
-                page.evaluate(f"""
-                    async () => {{
-                        const token = localStorage.getItem('token');
-                        await fetch('http://localhost:8000/api/posts', {{
-                            method: 'POST',
-                            headers: {{
-                                'Content-Type': 'application/json',
-                                'Authorization': `Bearer ${{token}}` 
-                            }},
-                            body: JSON.stringify({{
-                                type: 'blog', 
-                                title: '{post['title']}', 
-                                content: '{post['content']}'
-                            }})
-                        }});
-                    }}
-                """)
-                time.sleep(0.2)
+            # Create Blogs, and Q&As with a random reaction each
+            print("Creating Blogs and Q&As...")
+            await seed(
+                [PostSeed("blog", post["content"], title=post["title"]) for post in trashy_contents]
+                + [PostSeed("question", post["content"], title=post["title"], reactions=[random.choice(EMOJIS)])
+                   for post in trashy_contents],
+                session_token(storage_state),
+            )
 
-            # Create Q&As with reactions
-            print("Creating Q&As...")
-            for post in trashy_contents:
-                page.evaluate(f"""
-                    async () => {{
-                        const token = localStorage.getItem('token');
-                        // Create Post
-                        const res = await fetch('http://localhost:8000/api/posts', {{
-                            method: 'POST',
-                            headers: {{
-                                'Content-Type': 'application/json',
-                                'Authorization': `Bearer ${{token}}` 
-                            }},
-                            body: JSON.stringify({{
-                                type: 'question', 
-                                title: '{post['title']}', 
-                                content: '{post['content']}'
-                            }})
-                        }});
-                        const data = await res.json();
-                        
-                        // Add Reaction (Randomly)
-                        const emojis = ['👍', '❤️', '😂', '🤔'];
-                        const emoji = emojis[Math.floor(Math.random() * emojis.length)];
-                        await fetch('http://localhost:8000/api/reactions', {{
-                             method: 'POST',
-                             headers: {{
-                                'Content-Type': 'application/json',
-                                'Authorization': `Bearer ${{token}}` 
-                             }},
-                             body: JSON.stringify({{
-                                 post_id: data.id,
-                                 emoji: emoji
-                             }})
-                        }});
-                    }}
-                """)
-                time.sleep(0.2)
+            # Reuse the cached session instead of registering a new user
+            await page.goto("http://localhost:5173/home")
+            await page.wait_for_selector('.post-card', timeout=10000)
 
             # Capture Blog List
-            page.click('text=ブログ')
-            time.sleep(2) # Wait for fetch
-            page.screenshot(path="screenshots/blog_list.png")
+            async with perf.step("blog"):
+                async with ready.after("blog list", responses=["GET /api/posts"], settle=".container", replaces=2.0):
+                    await page.click('text=ブログ')
+            masks["blog_list.png"] = await element_boxes(page, [POST_META])
+            await page.screenshot(path=f"{CAPTURE_DIR}/blog_list.png")
             print("Captured blog_list.png")
 
             # Capture QA List
-            page.click('a[href="/qa"]')
-            page.wait_for_selector('.qa-list', timeout=5000)
-            time.sleep(2)
-            page.screenshot(path="screenshots/qa_list.png")
+            async with perf.step("qa list"):
+                async with ready.after("Q&A list", responses=["GET /api/posts"], settle=".qa-list", replaces=2.0):
+                    await page.click('a[href="/qa"]')
+            masks["qa_list.png"] = await element_boxes(page, [QA_META])
+            await page.screenshot(path=f"{CAPTURE_DIR}/qa_list.png")
             print("Captured qa_list.png")
 
         except Exception as e:
             print(f"Error: {e}")
 
-        browser.close()
+        await browser.close()
+        print(ready.log.summary())
+    print(report(sync(CAPTURE_DIR, SCREENSHOT_DIR, masks=masks)))
+    return perf_log.finish(os.path.join(SCREENSHOT_DIR, PERF_DIR, "capture_trashy_all.json"))
 
 if __name__ == "__main__":
-    run()
+    sys.exit(1 if asyncio.run(run()) else 0)
@@ -37,6 +37,8 @@ function App() {
     };
 
     const handleLogout = () => {
+        // Revoke the token server-side; the local session is cleared either way
+        api.post('/logout', {}).catch(() => {});
         localStorage.removeItem('token');
         localStorage.removeItem('user');
         setToken(null);
@@ -0,0 +1,275 @@
+"""Browser-side performance capture for the Playwright capture scripts.
+
+The capture scripts already walk the main user flows; this module records
+what each step cost in the browser next to the screenshot:
+
+* Navigation Timing of the document (TTFB, DOMContentLoaded, load) when the
+  step navigated;
+* Largest Contentful Paint and Cumulative Layout Shift so far, from
+  PerformanceObservers installed before any page script runs;
+* every `/api/*` request the page made during the step, with Playwright's
+  network timings (these also work for cross-origin APIs without
+  Timing-Allow-Origin);
+* the JS heap in use at the end of the step.
+
+    perf = PerfLog()
+    await context.add_init_script(PERF_INIT_JS)      # before the first page is opened
+    recorder = PerfRecorder(page, perf)
+    async with recorder.step("feed"):
+        await page.goto(...)
+        ...
+    violations = perf.finish("screenshots/.perf/capture_screenshots.json")
+    sys.exit(1 if violations else 0)
+
+The sync Playwright API (laravel-auth-system) uses `recorder.sync_step(...)`.
+
+Each run writes a JSON report with every step and every budget it broke.
+Budgets live in perf_budgets.json as maximum values per step name; keys may
+be fnmatch patterns and "*" applies to every step:
+
+    {"*": {"lcp_ms": 2500, "cls": 0.1}, "feed": {"api_max_ms": 800}}
+
+Scenarios running side by side share the CPU and skew each other's timings,
+so budgets are only enforced when the steps ran one at a time: pass
+`PerfLog(enforce=False)` for parallel runs (capture_screenshots.py does so
+unless `--workers 1`) and violations are reported as warnings instead.
+
+API requests belong to the step that started them, and a step waits up to
+SETTLE_MS for its own requests to finish before it is recorded, so slow
+responses do not spill into the next step.
+"""
+
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from fnmatch import fnmatch
+from urllib.parse import urlsplit
+
+PERF_DIR = ".perf"
+BUDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_budgets.json")
+# Chromium rounds performance.memory heavily unless told otherwise
+LAUNCH_ARGS = ["--enable-precise-memory-info"]
+
+# Installed with context.add_init_script, so it runs before the app in every document.
+# CLS is the largest session window (shifts < 1s apart, window < 5s), as web-vitals reports it.
+PERF_INIT_JS = """
+(() => {
+    if (window.__perf) return;
+    const perf = window.__perf = { lcp: null, cls: 0, session: 0, sessionStart: 0, sessionLast: 0 };
+    try {
+        new PerformanceObserver(list => {
+            const last = list.getEntries().at(-1);
+            perf.lcp = last.renderTime || last.loadTime || last.startTime;
+        }).observe({ type: 'largest-contentful-paint', buffered: true });
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (entry.hadRecentInput) continue;
+                if (perf.session && (entry.startTime - perf.sessionLast > 1000 || entry.startTime - perf.sessionStart > 5000)) {
+                    perf.session = 0;
+                }
+                if (!perf.session) perf.sessionStart = entry.startTime;
+                perf.session += entry.value;
+                perf.sessionLast = entry.startTime;
+                perf.cls = Math.max(perf.cls, perf.session);
+            }
+        }).observe({ type: 'layout-shift', buffered: true });
+    } catch (e) {
+        // Entry types this browser does not support stay null / 0
+    }
+})();
+"""
+
+MARK_JS = "() => ({ origin: performance.timeOrigin, at: performance.now() })"
+
+COLLECT_JS = """
+(mark) => {
+    const navigated = !mark || mark.origin !== performance.timeOrigin;
+    const nav = performance.getEntriesByType('navigation')[0];
+    const perf = window.__perf || {};
+    return {
+        url: location.href,
+        navigation: navigated && nav ? {
+            ttfb_ms: nav.responseStart,
+            dom_content_loaded_ms: nav.domContentLoadedEventEnd || null,
+            load_ms: nav.loadEventEnd || null,
+            transfer_bytes: nav.transferSize,
+        } : null,
+        lcp_ms: perf.lcp ?? null,
+        cls: perf.cls ?? null,
+        heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+    };
+}
+"""
+
+# Step metrics a budget can limit (all "lower is better")
+BUDGET_METRICS = (
+    "ttfb_ms", "dom_content_loaded_ms", "load_ms", "lcp_ms", "cls",
+    "heap_mb", "api_count", "api_max_ms", "api_total_ms",
+)
+
+
+def load_budgets(path=BUDGETS_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def budgets_for(step, budgets):
+    """Limits for `step`: "*" first, then matching patterns, then the exact name."""
+    limits = {}
+    for pattern in sorted(budgets, key=lambda p: (p != "*", p == step)):
+        if pattern == "*" or fnmatch(step, pattern):
+            limits.update(budgets[pattern])
+    return limits
+
+
+class PerfLog:
+    """Collects step measurements from any number of pages and checks them against budgets."""
+
+    def __init__(self, budgets=None, enforce=True):
+        self.budgets = load_budgets() if budgets is None else budgets
+        self.enforce = enforce  # False: violations are printed as warnings and finish() returns none
+        self.steps = []
+
+    def record(self, name, page_metrics, api_calls):
+        navigation = page_metrics.get("navigation") or {}
+        durations = [call["duration_ms"] for call in api_calls if call["duration_ms"] is not None]
+        heap = page_metrics.get("heap_bytes")
+        metrics = {
+            "ttfb_ms": navigation.get("ttfb_ms"),
+            "dom_content_loaded_ms": navigation.get("dom_content_loaded_ms"),
+            "load_ms": navigation.get("load_ms"),
+            "lcp_ms": page_metrics.get("lcp_ms"),
+            "cls": page_metrics.get("cls"),
+            "heap_mb": round(heap / 1024 / 1024, 2) if heap else None,
+            "api_count": len(api_calls),
+            "api_max_ms": max(durations, default=None),
+            "api_total_ms": round(sum(durations), 1) if durations else None,
+        }
+        metrics = {key: round(value, 3) if isinstance(value, float) else value for key, value in metrics.items()}
+        self.steps.append({
+            "step": name,
+            "url": page_metrics.get("url"),
+            "metrics": metrics,
+            "navigation": page_metrics.get("navigation"),
+            "api": api_calls,
+        })
+
+    def violations(self):
+        found = []
+        for step in self.steps:
+            for metric, limit in budgets_for(step["step"], self.budgets).items():
+                value = step["metrics"].get(metric)
+                if value is not None and value > limit:
+                    found.append({"step": step["step"], "metric": metric, "value": value, "budget": limit})
+        return found
+
+    def summary(self):
+        lines = []
+        for step in self.steps:
+            m = step["metrics"]
+            parts = [f"{key}={m[key]}" for key in ("lcp_ms", "cls", "heap_mb", "api_count", "api_max_ms") if m[key] is not None]
+            lines.append(f"  {step['step']:<20} {' '.join(parts)}")
+        label = "OVER BUDGET" if self.enforce else "over budget (not enforced)"
+        for v in self.violations():
+            lines.append(f"  {label} {v['step']}: {v['metric']} {v['value']} > {v['budget']}")
+        return "Performance:\n" + "\n".join(lines) if lines else "Performance: no steps recorded"
+
+    def finish(self, path):
+        """Writes the JSON report, prints the summary and returns the enforced budget violations."""
+        violations = self.violations()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "budgets": self.budgets,
+                "enforced": self.enforce,
+                "steps": self.steps,
+                "violations": violations,
+            }, f, ensure_ascii=False, indent=1)
+        print(self.summary())
+        print(f"Performance report: {path} ({len(violations)} budget violations)")
+        if not self.enforce:
+            if violations:
+                print("Budgets not enforced: steps ran in parallel; use --workers 1 for budget checks")
+            return []
+        return violations
+
+
+class PerfRecorder:
+    """Measures steps of one page; the context needs PERF_INIT_JS for LCP/CLS."""
+
+    # How long a finished step waits for the API requests it started
+    SETTLE_MS = 5000
+
+    def __init__(self, page, log):
+        self.page = page
+        self.log = log
+        self.api_calls = []
+        self._in_flight = {}  # request -> its entry in api_calls
+        self._steps = 0
+        self._step = None  # number of the running step; requests started outside steps get None
+        page.on("request", self._request_started)
+        page.on("requestfinished", lambda request: self._request_done(request, failed=False))
+        page.on("requestfailed", lambda request: self._request_done(request, failed=True))
+
+    def _request_started(self, request):
+        if "/api/" not in urlsplit(request.url).path:
+            return
+        call = {
+            "step": self._step,
+            "method": request.method,
+            "url": request.url,
+            "failed": None,  # None until the request finishes
+            "duration_ms": None,
+            "ttfb_ms": None,
+        }
+        self._in_flight[request] = call
+        self.api_calls.append(call)
+
+    def _request_done(self, request, failed):
+        call = self._in_flight.pop(request, None)
+        if call is None:
+            return
+        timing = request.timing  # ms relative to startTime; -1 when a phase did not happen
+        end = timing.get("responseEnd", -1)
+        call["failed"] = failed
+        call["duration_ms"] = round(end, 1) if end >= 0 else None
+        call["ttfb_ms"] = round(timing["responseStart"], 1) if timing.get("responseStart", -1) >= 0 else None
+
+    def _start_step(self):
+        self._steps += 1
+        self._step = self._steps
+        return self._step
+
+    def _settled(self, step):
+        return not any(call["step"] == step for call in self._in_flight.values())
+
+    def _calls(self, step):
+        return [{k: v for k, v in call.items() if k != "step"} for call in self.api_calls if call["step"] == step]
+
+    @asynccontextmanager
+    async def step(self, name):
+        mark = await self.page.evaluate(MARK_JS)
+        step = self._start_step()
+        yield
+        self._step = None
+        deadline = time.monotonic() + self.SETTLE_MS / 1000
+        while not self._settled(step) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self.log.record(name, await self.page.evaluate(COLLECT_JS, mark), self._calls(step))
+
+    @contextmanager
+    def sync_step(self, name):
+        mark = self.page.evaluate(MARK_JS)
+        step = self._start_step()
+        yield
+        self._step = None
+        deadline = time.monotonic() + self.SETTLE_MS / 1000
+        while not self._settled(step) and time.monotonic() < deadline:
+            self.page.wait_for_timeout(50)  # lets the sync API dispatch request events
+        self.log.record(name, self.page.evaluate(COLLECT_JS, mark), self._calls(step))
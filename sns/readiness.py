@@ -0,0 +1,147 @@
+"""Event-driven readiness waits for the Playwright capture scripts.
+
+Instead of sleeping for a fixed time after each action, a step waits for the
+API responses the action triggers (e.g. "POST /api/posts" followed by the
+"GET /api/posts" refetch, or sns2's "/feeds" and "/qa") and then for the DOM
+to stop changing. Every step records how long it actually waited next to the
+fixed sleep it replaces, so a run can report the time saved.
+
+    log = WaitLog()
+    ready = Readiness(page, log=log)
+    async with ready.after("post", responses=["POST /api/posts", "GET /api/posts"],
+                           settle=".post-item", replaces=1.0):
+        await page.click('button:has-text("投稿")')
+    ...
+    print(log.summary())
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+DEFAULT_TIMEOUT = 10.0  # seconds, per step
+QUIET_MS = 150  # DOM must be free of mutations this long to count as settled
+
+# Resolves once nothing under `selector` has mutated for `quietMs` and every
+# image has finished loading; rejects after `timeoutMs`.
+DOM_QUIET_JS = """
+([selector, quietMs, timeoutMs]) => new Promise((resolve, reject) => {
+    const root = (selector && document.querySelector(selector)) || document.body;
+    let quietTimer;
+    const deadline = setTimeout(() => {
+        observer.disconnect();
+        reject(new Error(`DOM under ${selector || 'body'} did not settle`));
+    }, timeoutMs);
+    const done = async () => {
+        observer.disconnect();
+        const pending = [...document.images].filter(img => !img.complete).map(img => new Promise(r => {
+            img.addEventListener('load', r, { once: true });
+            img.addEventListener('error', r, { once: true });
+        }));
+        await Promise.all([document.fonts.ready, ...pending]);
+        clearTimeout(deadline);
+        resolve();
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(done, quietMs);
+    });
+    observer.observe(root, { childList: true, subtree: true, attributes: true, characterData: true });
+    quietTimer = setTimeout(done, quietMs);
+})
+"""
+
+
+class ReadinessTimeout(Exception):
+    pass
+
+
+class WaitLog:
+    """Collects per-step wait times; may be shared by several pages."""
+
+    def __init__(self):
+        self.steps = []
+
+    def record(self, label, waited, replaced):
+        self.steps.append((label, waited, replaced))
+
+    def summary(self):
+        waited = sum(step[1] for step in self.steps)
+        replaced = sum(step[2] for step in self.steps)
+        return (
+            f"Readiness: {len(self.steps)} waits took {waited:.2f}s; "
+            f"fixed sleeps would have taken {replaced:.2f}s (saved {replaced - waited:.2f}s)"
+        )
+
+
+def _parse_pattern(pattern):
+    # "POST /api/posts" -> ("POST", "/api/posts"); "/qa" -> (None, "/qa")
+    method, _, path = pattern.partition(" ")
+    if not path:
+        return None, method
+    return method.upper(), path
+
+
+def _matches(response, method, path):
+    if method and response.request.method != method:
+        return False
+    return path in response.url
+
+
+class Readiness:
+    def __init__(self, page, timeout=DEFAULT_TIMEOUT, log=None):
+        self.page = page
+        self.timeout = timeout
+        self.log = log if log is not None else WaitLog()
+
+    @asynccontextmanager
+    async def after(self, label, responses=(), settle=None, replaces=0.0, timeout=None):
+        """Wait for `responses` caused by the wrapped action, then for `settle` to go quiet.
+
+        Each entry of `responses` consumes one matching response, so listing the
+        same pattern twice waits for two of them.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        expected = [(*_parse_pattern(pattern), loop.create_future()) for pattern in responses]
+
+        def on_response(response):
+            for method, path, future in expected:
+                if not future.done() and _matches(response, method, path):
+                    future.set_result(response)
+                    return
+
+        self.page.on("response", on_response)
+        start = time.perf_counter()
+        try:
+            yield
+            if expected:
+                try:
+                    await asyncio.wait_for(asyncio.gather(*(f for _, _, f in expected)), timeout)
+                except asyncio.TimeoutError:
+                    missing = [f"{m or ''} {p}".strip() for m, p, f in expected if not f.done()]
+                    raise ReadinessTimeout(f"{label}: no response for {', '.join(missing)} within {timeout}s")
+        finally:
+            self.page.remove_listener("response", on_response)
+
+        if settle is not None:
+            await self._settle(label, settle, timeout - (time.perf_counter() - start))
+
+        self.log.record(label, time.perf_counter() - start, replaces)
+
+    async def settled(self, label, selector=None, replaces=0.0, timeout=None):
+        """Wait for the page to be ready for a screenshot without triggering anything."""
+        start = time.perf_counter()
+        await self._settle(label, selector, self.timeout if timeout is None else timeout)
+        self.log.record(label, time.perf_counter() - start, replaces)
+
+    async def _settle(self, label, selector, timeout):
+        timeout = max(0.1, timeout)
+        deadline = time.perf_counter() + timeout
+        try:
+            if selector:
+                await self.page.wait_for_selector(selector, timeout=timeout * 1000)
+            remaining = max(0.1, deadline - time.perf_counter())
+            await self.page.evaluate(DOM_QUIET_JS, [selector or "", QUIET_MS, int(remaining * 1000)])
+        except Exception as e:
+            raise ReadinessTimeout(f"{label}: {e}") from e
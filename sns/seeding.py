@@ -0,0 +1,79 @@
+"""Declarative fixture seeding straight against the sns API.
+
+Replaces the `page.evaluate(fetch(...))` loops in the capture scripts: posts
+and their reactions are created over a pooled keep-alive client with bounded
+concurrency, and values are sent as JSON so quotes in titles are harmless.
+
+    ids = await seed([
+        PostSeed("blog", "本文", title="タイトル"),
+        PostSeed("question", "質問です", title="It's a question", reactions=["👍"]),
+    ], token)
+
+A spec can also live in a JSON file (a list of objects with the PostSeed
+fields) and be seeded from the command line with the cached capture session:
+
+    python seeding.py fixtures.json --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass, field
+
+from api_client import ApiClient
+
+API_URL = "http://localhost:8000/api"
+POST_TYPES = ("microblog", "blog", "question")
+
+
+@dataclass
+class PostSeed:
+    type: str
+    content: str
+    title: str = None
+    reactions: list = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.type not in POST_TYPES:
+            raise ValueError(f"Unsupported post type for seeding: {self.type}")
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as f:
+        return [PostSeed(**item) for item in json.load(f)]
+
+
+async def _seed_post(api, post):
+    body = {"type": post.type, "content": post.content}
+    if post.title is not None:
+        body["title"] = post.title
+    post_id = int((await api.post("/posts", body)).raise_for_status().json()["id"])
+
+    # Reactions toggle, so they must not race each other on the same post/emoji
+    for emoji in post.reactions:
+        (await api.post("/reactions", {"post_id": post_id, "emoji": emoji})).raise_for_status()
+    return post_id
+
+
+async def seed(posts, token, api_url=API_URL, concurrency=8):
+    """Create `posts` and their reactions; returns the new post IDs in spec order."""
+    async with ApiClient(api_url, token=token, pool_size=concurrency) as api:
+        return await asyncio.gather(*(_seed_post(api, post) for post in posts))
+
+
+if __name__ == "__main__":
+    from session_cache import cached_token
+
+    parser = argparse.ArgumentParser(description="Seed sns fixtures from a JSON spec")
+    parser.add_argument("spec", help="JSON file with a list of posts")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--token", help="API token (defaults to the cached capture session)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    token = args.token or cached_token()
+    if not token:
+        parser.error("no --token given and no cached capture session; run a capture script first")
+
+    ids = asyncio.run(seed(load_spec(args.spec), token, args.api_url, args.concurrency))
+    print(json.dumps(ids))
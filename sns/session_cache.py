@@ -0,0 +1,110 @@
+"""Shared logged-in session for the capture scripts.
+
+The first run registers one capture user through the API, logs in and stores
+the Playwright storage state (localStorage `token` and `user` for the
+frontend origin) in SESSION_FILE. Later scripts and runs reuse it as long as
+the API still accepts the token; a rejected token triggers a fresh login, and
+a missing user (e.g. after the DB was reset) a fresh registration.
+
+    state = await authenticated_state(p)
+    context = await browser.new_context(storage_state=state)
+"""
+
+import json
+import os
+import secrets
+
+API_URL = "http://localhost:8000/api"
+FRONTEND_URL = "http://localhost:5173"
+SESSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".capture_session.json")
+PASSWORD = "password123"
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save(path, session):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(session, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def storage_state_for(token, user):
+    return {
+        "cookies": [],
+        "origins": [{
+            "origin": FRONTEND_URL,
+            "localStorage": [
+                {"name": "token", "value": token},
+                {"name": "user", "value": json.dumps(user)},
+            ],
+        }],
+    }
+
+
+def session_token(state):
+    """The API token stored in a storage state's localStorage."""
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if item["name"] == "token":
+                return item["value"]
+    return None
+
+
+def cached_token(path=SESSION_FILE):
+    """Token from the last cached session, without checking it against the API."""
+    return _load(path).get("token")
+
+
+async def _token_valid(api, token):
+    res = await api.get("posts", params={"limit": 1}, headers={"Authorization": f"Bearer {token}"})
+    return res.ok
+
+
+async def _login(api, username, password):
+    res = await api.post("login", data={"username": username, "password": password})
+    if not res.ok:
+        return None
+    return await res.json()
+
+
+async def _register(api, username, password):
+    res = await api.post("register", data={"username": username, "password": password})
+    if not res.ok:
+        raise RuntimeError(f"Registering capture user {username} failed: HTTP {res.status}")
+
+
+async def authenticated_state(playwright, path=SESSION_FILE):
+    """Return a storage state with a working token, logging in or registering only when needed."""
+    session = _load(path)
+    api = await playwright.request.new_context(base_url=API_URL + "/")
+    try:
+        token = session.get("token")
+        if token and await _token_valid(api, token):
+            return session["storage_state"]
+
+        login = None
+        if session.get("username"):
+            login = await _login(api, session["username"], session.get("password", PASSWORD))
+
+        if login is None:
+            username = f"capture_{secrets.token_hex(4)}"
+            await _register(api, username, PASSWORD)
+            login = await _login(api, username, PASSWORD)
+            if login is None:
+                raise RuntimeError(f"Logging in as capture user {username} failed")
+            session = {"username": username, "password": PASSWORD}
+            print(f"Registered capture user: {username}")
+
+        session["token"] = login["token"]
+        session["storage_state"] = storage_state_for(login["token"], login["user"])
+        _save(path, session)
+        return session["storage_state"]
+    finally:
+        await api.dispose()
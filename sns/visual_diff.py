@@ -0,0 +1,283 @@
+"""Visual diff stage for the screenshot capture scripts.
+
+Capture scripts write into a staging directory (`screenshots/.capture`);
+`sync` then compares every staged PNG with the committed one and only
+replaces files whose pixels really changed, so an unchanged UI leaves git
+and the README images untouched:
+
+    results = sync("screenshots/.capture", "screenshots", masks=masks)
+    print(report(results))
+
+Images are decoded into NumPy arrays and compared with a YIQ colour distance
+(the metric pixelmatch uses): a pixel differs when its distance exceeds
+`threshold` (0..1), and an image changed when any `tile` x `tile` block has
+more than `tile_threshold` of its pixels differing. Scattered anti-aliasing
+noise stays under that, while a changed word or button does not. Regions
+that differ on every run (random usernames, timestamps) are masked out,
+either per file in `<target>/masks.json`:
+
+    {"feed_with_post.png": [[x, y, width, height], ...], "*": [...]}
+
+or at capture time with `await element_boxes(page, selectors)`. For every
+changed image a heat-map goes to `<target>/.diff/`. Comparisons run in a
+process pool. The same stage is available from the command line:
+
+    python visual_diff.py screenshots/.capture screenshots --threshold 0.1
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+STAGING_DIR = ".capture"
+HEATMAP_DIR = ".diff"
+MASKS_FILE = "masks.json"
+
+DEFAULT_THRESHOLD = 0.1  # per-pixel YIQ distance, 0..1
+DEFAULT_TILE = 16  # pixels
+DEFAULT_TILE_THRESHOLD = 0.02  # share of differing pixels that makes a tile changed
+
+# RGB -> YIQ, and the weights pixelmatch gives the Y/I/Q differences
+_YIQ = np.array([
+    [0.29889531, 0.58662247, 0.11448223],
+    [0.59597799, -0.27417610, -0.32180189],
+    [0.21147017, -0.52261711, 0.31114694],
+], dtype=np.float32)
+_YIQ_WEIGHTS = np.array([0.5053, 0.299, 0.1957], dtype=np.float32)
+_MAX_YIQ_DELTA = 35215.0  # weighted distance between black and white
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    status: str  # "new", "changed", "resized" or "unchanged"
+    changed_tiles: int = 0
+    total_tiles: int = 0
+    max_delta: float = 0.0
+    heatmap: str | None = None
+
+    @property
+    def replaced(self):
+        return self.status != "unchanged"
+
+
+def decode(path):
+    """HxWx3 uint8 RGB; transparency is composited onto white."""
+    with Image.open(path) as image:
+        if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+            background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+            image = Image.alpha_composite(background, image.convert("RGBA"))
+        return np.asarray(image.convert("RGB"))
+
+
+def perceptual_delta(a, b):
+    """Per-pixel YIQ distance between two same-sized uint8 images, scaled to 0..1.
+
+    Re-captures are mostly identical, so only pixels whose bytes differ are converted.
+    """
+    delta = np.zeros(a.shape[:2], dtype=np.float32)
+    differs = np.any(a != b, axis=2)
+    if differs.any():
+        yiq = (a[differs].astype(np.float32) - b[differs]) @ _YIQ.T
+        delta[differs] = np.sqrt((yiq * yiq) @ _YIQ_WEIGHTS / _MAX_YIQ_DELTA)
+    return delta
+
+
+def mask_array(shape, rects):
+    """Boolean HxW array, True inside any [x, y, width, height] rectangle."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, width, height in rects:
+        x0, y0 = max(0, int(x)), max(0, int(y))
+        x1, y1 = max(x0, int(x + width)), max(y0, int(y + height))
+        mask[y0:y1, x0:x1] = True
+    return mask
+
+
+def tile_ratios(differs, tile):
+    """Share of differing pixels in each tile; edge tiles are padded with unchanged pixels."""
+    height, width = differs.shape
+    rows, cols = -(-height // tile), -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=np.float32)
+    padded[:height, :width] = differs
+    return padded.reshape(rows, tile, cols, tile).mean(axis=(1, 3))
+
+
+def render_heatmap(image, delta, mask, changed_tiles, tile, path):
+    """Faded grey copy of the new image; differing pixels in red (stronger = larger
+    difference), changed tiles tinted yellow and masked regions tinted blue."""
+    grey = image.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    out = np.repeat((grey * 0.25 + 191)[..., None], 3, axis=2)
+
+    height, width = delta.shape
+    tiles = np.kron(changed_tiles, np.ones((tile, tile), dtype=bool))[:height, :width]
+    out[tiles] = out[tiles] * 0.7 + np.array([255, 230, 90], dtype=np.float32) * 0.3
+    out[mask] = out[mask] * 0.6 + np.array([80, 140, 255], dtype=np.float32) * 0.4
+
+    alpha = np.clip(delta * 4, 0, 1)[..., None]
+    out = out * (1 - alpha) + np.array([230, 20, 20], dtype=np.float32) * alpha
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(out.astype(np.uint8)).save(path, optimize=False, compress_level=1)
+
+
+def compare(new_path, old_path, rects=(), threshold=DEFAULT_THRESHOLD, tile=DEFAULT_TILE,
+            tile_threshold=DEFAULT_TILE_THRESHOLD, heatmap_path=None):
+    """Compares one staged screenshot with the committed one (runs in a worker process)."""
+    name = os.path.basename(new_path)
+    new, old = decode(new_path), decode(old_path)
+    if new.shape != old.shape:
+        return Comparison(name, "resized")
+
+    delta = perceptual_delta(new, old)
+    mask = mask_array(delta.shape, rects)
+    delta[mask] = 0
+    ratios = tile_ratios(delta > threshold, tile)
+    changed_tiles = ratios > tile_threshold
+
+    changed = int(changed_tiles.sum())
+    if changed and heatmap_path:
+        render_heatmap(new, delta, mask, changed_tiles, tile, heatmap_path)
+    return Comparison(
+        name,
+        "changed" if changed else "unchanged",
+        changed_tiles=changed,
+        total_tiles=changed_tiles.size,
+        max_delta=round(float(delta.max()), 4),
+        heatmap=heatmap_path if changed and heatmap_path else None,
+    )
+
+
+def _compare_task(args):
+    return compare(*args[:2], **args[2])
+
+
+def load_masks(directory):
+    try:
+        with open(os.path.join(directory, MASKS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def masks_for(name, *mask_sets):
+    """Rectangles for `name` from every mask set; keys may be fnmatch patterns."""
+    rects = []
+    for masks in mask_sets:
+        for pattern, boxes in (masks or {}).items():
+            if fnmatch.fnmatch(name, pattern):
+                rects.extend(boxes)
+    return rects
+
+
+def _same_bytes(a, b):
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+def sync(staging_dir, target_dir, masks=None, threshold=DEFAULT_THRESHOLD, tile=DEFAULT_TILE,
+         tile_threshold=DEFAULT_TILE_THRESHOLD, workers=None, heatmaps=True):
+    """Moves staged PNGs that changed into `target_dir` and drops the rest.
+
+    `masks` ({file name or pattern: [[x, y, width, height], ...]}) adds to the
+    target's masks.json. Returns one Comparison per staged file.
+    """
+    names = sorted(n for n in os.listdir(staging_dir) if n.lower().endswith(".png")) \
+        if os.path.isdir(staging_dir) else []
+    heatmap_dir = os.path.join(target_dir, HEATMAP_DIR)
+    shutil.rmtree(heatmap_dir, ignore_errors=True)  # heat-maps describe the latest run only
+    file_masks = load_masks(target_dir)
+
+    results, tasks = {}, []
+    for name in names:
+        new_path, old_path = os.path.join(staging_dir, name), os.path.join(target_dir, name)
+        if not os.path.exists(old_path):
+            results[name] = Comparison(name, "new")
+        elif _same_bytes(new_path, old_path):
+            results[name] = Comparison(name, "unchanged")
+        else:
+            tasks.append((new_path, old_path, {
+                "rects": masks_for(name, file_masks, masks),
+                "threshold": threshold,
+                "tile": tile,
+                "tile_threshold": tile_threshold,
+                "heatmap_path": os.path.join(heatmap_dir, name) if heatmaps else None,
+            }))
+
+    processes = min(len(tasks), workers or os.cpu_count() or 1)
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            compared = list(pool.map(_compare_task, tasks))
+    else:
+        # A pool only costs start-up time with a single core or a single comparison
+        compared = [_compare_task(task) for task in tasks]
+    results.update((c.name, c) for c in compared)
+
+    for name in names:
+        staged = os.path.join(staging_dir, name)
+        if results[name].replaced:
+            os.replace(staged, os.path.join(target_dir, name))
+        else:
+            os.remove(staged)
+    if os.path.isdir(staging_dir) and not os.listdir(staging_dir):
+        os.rmdir(staging_dir)
+
+    return [results[name] for name in names]
+
+
+def report(results):
+    lines = []
+    for r in results:
+        detail = ""
+        if r.status == "changed":
+            detail = f" ({r.changed_tiles}/{r.total_tiles} tiles, max delta {r.max_delta}"
+            detail += f", heat-map {r.heatmap})" if r.heatmap else ")"
+        lines.append(f"  {r.status:<9} {r.name}{detail}")
+    replaced = sum(r.replaced for r in results)
+    lines.append(f"Screenshots: {replaced} replaced, {len(results) - replaced} unchanged")
+    return "\n".join(lines)
+
+
+async def element_boxes(page, selectors):
+    """Viewport rectangles of every visible element matching `selectors`, for masking
+    dynamic content in full-page screenshots."""
+    rects = []
+    for selector in selectors:
+        for element in await page.locator(selector).all():
+            box = await element.bounding_box()
+            if box:
+                rects.append([round(box["x"]), round(box["y"]), round(box["width"]) + 1, round(box["height"]) + 1])
+    return rects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replace committed screenshots only where the staged ones changed")
+    parser.add_argument("staging", help="Directory the capture run wrote to")
+    parser.add_argument("target", help="Directory with the committed screenshots")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Per-pixel YIQ distance (0..1) above which a pixel differs")
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE, help="Tile size in pixels")
+    parser.add_argument("--tile-threshold", type=float, default=DEFAULT_TILE_THRESHOLD,
+                        help="Share of differing pixels above which a tile counts as changed")
+    parser.add_argument("--workers", type=int, default=None, help="Comparison processes (default: CPU count)")
+    parser.add_argument("--no-heatmap", action="store_true", help="Do not write heat-maps")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = sync(args.staging, args.target, threshold=args.threshold, tile=args.tile,
+                   tile_threshold=args.tile_threshold, workers=args.workers, heatmaps=not args.no_heatmap)
+    print(report(results))
+    print(f"Compared in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
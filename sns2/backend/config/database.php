@@ -2,7 +2,10 @@
 
 declare(strict_types=1);
 
+use Illuminate\Container\Container;
 use Illuminate\Database\Capsule\Manager as Capsule;
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Events\Dispatcher;
 
 $capsule = new Capsule();
 
@@ -28,5 +31,12 @@ if ($connection === 'sqlite') {
     ]);
 }
 
+// One dispatcher for connection events (query listeners: QueryStats, REQUEST_LOG_QUERIES)
+// and model events (search index upkeep); Connection::listen is a no-op without it
+$dispatcher = new Dispatcher(new Container());
+$capsule->setEventDispatcher($dispatcher);
+
 $capsule->setAsGlobal();
 $capsule->bootEloquent();
+
+Model::setEventDispatcher($dispatcher);
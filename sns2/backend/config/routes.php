@@ -4,6 +4,7 @@ declare(strict_types=1);
 
 use Slim\App;
 use App\Controllers\AuthController;
+use App\Controllers\BatchController;
 use App\Controllers\FeedController;
 use App\Controllers\QaController;
 use App\Controllers\BlogController;
@@ -12,6 +13,8 @@ use App\Controllers\SearchController;
 use App\Controllers\UploadController;
 use App\Middleware\JwtMiddleware;
 use App\Middleware\RateLimitMiddleware;
+use App\Middleware\ResponseCacheMiddleware;
+use App\Metrics\Metrics;
 
 /** @var App $app */
 
@@ -21,6 +24,25 @@ $app->get('/api/health', function ($request, $response) {
     return $response->withHeader('Content-Type', 'application/json');
 });
 
+// Per-route request/DB histograms in Prometheus text format; served only with METRICS_TOKEN as a Bearer token
+$app->get('/metrics', function ($request, $response) {
+    $token = $_ENV['METRICS_TOKEN'] ?? '';
+    if ($token === '') {
+        return $response->withStatus(404); // fail closed: route names and latencies are not public
+    }
+    if (!hash_equals('Bearer ' . $token, $request->getHeaderLine('Authorization'))) {
+        return $response->withStatus(401);
+    }
+
+    $store = Metrics::defaultStore();
+    if ($store === null) {
+        return $response->withStatus(404);
+    }
+
+    $response->getBody()->write(Metrics::render($store->snapshot()));
+    return $response->withHeader('Content-Type', 'text/plain; version=0.0.4');
+});
+
 // Auth routes (public) - Stricter rate limit: 10 requests per minute
 $app->post('/api/auth/register', [AuthController::class, 'register'])
     ->add(new RateLimitMiddleware(10, 60, 'auth'));
@@ -52,6 +74,7 @@ $app->group('/api', function ($group) {
     $group->get('/qa/{id}', [QaController::class, 'show']);
     $group->put('/qa/{id}', [QaController::class, 'update']);
     $group->delete('/qa/{id}', [QaController::class, 'destroy']);
+    $group->get('/qa/{id}/answers', [QaController::class, 'answers']);
     $group->post('/qa/{id}/answers', [QaController::class, 'storeAnswer']);
     $group->put('/qa/{id}/best-answer', [QaController::class, 'setBestAnswer']);
 
@@ -70,7 +93,14 @@ $app->group('/api', function ($group) {
     $group->get('/posts/{id}/reactions', [ReactionController::class, 'index']);
     $group->post('/posts/{id}/reactions', [ReactionController::class, 'store']);
     $group->delete('/posts/{id}/reactions/{emoji}', [ReactionController::class, 'destroy']);
+
+    // Batch writes: one request counts once against 'api', and each item against 'batch'
+    $batchLimit = new RateLimitMiddleware(300, 60, 'batch', cost: fn($request) => BatchController::itemCount($request));
+    $group->post('/batch/posts', [BatchController::class, 'posts'])->add($batchLimit);
+    $group->post('/batch/reactions', [BatchController::class, 'reactions'])->add($batchLimit);
 })
+    // Caches GET /feeds, /blogs, /qa; successful writes in this group invalidate it
+    ->add(new ResponseCacheMiddleware())
     ->add(new RateLimitMiddleware(100, 60, 'api'))
     ->add(new JwtMiddleware());
 
@@ -88,4 +88,80 @@ if (!$schema->hasTable('reactions')) {
     echo "Created: reactions\n";
 }
 
+// Reaction totals per post and emoji (denormalized from reactions)
+if (!$schema->hasTable('post_reaction_counts')) {
+    $schema->create('post_reaction_counts', function ($table) use ($schema) {
+        $table->unsignedBigInteger('post_id');
+        $emoji = $table->string('emoji', 32);
+        if ($schema->getConnection()->getDriverName() === 'mysql') {
+            $emoji->collation('utf8mb4_bin'); // part of the key: unicode_ci treats many distinct emoji as equal
+        }
+        $table->unsignedInteger('reaction_count')->default(0);
+
+        $table->primary(['post_id', 'emoji']);
+        $table->foreign('post_id')->references('id')->on('posts')->onDelete('cascade');
+    });
+    echo "Created: post_reaction_counts (run database/rebuild_reaction_counts.php to fill it from existing reactions)\n";
+} elseif ($schema->getConnection()->getDriverName() === 'mysql'
+    && Capsule::selectOne(
+        "SELECT COLLATION_NAME AS collation FROM information_schema.COLUMNS
+         WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'post_reaction_counts' AND COLUMN_NAME = 'emoji'"
+    )->collation !== 'utf8mb4_bin') {
+    Capsule::statement('ALTER TABLE post_reaction_counts MODIFY emoji VARCHAR(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL');
+    echo "Updated: post_reaction_counts.emoji is now utf8mb4_bin (run database/rebuild_reaction_counts.php to split merged emoji)\n";
+}
+
+// Search index (CJK bigram / word tokens -> posts)
+if (!$schema->hasTable('search_tokens')) {
+    $schema->create('search_tokens', function ($table) use ($schema) {
+        $token = $table->string('token', 32);
+        if ($schema->getConnection()->getDriverName() === 'mysql') {
+            $token->collation('utf8mb4_bin'); // exact matching: unicode_ci folds e.g. は/ば/ぱ together
+        }
+        $table->unsignedBigInteger('post_id');
+        $table->unsignedInteger('weight');
+
+        $table->primary(['token', 'post_id']);
+        $table->index('post_id');
+        $table->foreign('post_id')->references('id')->on('posts')->onDelete('cascade');
+    });
+    echo "Created: search_tokens (run database/rebuild_search_index.php to index existing posts)\n";
+}
+
+// Content-addressed uploads (one row per stored image) and who uploaded them
+if (!$schema->hasTable('uploads')) {
+    $schema->create('uploads', function ($table) {
+        $table->char('content_hash', 64)->primary(); // SHA-256 of the uploaded file
+        $table->string('extension', 8);
+        $table->unsignedInteger('width');
+        $table->unsignedInteger('height');
+        $table->unsignedBigInteger('bytes'); // original + thumb/medium variants on disk
+        $table->boolean('has_variants')->default(false);
+        $table->timestamp('created_at')->useCurrent();
+    });
+    echo "Created: uploads\n";
+}
+
+if (!$schema->hasTable('upload_owners')) {
+    $schema->create('upload_owners', function ($table) {
+        $table->unsignedBigInteger('user_id');
+        $table->char('content_hash', 64);
+        $table->timestamp('created_at')->useCurrent();
+
+        $table->primary(['user_id', 'content_hash']);
+        $table->foreign('user_id')->references('id')->on('users')->onDelete('cascade');
+        $table->foreign('content_hash')->references('content_hash')->on('uploads')->onDelete('cascade');
+    });
+    echo "Created: upload_owners\n";
+}
+
+// Storage quota ledger ("user:<id>" and "total")
+if (!$schema->hasTable('storage_usage')) {
+    $schema->create('storage_usage', function ($table) {
+        $table->string('scope', 32)->primary();
+        $table->unsignedBigInteger('bytes_used')->default(0);
+    });
+    echo "Created: storage_usage (run database/rebuild_storage_usage.php to count existing uploads)\n";
+}
+
 echo "Migrations completed!\n";
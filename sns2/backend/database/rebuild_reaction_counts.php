@@ -0,0 +1,47 @@
+<?php
+
+declare(strict_types=1);
+
+/**
+ * Recompute post_reaction_counts from the reactions table
+ * Run: php database/rebuild_reaction_counts.php
+ *
+ * Counts are normally maintained by ReactionController; this repairs drift
+ * (bulk imports, manual edits, deleted posts on SQLite without foreign keys).
+ */
+
+require __DIR__ . '/../vendor/autoload.php';
+
+$dotenv = Dotenv\Dotenv::createImmutable(__DIR__ . '/..');
+$dotenv->load();
+
+require __DIR__ . '/../config/database.php';
+
+use Illuminate\Database\Capsule\Manager as Capsule;
+
+echo "Rebuilding reaction counts...\n";
+
+$key = fn($row) => $row->post_id . ' ' . $row->emoji;
+
+$before = Capsule::table('post_reaction_counts')->get()->mapWithKeys(fn($row) => [$key($row) => (int) $row->reaction_count]);
+
+// Group emoji byte-wise, as the counts table keys them; unicode_ci would merge distinct emoji
+$emoji = Capsule::connection()->getDriverName() === 'mysql' ? 'reactions.emoji COLLATE utf8mb4_bin' : 'reactions.emoji';
+
+Capsule::connection()->transaction(function () use ($emoji) {
+    Capsule::table('post_reaction_counts')->delete();
+    Capsule::table('post_reaction_counts')->insertUsing(
+        ['post_id', 'emoji', 'reaction_count'],
+        Capsule::table('reactions')
+            ->join('posts', 'posts.id', '=', 'reactions.post_id')
+            ->selectRaw("reactions.post_id, {$emoji}, COUNT(*)")
+            ->groupByRaw("reactions.post_id, {$emoji}")
+    );
+});
+
+$after = Capsule::table('post_reaction_counts')->get()->mapWithKeys(fn($row) => [$key($row) => (int) $row->reaction_count]);
+
+$drifted = $after->filter(fn($count, $k) => ($before[$k] ?? 0) !== $count)->count()
+    + $before->diffKeys($after)->count();
+
+echo "Reaction counts rebuilt: {$after->count()} rows, {$drifted} corrected\n";
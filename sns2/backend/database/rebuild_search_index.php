@@ -0,0 +1,38 @@
+<?php
+
+declare(strict_types=1);
+
+/**
+ * Rebuild the post search index from scratch
+ * Run: php database/rebuild_search_index.php
+ *
+ * Posts are kept indexed incrementally on create/update/delete; this is for
+ * the first deploy of the index, after bulk imports, or if the two drift.
+ */
+
+require __DIR__ . '/../vendor/autoload.php';
+
+$dotenv = Dotenv\Dotenv::createImmutable(__DIR__ . '/..');
+$dotenv->load();
+
+require __DIR__ . '/../config/database.php';
+
+use App\Models\Post;
+use App\Search\SearchIndex;
+use Illuminate\Database\Capsule\Manager as Capsule;
+
+echo "Rebuilding search index...\n";
+
+Capsule::table(SearchIndex::TABLE)->delete();
+
+$indexed = 0;
+Post::query()
+    ->select(['id', 'title', 'content_short', 'content_long'])
+    ->chunkById(500, function ($posts) use (&$indexed) {
+        SearchIndex::indexMany($posts);
+        $indexed += $posts->count();
+        echo "Indexed: {$indexed}\n";
+    });
+
+$tokens = Capsule::table(SearchIndex::TABLE)->count();
+echo "Search index rebuilt: {$indexed} posts, {$tokens} tokens\n";
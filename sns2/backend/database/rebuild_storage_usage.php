@@ -0,0 +1,57 @@
+<?php
+
+declare(strict_types=1);
+
+/**
+ * Recompute the storage_usage quota ledger from uploads / upload_owners
+ * Run: php database/rebuild_storage_usage.php
+ *
+ * The ledger is normally moved by UploadController; this fills it after the
+ * first deploy and repairs drift. Images uploaded before content addressing
+ * (flat names in public/uploads) have no owner and count toward the total only.
+ */
+
+require __DIR__ . '/../vendor/autoload.php';
+
+$dotenv = Dotenv\Dotenv::createImmutable(__DIR__ . '/..');
+$dotenv->load();
+
+require __DIR__ . '/../config/database.php';
+
+use App\Models\StorageUsage;
+use Illuminate\Database\Capsule\Manager as Capsule;
+
+echo "Rebuilding storage usage...\n";
+
+$legacyBytes = 0;
+foreach (glob(__DIR__ . '/../public/uploads/*.{jpg,png,gif,webp}', GLOB_BRACE) ?: [] as $file) {
+    $legacyBytes += filesize($file);
+}
+
+$rows = Capsule::table('upload_owners')
+    ->join('uploads', 'uploads.content_hash', '=', 'upload_owners.content_hash')
+    ->selectRaw('upload_owners.user_id, SUM(uploads.bytes) AS bytes_used')
+    ->groupBy('upload_owners.user_id')
+    ->get()
+    ->map(fn($row) => [
+        'scope' => StorageUsage::userScope((int) $row->user_id),
+        'bytes_used' => (int) $row->bytes_used,
+    ])
+    ->all();
+
+$total = (int) Capsule::table('uploads')->sum('bytes') + $legacyBytes;
+$rows[] = ['scope' => StorageUsage::TOTAL, 'bytes_used' => $total];
+
+Capsule::connection()->transaction(function () use ($rows) {
+    StorageUsage::query()->delete();
+    foreach (array_chunk($rows, 500) as $chunk) {
+        StorageUsage::query()->insert($chunk);
+    }
+});
+
+printf(
+    "Storage usage rebuilt: %d users, %.1fMB total (%.1fMB in pre-hash uploads)\n",
+    count($rows) - 1,
+    $total / 1024 / 1024,
+    $legacyBytes / 1024 / 1024
+);
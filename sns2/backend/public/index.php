@@ -55,6 +55,10 @@ $errorMiddleware->setDefaultErrorHandler(function ($request, $exception, $displa
 });
 
 
+// Request log and per-route metrics; registered before body parsing and routing so that
+// it runs inside both and sees the parsed body and the matched route pattern
+$app->add(new \App\Middleware\LoggingMiddleware());
+
 // Add Body Parsing Middleware
 $app->addBodyParsingMiddleware();
 
@@ -80,27 +84,21 @@ $app->options('/{routes:.+}', function ($request, $response) {
 require __DIR__ . '/../config/database.php';
 use Illuminate\Database\Capsule\Manager as Capsule;
 
-// Log DB Queries to stdout
-Capsule::connection()->listen(function ($query) {
-    $timestamp = date('Y-m-d H:i:s');
-    $sql = $query->sql;
-    $bindings = json_encode($query->bindings, JSON_UNESCAPED_UNICODE);
-    $time = $query->time; // ms
-
-    $log = sprintf(
-        "[%s] [DB] %s | Bindings: %s | Time: %.2fms" . PHP_EOL,
-        $timestamp,
-        $sql,
-        $bindings,
-        $time
-    );
-
-    file_put_contents('php://stdout', $log);
+// Count queries and DB time per request; REQUEST_LOG_QUERIES=on also logs each statement
+$logQueries = ($_ENV['REQUEST_LOG_QUERIES'] ?? 'off') === 'on';
+Capsule::connection()->listen(function ($query) use ($logQueries) {
+    \App\Logging\QueryStats::record((float) $query->time);
+
+    if ($logQueries) {
+        \App\Logging\RequestLogger::default()?->write([
+            'ts' => date('c'),
+            'type' => 'query',
+            'sql' => $query->sql,
+            'db_ms' => $query->time,
+        ]);
+    }
 });
 
-// Register Logging Middleware
-$app->add(new \App\Middleware\LoggingMiddleware());
-
 // Register routes
 require __DIR__ . '/../config/routes.php';
 
@@ -11,7 +11,9 @@ require __DIR__ . '/config/database.php';
 
 use App\Models\User;
 use App\Models\Post;
+use App\Models\PostReactionCount;
 use App\Models\Reaction;
+use App\Search\SearchIndex;
 use Illuminate\Database\Capsule\Manager as Capsule;
 
 try {
@@ -23,6 +25,7 @@ try {
     }
 
     // Clean up existing posts for this user to ensure screenshots look exactly as requested
+    SearchIndex::remove(Post::where('user_id', $user->id)->pluck('id')->all());
     Post::where('user_id', $user->id)->delete();
     echo "Cleared existing posts for testuser.\n";
 
@@ -44,6 +47,7 @@ try {
             'post_id' => $post->id,
             'emoji' => $emoji,
         ]);
+        PostReactionCount::recordAdded($post->id, $emoji);
         echo "Added reaction $emoji to post $text\n";
     }
     
@@ -0,0 +1,164 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Cache;
+
+use PDO;
+
+/**
+ * Response Cache
+ *
+ * 一覧APIのレスポンス（全ユーザー共通部分）を専用SQLiteファイル（WALモード）に保存する。
+ * 投稿・リアクション・引用の書き込みごとに content_version を1つ進め、
+ * 古いバージョンのエントリは参照されなくなる（次回の整理で削除）。
+ * 有効期限 (TTL) と件数上限 (LRU) で古いものから追い出す。スキーマはファイル作成時に一度だけ作る。
+ */
+class ResponseCache
+{
+    // last_used_at is refreshed at most this often, so hits stay read-only most of the time
+    private const TOUCH_INTERVAL = 10;
+    // Eviction runs on roughly one store in this many
+    private const EVICT_EVERY = 20;
+    private const SCHEMA_VERSION = 1;
+
+    private PDO $db;
+
+    public function __construct(
+        string $path,
+        private int $ttlSeconds = 60,
+        private int $maxEntries = 1000
+    ) {
+        $dir = dirname($path);
+        if (!is_dir($dir)) {
+            mkdir($dir, 0755, true);
+        }
+
+        $this->db = new PDO('sqlite:' . $path, null, null, [
+            PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+            PDO::ATTR_TIMEOUT => 5,
+        ]);
+        $this->db->exec('PRAGMA synchronous = NORMAL');
+        // user_version is read from the file header, so checking it is cheaper than re-running the DDL
+        if ((int) $this->db->query('PRAGMA user_version')->fetchColumn() < self::SCHEMA_VERSION) {
+            $this->createSchema();
+        }
+        $this->ttlSeconds = max(1, $this->ttlSeconds);
+    }
+
+    private function createSchema(): void
+    {
+        // WAL is persistent, so it only needs to be set when the file is created
+        $this->db->exec('PRAGMA journal_mode = WAL');
+        $this->db->exec(
+            'CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                expires_at INTEGER NOT NULL,
+                last_used_at INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_entries_last_used_at_index ON cache_entries (last_used_at);
+            CREATE TABLE IF NOT EXISTS cache_meta (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO cache_meta (name, value) VALUES (\'content_version\', 1);
+            PRAGMA user_version = ' . self::SCHEMA_VERSION
+        );
+    }
+
+    /**
+     * 現在の TTL 区間の番号。エントリは区間の終わりで一斉に期限切れになるため、
+     * アプリ外からの書き込み（シードや再集計スクリプト）も遅くとも TTL 秒後には反映される
+     */
+    public function epoch(): int
+    {
+        return intdiv(time(), $this->ttlSeconds);
+    }
+
+    /**
+     * 現在のコンテンツバージョン
+     */
+    public function version(): int
+    {
+        return (int) $this->db->query("SELECT value FROM cache_meta WHERE name = 'content_version'")->fetchColumn();
+    }
+
+    /**
+     * 書き込みがあったことを記録（キャッシュ済みの全エントリが無効になる）
+     */
+    public function bumpVersion(): void
+    {
+        $this->db->exec("UPDATE cache_meta SET value = value + 1 WHERE name = 'content_version'");
+    }
+
+    /**
+     * $version 時点で保存されたエントリを返す。無い・期限切れなら null
+     */
+    public function get(string $key, int $version): ?array
+    {
+        $now = time();
+        $stmt = $this->db->prepare(
+            'SELECT body, last_used_at FROM cache_entries WHERE cache_key = :key AND version = :version AND expires_at > :now'
+        );
+        $stmt->bindValue(':key', $key);
+        $stmt->bindValue(':version', $version, PDO::PARAM_INT);
+        $stmt->bindValue(':now', $now, PDO::PARAM_INT);
+        $stmt->execute();
+        $row = $stmt->fetch(PDO::FETCH_ASSOC);
+
+        if (!$row) {
+            return null;
+        }
+
+        if ($now - (int) $row['last_used_at'] >= self::TOUCH_INTERVAL) {
+            $touch = $this->db->prepare('UPDATE cache_entries SET last_used_at = :now WHERE cache_key = :key');
+            $touch->bindValue(':now', $now, PDO::PARAM_INT);
+            $touch->bindValue(':key', $key);
+            $touch->execute();
+        }
+
+        return json_decode($row['body'], true);
+    }
+
+    public function put(string $key, int $version, array $payload): void
+    {
+        $now = time();
+        $stmt = $this->db->prepare(
+            'INSERT OR REPLACE INTO cache_entries (cache_key, version, body, expires_at, last_used_at)
+             VALUES (:key, :version, :body, :expires_at, :now)'
+        );
+        $stmt->bindValue(':key', $key);
+        $stmt->bindValue(':version', $version, PDO::PARAM_INT);
+        $stmt->bindValue(':body', json_encode($payload, JSON_UNESCAPED_UNICODE), PDO::PARAM_LOB);
+        // Expires with the current epoch rather than TTL seconds from now, so it never outlives the ETag
+        $stmt->bindValue(':expires_at', (intdiv($now, $this->ttlSeconds) + 1) * $this->ttlSeconds, PDO::PARAM_INT);
+        $stmt->bindValue(':now', $now, PDO::PARAM_INT);
+        $stmt->execute();
+
+        if (mt_rand(1, self::EVICT_EVERY) === 1) {
+            $this->evict($version, $now);
+        }
+    }
+
+    /**
+     * 古いバージョン・期限切れを削除し、上限を超えた分は最終利用が古い順に削除
+     */
+    public function evict(int $version, int $now): void
+    {
+        $stmt = $this->db->prepare('DELETE FROM cache_entries WHERE version < :version OR expires_at <= :now');
+        $stmt->bindValue(':version', $version, PDO::PARAM_INT);
+        $stmt->bindValue(':now', $now, PDO::PARAM_INT);
+        $stmt->execute();
+
+        $stmt = $this->db->prepare(
+            'DELETE FROM cache_entries WHERE cache_key IN (
+                SELECT cache_key FROM cache_entries ORDER BY last_used_at ASC
+                LIMIT MAX(0, (SELECT COUNT(*) FROM cache_entries) - :max)
+            )'
+        );
+        $stmt->bindValue(':max', $this->maxEntries, PDO::PARAM_INT);
+        $stmt->execute();
+    }
+}
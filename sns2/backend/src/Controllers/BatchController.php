@@ -0,0 +1,421 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Controllers;
+
+use App\Helpers\Validator;
+use App\Models\Post;
+use App\Models\PostReactionCount;
+use App\Models\Reaction;
+use App\Models\Upload;
+use App\Search\SearchIndex;
+use Illuminate\Database\Capsule\Manager as Capsule;
+use Psr\Http\Message\ResponseInterface as Response;
+use Psr\Http\Message\ServerRequestInterface as Request;
+use OpenApi\Attributes as OA;
+
+/**
+ * Batch Controller
+ *
+ * 投稿の一括作成・リアクションの一括操作を1リクエスト・1トランザクションで行う
+ * 各項目は個別に検証し、results は items と同じ順（index が入力での位置）
+ * atomic=true の場合は1件でも失敗があれば何も書き込まず 422 を返す
+ * レート制限は項目数で重み付けする（routes.php の 'batch' 制限）
+ */
+#[OA\Tag(name: 'Batch', description: '一括操作')]
+class BatchController
+{
+    public const MAX_ITEMS = 100;
+
+    private const FEED_MAX_LENGTH = 150;
+    private const MAX_IMAGES = 4;
+    private const REACTION_ACTIONS = ['toggle', 'add', 'remove'];
+
+    /**
+     * Rate limit weight of a batch request: its item count
+     */
+    public static function itemCount(Request $request): int
+    {
+        $body = $request->getParsedBody();
+        $items = is_array($body) ? ($body['items'] ?? null) : null;
+
+        return is_array($items) ? min(count($items), self::MAX_ITEMS) : 1;
+    }
+
+    #[OA\Post(
+        path: '/batch/posts',
+        summary: '投稿の一括作成（つぶやき・ブログ・Q&A）',
+        description: '項目ごとの結果を items と同じ順で返す。検索インデックスはバッチ全体で1回更新',
+        tags: ['Batch'],
+        security: [['bearerAuth' => []]],
+        requestBody: new OA\RequestBody(
+            required: true,
+            content: new OA\JsonContent(
+                required: ['items'],
+                properties: [
+                    new OA\Property(
+                        property: 'items',
+                        type: 'array',
+                        maxItems: self::MAX_ITEMS,
+                        items: new OA\Items(
+                            required: ['type', 'content'],
+                            properties: [
+                                new OA\Property(property: 'type', type: 'string', enum: ['feed', 'blog', 'qa']),
+                                new OA\Property(property: 'title', type: 'string', description: 'blog / qa のみ'),
+                                new OA\Property(property: 'content', type: 'string'),
+                                new OA\Property(property: 'image_urls', type: 'array', items: new OA\Items(type: 'string'), description: 'feed のみ'),
+                            ]
+                        )
+                    ),
+                    new OA\Property(property: 'atomic', type: 'boolean', default: false),
+                ]
+            )
+        ),
+        responses: [
+            new OA\Response(response: 200, description: '処理完了（項目ごとの status は results を参照）'),
+            new OA\Response(response: 400, description: 'items が不正'),
+            new OA\Response(response: 422, description: 'atomic で失敗した項目があり、何も作成していない'),
+            new OA\Response(response: 429, description: 'レート制限'),
+        ]
+    )]
+    public function posts(Request $request, Response $response): Response
+    {
+        $userId = $request->getAttribute('user_id');
+        [$items, $atomic, $error] = $this->readBatch($request);
+        if ($error !== null) {
+            return $this->jsonResponse($response, ['error' => $error], 400);
+        }
+
+        $failures = [];
+        $valid = [];
+        foreach ($items as $index => $item) {
+            [$attributes, $errors] = is_array($item)
+                ? $this->postAttributes($item, (int) $userId)
+                : [null, ['item' => 'Each item must be an object']];
+            if ($errors) {
+                $failures[$index] = ['index' => $index, 'status' => 400, 'errors' => $errors];
+            } else {
+                $valid[$index] = $attributes;
+            }
+        }
+
+        $aborted = $atomic && $failures;
+        $created = [];
+        if ($valid && !$aborted) {
+            $valid = $this->attachImages($valid);
+            Capsule::connection()->transaction(function () use ($valid, &$created) {
+                // Model events would index each post on its own; the batch is indexed once below
+                Post::withoutEvents(function () use ($valid, &$created) {
+                    foreach ($valid as $index => $attributes) {
+                        $created[$index] = Post::create($attributes);
+                    }
+                });
+                SearchIndex::indexMany($created);
+            });
+        }
+
+        $results = [];
+        foreach (array_keys($items) as $index) {
+            $results[] = $failures[$index] ?? (isset($created[$index])
+                ? ['index' => $index, 'status' => 201, 'data' => $this->formatCreated($created[$index])]
+                : $this->notApplied($index));
+        }
+
+        return $this->batchResponse($response, $results, $aborted);
+    }
+
+    #[OA\Post(
+        path: '/batch/reactions',
+        summary: 'リアクションの一括操作',
+        description: 'action: toggle（デフォルト）/ add / remove。items の順に適用するので、同じ投稿・絵文字への操作は前の項目の結果を踏まえる',
+        tags: ['Batch'],
+        security: [['bearerAuth' => []]],
+        requestBody: new OA\RequestBody(
+            required: true,
+            content: new OA\JsonContent(
+                required: ['items'],
+                properties: [
+                    new OA\Property(
+                        property: 'items',
+                        type: 'array',
+                        maxItems: self::MAX_ITEMS,
+                        items: new OA\Items(
+                            required: ['post_id', 'emoji'],
+                            properties: [
+                                new OA\Property(property: 'post_id', type: 'integer'),
+                                new OA\Property(property: 'emoji', type: 'string', example: '👍'),
+                                new OA\Property(property: 'action', type: 'string', enum: self::REACTION_ACTIONS, default: 'toggle'),
+                            ]
+                        )
+                    ),
+                    new OA\Property(property: 'atomic', type: 'boolean', default: false),
+                ]
+            )
+        ),
+        responses: [
+            new OA\Response(response: 200, description: '処理完了（項目ごとの status は results、投稿ごとの最新集計は reactions）'),
+            new OA\Response(response: 400, description: 'items が不正'),
+            new OA\Response(response: 422, description: 'atomic で失敗した項目があり、何も変更していない'),
+            new OA\Response(response: 429, description: 'レート制限'),
+        ]
+    )]
+    public function reactions(Request $request, Response $response): Response
+    {
+        $userId = (int) $request->getAttribute('user_id');
+        [$items, $atomic, $error] = $this->readBatch($request);
+        if ($error !== null) {
+            return $this->jsonResponse($response, ['error' => $error], 400);
+        }
+
+        $failures = [];
+        $operations = [];
+        foreach ($items as $index => $item) {
+            $item = is_array($item) ? $item : [];
+            $postId = filter_var($item['post_id'] ?? null, FILTER_VALIDATE_INT);
+            $emoji = is_string($item['emoji'] ?? null) ? $item['emoji'] : '';
+            $action = $item['action'] ?? 'toggle';
+
+            if ($postId === false) {
+                $failures[$index] = ['index' => $index, 'status' => 400, 'error' => 'post_id is required'];
+            } elseif ($emoji === '' || mb_strlen($emoji) > 32) {
+                $failures[$index] = ['index' => $index, 'status' => 400, 'error' => 'Invalid emoji'];
+            } elseif (!in_array($action, self::REACTION_ACTIONS, true)) {
+                $failures[$index] = ['index' => $index, 'status' => 400, 'error' => 'action must be toggle, add or remove'];
+            } else {
+                $operations[$index] = [$postId, $emoji, $action];
+            }
+        }
+
+        // Two queries for the whole batch: which posts exist, and what the user has already reacted
+        $postIds = array_values(array_unique(array_column($operations, 0)));
+        $existingPosts = $postIds ? array_flip(Post::whereIn('id', $postIds)->pluck('id')->all()) : [];
+        $reacted = [];
+        if ($postIds) {
+            Reaction::where('user_id', $userId)
+                ->whereIn('post_id', $postIds)
+                ->get(['post_id', 'emoji'])
+                ->each(function ($reaction) use (&$reacted) {
+                    $reacted[$reaction->post_id . ' ' . $reaction->emoji] = true;
+                });
+        }
+
+        // Resolve toggles in item order, so repeated items see the earlier ones
+        $planned = [];
+        foreach ($operations as $index => [$postId, $emoji, $action]) {
+            $key = $postId . ' ' . $emoji;
+            if (!isset($existingPosts[$postId])) {
+                $failures[$index] = ['index' => $index, 'status' => 404, 'error' => 'Post not found'];
+                continue;
+            }
+            if ($action === 'toggle') {
+                $action = isset($reacted[$key]) ? 'remove' : 'add';
+            }
+            if ($action === 'add' && isset($reacted[$key])) {
+                $failures[$index] = ['index' => $index, 'status' => 409, 'error' => 'Already reacted with this emoji'];
+                continue;
+            }
+            if ($action === 'remove' && !isset($reacted[$key])) {
+                $failures[$index] = ['index' => $index, 'status' => 404, 'error' => 'Reaction not found'];
+                continue;
+            }
+            if ($action === 'add') {
+                $reacted[$key] = true;
+            } else {
+                unset($reacted[$key]);
+            }
+            $planned[$index] = [$postId, $emoji, $action];
+        }
+
+        $aborted = $atomic && $failures;
+        if ($planned && !$aborted) {
+            // Reaction rows and their emoji totals change together, as in ReactionController
+            Capsule::connection()->transaction(function () use ($userId, $planned) {
+                foreach ($planned as [$postId, $emoji, $action]) {
+                    if ($action === 'add') {
+                        Reaction::create(['user_id' => $userId, 'post_id' => $postId, 'emoji' => $emoji]);
+                        PostReactionCount::recordAdded($postId, $emoji);
+                    } else {
+                        // Decrement the deleted row's emoji, which may differ from the requested one on MySQL
+                        $reaction = Reaction::findFor($userId, $postId, $emoji);
+                        if ($reaction && Reaction::whereKey($reaction->id)->delete() > 0) {
+                            PostReactionCount::recordRemoved($postId, $reaction->emoji);
+                        }
+                    }
+                }
+            });
+        }
+
+        $results = [];
+        foreach (array_keys($items) as $index) {
+            if (isset($failures[$index])) {
+                $results[] = $failures[$index];
+            } elseif (isset($planned[$index]) && !$aborted) {
+                [$postId, $emoji, $action] = $planned[$index];
+                $results[] = [
+                    'index' => $index,
+                    'status' => $action === 'add' ? 201 : 200,
+                    'post_id' => $postId,
+                    'emoji' => $emoji,
+                    'action' => $action === 'add' ? 'added' : 'removed',
+                ];
+            } else {
+                $results[] = $this->notApplied($index);
+            }
+        }
+
+        $touched = $aborted ? [] : array_values(array_unique(array_column($planned, 0)));
+
+        return $this->batchResponse($response, $results, $aborted, [
+            'reactions' => $touched ? PostReactionCount::forPosts($touched) : (object) [],
+        ]);
+    }
+
+    /**
+     * [items, atomic, error] from the request body
+     */
+    private function readBatch(Request $request): array
+    {
+        $body = $request->getParsedBody();
+        $items = is_array($body) ? ($body['items'] ?? null) : null;
+
+        if (!is_array($items) || $items === [] || !array_is_list($items)) {
+            return [[], false, 'items must be a non-empty array'];
+        }
+        if (count($items) > self::MAX_ITEMS) {
+            return [[], false, 'A batch can hold at most ' . self::MAX_ITEMS . ' items'];
+        }
+
+        return [$items, filter_var($body['atomic'] ?? false, FILTER_VALIDATE_BOOLEAN), null];
+    }
+
+    /**
+     * Validates one item with the same rules as POST /feeds, /blogs and /qa: [attributes, errors]
+     */
+    private function postAttributes(array $item, int $userId): array
+    {
+        $type = $item['type'] ?? null;
+
+        if ($type === Post::TYPE_FEED) {
+            if (isset($item['content']) && !is_string($item['content'])) {
+                return [null, ['content' => 'つぶやき内容は文字列で入力してください']];
+            }
+            $validator = new Validator($item);
+            $validator
+                ->required('content', 'つぶやき内容')
+                ->max('content', self::FEED_MAX_LENGTH, 'つぶやき内容')
+                ->sanitize('content');
+            if ($validator->fails()) {
+                return [null, $validator->errors()];
+            }
+
+            $imageUrls = [];
+            if (!empty($item['image_urls']) && is_array($item['image_urls'])) {
+                $imageUrls = array_slice(array_values(array_filter($item['image_urls'], 'is_string')), 0, self::MAX_IMAGES);
+            }
+
+            return [[
+                'user_id' => $userId,
+                'type' => Post::TYPE_FEED,
+                'content_short' => $validator->validated()['content'],
+                'image_urls' => $imageUrls,
+            ], []];
+        }
+
+        if ($type === Post::TYPE_BLOG || $type === Post::TYPE_QA) {
+            $errors = [];
+            if (empty($item['title']) || !is_string($item['title']) || mb_strlen($item['title']) > 255) {
+                $errors[] = 'Title is required and must be 255 characters or less';
+            }
+            if (empty($item['content']) || !is_string($item['content'])) {
+                $errors[] = 'Content is required';
+            } elseif ($type === Post::TYPE_BLOG && mb_strlen($item['content']) > BlogController::MAX_CONTENT_LENGTH) {
+                $errors[] = 'Content must be ' . BlogController::MAX_CONTENT_LENGTH . ' characters or less';
+            }
+            if ($errors) {
+                return [null, $errors];
+            }
+
+            $attributes = [
+                'user_id' => $userId,
+                'type' => $type,
+                'title' => $item['title'],
+                'content_long' => $item['content'],
+            ];
+            if ($type === Post::TYPE_QA) {
+                $attributes['qa_status'] = Post::QA_STATUS_OPEN;
+            }
+
+            return [$attributes, []];
+        }
+
+        return [null, ['type' => 'type must be feed, blog or qa']];
+    }
+
+    /**
+     * Feed metadata as FeedController::store writes it, with one uploads lookup for the whole batch
+     */
+    private function attachImages(array $valid): array
+    {
+        $urls = [];
+        foreach ($valid as $attributes) {
+            array_push($urls, ...($attributes['image_urls'] ?? []));
+        }
+        $images = $urls ? Upload::describeUrls($urls) : [];
+
+        $offset = 0;
+        foreach ($valid as $index => $attributes) {
+            if (!array_key_exists('image_urls', $attributes)) {
+                continue;
+            }
+            $imageUrls = $attributes['image_urls'];
+            unset($attributes['image_urls']);
+            $attributes['metadata'] = json_encode([
+                'image_urls' => $imageUrls,
+                'images' => array_slice($images, $offset, count($imageUrls)),
+            ]);
+            $offset += count($imageUrls);
+            $valid[$index] = $attributes;
+        }
+
+        return $valid;
+    }
+
+    private function formatCreated(Post $post): array
+    {
+        return [
+            'id' => $post->id,
+            'type' => $post->type,
+            'title' => $post->title,
+            'created_at' => $post->created_at->toISOString(),
+        ];
+    }
+
+    private function notApplied(int $index): array
+    {
+        return ['index' => $index, 'status' => 424, 'error' => 'Not applied: another item in the atomic batch failed'];
+    }
+
+    private function batchResponse(Response $response, array $results, bool $aborted, array $extra = []): Response
+    {
+        $failed = count(array_filter($results, fn($result) => $result['status'] >= 400));
+
+        return $this->jsonResponse($response, [
+            'results' => $results,
+            ...$extra,
+            'summary' => [
+                'succeeded' => count($results) - $failed,
+                'failed' => $failed,
+                'applied' => !$aborted,
+            ],
+        ], $aborted ? 422 : 200);
+    }
+
+    private function jsonResponse(Response $response, array $data, int $status = 200): Response
+    {
+        $response->getBody()->write(json_encode($data, JSON_UNESCAPED_UNICODE));
+        return $response
+            ->withStatus($status)
+            ->withHeader('Content-Type', 'application/json');
+    }
+}
@@ -12,7 +12,7 @@ use OpenApi\Attributes as OA;
 #[OA\Tag(name: 'Blog', description: 'ブログ（長文記事）')]
 class BlogController
 {
-    private const MAX_CONTENT_LENGTH = 10000;
+    public const MAX_CONTENT_LENGTH = 10000;
 
     #[OA\Get(
         path: '/blogs',
@@ -37,7 +37,7 @@ class BlogController
 
         $blogs = Post::blog()
             ->latest()
-            ->with(['user', 'reactions', 'quotesAsQuoting.sourcePost.user'])
+            ->with(['user', ...Post::reactionRelations($request->getAttribute('user_id')), 'quotesAsQuoting.sourcePost.user'])
             ->skip(($page - 1) * $perPage)
             ->take($perPage)
             ->get();
@@ -123,7 +123,14 @@ class BlogController
     {
         $GLOBALS['request_user_id'] = $request->getAttribute('user_id');
         $blog = Post::blog()
-            ->with(['user', 'reactions', 'answers.user', 'answers.reactions', 'quotesAsSource.quotingPost.user', 'quotesAsQuoting.sourcePost.user'])
+            ->with([
+                'user',
+                ...Post::reactionRelations($request->getAttribute('user_id')),
+                'answers.user',
+                ...Post::reactionRelations($request->getAttribute('user_id'), 'answers.'),
+                'quotesAsSource.quotingPost.user',
+                'quotesAsQuoting.sourcePost.user',
+            ])
             ->find($args['id']);
 
         if (!$blog) {
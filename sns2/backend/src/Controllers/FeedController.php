@@ -6,6 +6,8 @@ namespace App\Controllers;
 
 use App\Models\Post;
 use App\Models\Quote;
+use App\Models\Upload;
+use App\Helpers\Cursor;
 use App\Helpers\Validator;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
@@ -17,14 +19,18 @@ class FeedController
     #[OA\Get(
         path: '/feeds',
         summary: 'つぶやき一覧取得（新着順）',
+        description: 'cursor または before_id を指定するとカーソル方式になり、件数集計を省略して meta.next_cursor を返す',
         tags: ['Feed'],
         security: [['bearerAuth' => []]],
         parameters: [
             new OA\Parameter(name: 'page', in: 'query', schema: new OA\Schema(type: 'integer', default: 1)),
             new OA\Parameter(name: 'per_page', in: 'query', schema: new OA\Schema(type: 'integer', default: 20)),
+            new OA\Parameter(name: 'cursor', in: 'query', description: '前回の meta.next_cursor（空文字で先頭から）', schema: new OA\Schema(type: 'string')),
+            new OA\Parameter(name: 'before_id', in: 'query', description: 'この投稿より古いものを返す', schema: new OA\Schema(type: 'integer')),
         ],
         responses: [
             new OA\Response(response: 200, description: '成功'),
+            new OA\Response(response: 400, description: '不正なカーソル'),
         ]
     )]
     public function index(Request $request, Response $response): Response
@@ -34,9 +40,13 @@ class FeedController
         $page = max(1, (int) ($params['page'] ?? 1));
         $perPage = min(50, max(1, (int) ($params['per_page'] ?? 20)));
 
+        if (array_key_exists('cursor', $params) || array_key_exists('before_id', $params)) {
+            return $this->cursorIndex($request, $response, $perPage);
+        }
+
         $feeds = Post::feed()
             ->latest()
-            ->with(['user', 'reactions', 'quotesAsQuoting.sourcePost.user'])
+            ->with(['user', ...Post::reactionRelations($request->getAttribute('user_id')), 'quotesAsQuoting.sourcePost.user'])
             ->skip(($page - 1) * $perPage)
             ->take($perPage)
             ->get();
@@ -54,6 +64,52 @@ class FeedController
         ]);
     }
 
+    /**
+     * Keyset pagination: no OFFSET scan and no COUNT(*), so deep pages cost the same as the first
+     */
+    private function cursorIndex(Request $request, Response $response, int $perPage): Response
+    {
+        $params = $request->getQueryParams();
+        $createdAt = null;
+        $beforeId = null;
+
+        if (!empty($params['cursor'])) {
+            $position = Cursor::decode((string) $params['cursor']);
+            if ($position === null) {
+                return $this->jsonResponse($response, ['error' => 'Invalid cursor'], 400);
+            }
+            [$createdAt, $beforeId] = $position;
+        } elseif (!empty($params['before_id'])) {
+            $anchor = Post::feed()->find((int) $params['before_id']);
+            if (!$anchor) {
+                return $this->jsonResponse($response, ['error' => 'Invalid before_id'], 400);
+            }
+            $createdAt = $anchor->created_at->format('Y-m-d H:i:s');
+            $beforeId = $anchor->id;
+        }
+
+        // One extra row tells us whether another page exists
+        $feeds = Post::feed()
+            ->before($createdAt, $beforeId)
+            ->with(['user', ...Post::reactionRelations($request->getAttribute('user_id')), 'quotesAsQuoting.sourcePost.user'])
+            ->take($perPage + 1)
+            ->get();
+
+        $hasMore = $feeds->count() > $perPage;
+        $feeds = $feeds->take($perPage);
+        $last = $feeds->last();
+
+        return $this->jsonResponse($response, [
+            'data' => $feeds->map(fn($feed) => $this->formatPost($feed, true)),
+            'meta' => [
+                'per_page' => $perPage,
+                'next_cursor' => $hasMore && $last
+                    ? Cursor::encode($last->created_at->format('Y-m-d H:i:s'), $last->id)
+                    : null,
+            ],
+        ]);
+    }
+
     #[OA\Post(
         path: '/feeds',
         summary: 'つぶやき投稿',
@@ -94,14 +150,15 @@ class FeedController
         // Handle image URLs
         $imageUrls = [];
         if (!empty($data['image_urls']) && is_array($data['image_urls'])) {
-            $imageUrls = array_slice($data['image_urls'], 0, 4); // max 4 images
+            $imageUrls = array_slice(array_values(array_filter($data['image_urls'], 'is_string')), 0, 4); // max 4 images
         }
 
         $feed = Post::create([
             'user_id' => $userId,
             'type' => Post::TYPE_FEED,
             'content_short' => $validated['content'],
-            'metadata' => json_encode(['image_urls' => $imageUrls]),
+            // images carries thumb/medium URLs so listings need not load originals
+            'metadata' => json_encode(['image_urls' => $imageUrls, 'images' => Upload::describeUrls($imageUrls)]),
         ]);
 
         $feed->load('user');
@@ -126,7 +183,7 @@ class FeedController
     {
         $GLOBALS['request_user_id'] = $request->getAttribute('user_id'); // Store for formatPost helper
         $feed = Post::feed()
-            ->with(['user', 'reactions', 'quotesAsSource.quotingPost.user', 'quotesAsQuoting.sourcePost.user'])
+            ->with(['user', ...Post::reactionRelations($request->getAttribute('user_id')), 'quotesAsSource.quotingPost.user', 'quotesAsQuoting.sourcePost.user'])
             ->find($args['id']);
 
         if (!$feed) {
@@ -284,15 +341,16 @@ class FeedController
         // Parse metadata for image URLs
         $metadata = json_decode($post->metadata ?? '{}', true) ?: [];
         $imageUrls = $metadata['image_urls'] ?? [];
+        // Posts from before sized variants only have image_urls
+        $images = $metadata['images'] ?? Upload::describeUrls($imageUrls);
 
         // Check if user is logged in (jwt middleware sets user_id)
         $currentUserId = $GLOBALS['request_user_id'] ?? null;
 
         $userReactions = [];
         if ($currentUserId) {
-            // Optimization: If eager loaded, use it. Otherwise, query (N+1 risk in list if not careful).
-            // However, for Simplicity in this PHP setup without full Auth context in Models, we might rely on a tailored query or just simple filtering if 'reactions' are loaded.
-            // Since 'reactions' contains ALL reactions, we can filter by user_id in memory if eager loaded.
+            // Listings eager-load 'reactions' narrowed to this user (Post::reactionRelations);
+            // filtering again by user_id keeps this correct if all reactions were loaded.
             if ($post->relationLoaded('reactions')) {
                 $userReactions = $post->reactions
                     ->where('user_id', $currentUserId)
@@ -308,6 +366,7 @@ class FeedController
             'type' => $post->type,
             'content' => $post->content_short,
             'image_urls' => $imageUrls,
+            'images' => $images,
             'user' => [
                 'id' => $post->user->id,
                 'username' => $post->user->username,
@@ -4,7 +4,9 @@ declare(strict_types=1);
 
 namespace App\Controllers;
 
+use App\Helpers\Cursor;
 use App\Models\Post;
+use App\Search\SearchIndex;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
 use OpenApi\Attributes as OA;
@@ -12,6 +14,9 @@ use OpenApi\Attributes as OA;
 #[OA\Tag(name: 'QA', description: 'Q&A（質問と回答）')]
 class QaController
 {
+    private const ANSWERS_PER_PAGE = 20;
+    private const MAX_ANSWERS_PER_PAGE = 100;
+
     #[OA\Get(
         path: '/qa',
         summary: 'Q&A一覧取得',
@@ -33,7 +38,12 @@ class QaController
         $page = max(1, (int) ($params['page'] ?? 1));
         $perPage = min(50, max(1, (int) ($params['per_page'] ?? 20)));
 
-        $query = Post::qa()->latest()->with(['user', 'reactions', 'answers', 'quotesAsQuoting.sourcePost.user']);
+        // answers_count is a correlated COUNT on the parent_post_id index; no answer rows are loaded
+        $query = Post::qa()->latest()->withCount('answers')->with([
+            'user',
+            ...Post::reactionRelations($request->getAttribute('user_id')),
+            'quotesAsQuoting.sourcePost.user',
+        ]);
 
         if (!empty($params['status'])) {
             $query->where('qa_status', $params['status']);
@@ -105,11 +115,13 @@ class QaController
 
     #[OA\Get(
         path: '/qa/{id}',
-        summary: 'Q&A詳細取得（回答含む）',
+        summary: 'Q&A詳細取得（回答の最初のページ含む）',
+        description: 'answers はベストアンサーを先頭に固定し、残りを古い順に answers_per_page 件。続きは answers_meta.next_cursor を GET /qa/{id}/answers に渡す',
         tags: ['QA'],
         security: [['bearerAuth' => []]],
         parameters: [
             new OA\Parameter(name: 'id', in: 'path', required: true, schema: new OA\Schema(type: 'integer')),
+            new OA\Parameter(name: 'answers_per_page', in: 'query', schema: new OA\Schema(type: 'integer', default: 20, maximum: 100)),
         ],
         responses: [
             new OA\Response(response: 200, description: '成功'),
@@ -118,17 +130,71 @@ class QaController
     )]
     public function show(Request $request, Response $response, array $args): Response
     {
-        $GLOBALS['request_user_id'] = $request->getAttribute('user_id');
+        $viewerId = $request->getAttribute('user_id');
+        $GLOBALS['request_user_id'] = $viewerId;
         $qaId = (int) $args['id'];
         $question = Post::qa()
-            ->with(['user', 'reactions', 'answers.user', 'answers.reactions', 'bestAnswer', 'quotesAsQuoting.sourcePost.user'])
+            ->withCount('answers')
+            ->with([
+                'user',
+                ...Post::reactionRelations($viewerId),
+                'quotesAsQuoting.sourcePost.user',
+            ])
             ->find($qaId);
 
         if (!$question) {
             return $this->jsonResponse($response, ['error' => 'Question not found'], 404);
         }
 
-        return $this->jsonResponse($response, $this->formatQuestion($question, true));
+        $perPage = $this->answersPerPage($request->getQueryParams()['answers_per_page'] ?? null);
+        $slice = $this->answerSlice($question, $viewerId, null, $perPage);
+
+        $data = $this->formatQuestion($question);
+        $data['answers'] = $slice['data'];
+        $data['answers_meta'] = $slice['meta'];
+
+        return $this->jsonResponse($response, $data);
+    }
+
+    #[OA\Get(
+        path: '/qa/{id}/answers',
+        summary: '回答一覧取得（カーソル方式、古い順）',
+        description: 'cursor を省略すると先頭ページ（ベストアンサーを先頭に固定）。以降は meta.next_cursor を渡す',
+        tags: ['QA'],
+        security: [['bearerAuth' => []]],
+        parameters: [
+            new OA\Parameter(name: 'id', in: 'path', required: true, schema: new OA\Schema(type: 'integer')),
+            new OA\Parameter(name: 'cursor', in: 'query', schema: new OA\Schema(type: 'string')),
+            new OA\Parameter(name: 'per_page', in: 'query', schema: new OA\Schema(type: 'integer', default: 20, maximum: 100)),
+        ],
+        responses: [
+            new OA\Response(response: 200, description: '成功'),
+            new OA\Response(response: 400, description: '不正なカーソル'),
+            new OA\Response(response: 404, description: '質問が見つからない'),
+        ]
+    )]
+    public function answers(Request $request, Response $response, array $args): Response
+    {
+        $viewerId = $request->getAttribute('user_id');
+        $GLOBALS['request_user_id'] = $viewerId;
+        $params = $request->getQueryParams();
+
+        $question = Post::qa()->select(['id', 'best_answer_id'])->find((int) $args['id']);
+        if (!$question) {
+            return $this->jsonResponse($response, ['error' => 'Question not found'], 404);
+        }
+
+        $position = null;
+        if (!empty($params['cursor'])) {
+            $position = Cursor::decode((string) $params['cursor']);
+            if ($position === null) {
+                return $this->jsonResponse($response, ['error' => 'Invalid cursor'], 400);
+            }
+        }
+
+        $slice = $this->answerSlice($question, $viewerId, $position, $this->answersPerPage($params['per_page'] ?? null));
+
+        return $this->jsonResponse($response, $slice);
     }
 
     #[OA\Put(
@@ -185,7 +251,7 @@ class QaController
             $question->update($updateData);
         }
 
-        $question->load('user');
+        $question->load('user')->loadCount('answers');
 
         return $this->jsonResponse($response, $this->formatQuestion($question));
     }
@@ -217,7 +283,8 @@ class QaController
             return $this->jsonResponse($response, ['error' => 'Forbidden'], 403);
         }
 
-        // Delete answers too
+        // Delete answers too (a bulk delete fires no model events, so unindex them here)
+        SearchIndex::remove($question->answers()->pluck('id')->all());
         $question->answers()->delete();
         $question->delete();
 
@@ -270,7 +337,7 @@ class QaController
 
         $answer->load('user');
 
-        return $this->jsonResponse($response, $this->formatAnswer($answer), 201);
+        return $this->jsonResponse($response, $this->formatAnswer($answer, $question->best_answer_id), 201);
     }
 
     #[OA\Put(
@@ -324,12 +391,57 @@ class QaController
             'qa_status' => Post::QA_STATUS_RESOLVED,
         ]);
 
-        $question->load(['user', 'answers.user', 'bestAnswer']);
+        $question->load('user')->loadCount('answers');
 
         return $this->jsonResponse($response, $this->formatQuestion($question));
     }
 
-    private function formatQuestion(Post $question, bool $includeAnswers = false): array
+    /**
+     * One slice of a question's answers, oldest first. The first slice (no position) starts
+     * with the best answer, which the cursor slices then skip so it is never repeated.
+     * Reaction totals come from post_reaction_counts, two eager loads for the whole slice.
+     */
+    private function answerSlice(Post $question, ?int $viewerId, ?array $position, int $perPage): array
+    {
+        $relations = ['user', ...Post::reactionRelations($viewerId)];
+        $bestAnswerId = $question->best_answer_id;
+
+        // One extra row tells us whether another slice exists
+        $answers = $question->answers()
+            ->with($relations)
+            ->when($bestAnswerId, fn($query) => $query->where('id', '!=', $bestAnswerId))
+            ->after($position[0] ?? null, $position[1] ?? null)
+            ->take($perPage + 1)
+            ->get();
+
+        $hasMore = $answers->count() > $perPage;
+        $answers = $answers->take($perPage);
+        $last = $answers->last();
+
+        if ($position === null && $bestAnswerId) {
+            $best = $question->answers()->with($relations)->find($bestAnswerId);
+            if ($best) {
+                $answers->prepend($best);
+            }
+        }
+
+        return [
+            'data' => $answers->map(fn($answer) => $this->formatAnswer($answer, $bestAnswerId))->values(),
+            'meta' => [
+                'per_page' => $perPage,
+                'next_cursor' => $hasMore && $last
+                    ? Cursor::encode($last->created_at->format('Y-m-d H:i:s'), $last->id)
+                    : null,
+            ],
+        ];
+    }
+
+    private function answersPerPage(mixed $value): int
+    {
+        return min(self::MAX_ANSWERS_PER_PAGE, max(1, (int) ($value ?? self::ANSWERS_PER_PAGE)));
+    }
+
+    private function formatQuestion(Post $question): array
     {
         $currentUserId = $GLOBALS['request_user_id'] ?? null;
         $userReactions = [];
@@ -356,16 +468,12 @@ class QaController
             ],
             'reaction_counts' => $question->reaction_counts,
             'user_reactions' => $userReactions,
-            'answer_count' => $question->answers->count(),
+            'answer_count' => $question->answers_count ?? $question->answers()->count(),
             'best_answer_id' => $question->best_answer_id,
             'created_at' => $question->created_at->toISOString(),
             'updated_at' => $question->updated_at->toISOString(),
         ];
 
-        if ($includeAnswers) {
-            $data['answers'] = $question->answers->map(fn($a) => $this->formatAnswer($a));
-        }
-
         if ($question->relationLoaded('quotesAsQuoting')) {
             $data['quoted_posts'] = $question->quotesAsQuoting->map(fn($quote) => [
                 'id' => $quote->sourcePost->id,
@@ -383,7 +491,7 @@ class QaController
         return $data;
     }
 
-    private function formatAnswer(Post $answer): array
+    private function formatAnswer(Post $answer, ?int $bestAnswerId): array
     {
         $currentUserId = $GLOBALS['request_user_id'] ?? null;
         $userReactions = [];
@@ -399,7 +507,7 @@ class QaController
         return [
             'id' => $answer->id,
             'content' => $answer->content_long,
-            'is_best_answer' => $answer->parentPost?->best_answer_id === $answer->id,
+            'is_best_answer' => $bestAnswerId === $answer->id,
             'user' => [
                 'id' => $answer->user->id,
                 'username' => $answer->user->username,
@@ -5,7 +5,9 @@ declare(strict_types=1);
 namespace App\Controllers;
 
 use App\Models\Post;
+use App\Models\PostReactionCount;
 use App\Models\Reaction;
+use Illuminate\Database\Capsule\Manager as Capsule;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
 use OpenApi\Attributes as OA;
@@ -36,14 +38,7 @@ class ReactionController
         }
 
         // Get reaction counts grouped by emoji
-        $reactionCounts = Reaction::where('post_id', $postId)
-            ->selectRaw('emoji, COUNT(*) as count')
-            ->groupBy('emoji')
-            ->get()
-            ->map(fn($r) => [
-                'emoji' => $r->emoji,
-                'count' => $r->count,
-            ]);
+        $reactionCounts = PostReactionCount::forPost($postId);
 
         // Get current user's reactions
         $userId = $request->getAttribute('user_id');
@@ -111,21 +106,18 @@ class ReactionController
             return $this->jsonResponse($response, ['error' => 'Already reacted with this emoji'], 409);
         }
 
-        Reaction::create([
-            'user_id' => $userId,
-            'post_id' => $postId,
-            'emoji' => $emoji,
-        ]);
+        // The reaction row and its emoji total change together
+        Capsule::connection()->transaction(function () use ($userId, $postId, $emoji) {
+            Reaction::create([
+                'user_id' => $userId,
+                'post_id' => $postId,
+                'emoji' => $emoji,
+            ]);
+            PostReactionCount::recordAdded($postId, $emoji);
+        });
 
         // Return updated reaction counts
-        $reactionCounts = Reaction::where('post_id', $postId)
-            ->selectRaw('emoji, COUNT(*) as count')
-            ->groupBy('emoji')
-            ->get()
-            ->map(fn($r) => [
-                'emoji' => $r->emoji,
-                'count' => $r->count,
-            ]);
+        $reactionCounts = PostReactionCount::forPost($postId);
 
         return $this->jsonResponse($response, [
             'message' => 'Reaction added',
@@ -153,26 +145,22 @@ class ReactionController
         $postId = (int) $args['id'];
         $emoji = urldecode($args['emoji']);
 
-        $reaction = Reaction::where('user_id', $userId)
-            ->where('post_id', $postId)
-            ->where('emoji', $emoji)
-            ->first();
+        $reaction = Reaction::findFor((int) $userId, $postId, $emoji);
 
         if (!$reaction) {
             return $this->jsonResponse($response, ['error' => 'Reaction not found'], 404);
         }
 
-        $reaction->delete();
+        Capsule::connection()->transaction(function () use ($reaction, $postId) {
+            // Only the request that actually removed the row lowers the total, keyed by the
+            // deleted row's emoji so the byte-exact counts match the rows
+            if (Reaction::whereKey($reaction->id)->delete() > 0) {
+                PostReactionCount::recordRemoved($postId, $reaction->emoji);
+            }
+        });
 
         // Return updated reaction counts
-        $reactionCounts = Reaction::where('post_id', $postId)
-            ->selectRaw('emoji, COUNT(*) as count')
-            ->groupBy('emoji')
-            ->get()
-            ->map(fn($r) => [
-                'emoji' => $r->emoji,
-                'count' => $r->count,
-            ]);
+        $reactionCounts = PostReactionCount::forPost($postId);
 
         return $this->jsonResponse($response, [
             'message' => 'Reaction removed',
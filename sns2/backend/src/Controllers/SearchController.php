@@ -7,6 +7,7 @@ namespace App\Controllers;
 use App\Models\Post;
 use App\Models\User;
 use App\Helpers\Validator;
+use App\Search\SearchIndex;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
 use OpenApi\Attributes as OA;
@@ -58,26 +59,42 @@ class SearchController
 
         // Search posts
         if ($type === 'all' || $type === 'posts') {
-            $postsQuery = Post::with(['user'])
-                ->where(function ($q) use ($escapedQuery) {
-                    $q->where('content_short', 'LIKE', "%{$escapedQuery}%")
-                        ->orWhere('content_long', 'LIKE', "%{$escapedQuery}%")
-                        ->orWhere('title', 'LIKE', "%{$escapedQuery}%");
-                })
-                ->latest();
-
-            $totalPosts = $postsQuery->count();
-            $posts = $postsQuery
-                ->skip(($page - 1) * $perPage)
-                ->take($perPage)
-                ->get();
+            // Ranked lookup in the bigram index; queries with no indexable characters fall back to LIKE
+            $hits = SearchIndex::search($query, $page, $perPage);
+
+            $totalCapped = false;
+            if ($hits !== null) {
+                $totalPosts = $hits['total'];
+                $totalCapped = $hits['total_capped'];
+                $posts = Post::with(['user'])
+                    ->whereIn('id', $hits['ids'])
+                    ->get()
+                    ->sortBy(fn($post) => array_search($post->id, $hits['ids'], true))
+                    ->values();
+            } else {
+                $postsQuery = Post::with(['user'])
+                    ->where(function ($q) use ($escapedQuery) {
+                        $q->where('content_short', 'LIKE', "%{$escapedQuery}%")
+                            ->orWhere('content_long', 'LIKE', "%{$escapedQuery}%")
+                            ->orWhere('title', 'LIKE', "%{$escapedQuery}%");
+                    })
+                    ->latest();
+
+                $totalPosts = $postsQuery->count();
+                $posts = $postsQuery
+                    ->skip(($page - 1) * $perPage)
+                    ->take($perPage)
+                    ->get();
+            }
 
             $result['posts'] = [
                 'data' => $posts->map(fn($post) => $this->formatPost($post)),
                 'meta' => [
                     'total' => $totalPosts,
+                    // When true, total is a lower bound and more pages follow
+                    'total_capped' => $totalCapped,
                     'current_page' => $page,
-                    'last_page' => (int) ceil($totalPosts / $perPage),
+                    'last_page' => (int) ceil($totalPosts / $perPage) + ($totalCapped ? 1 : 0),
                 ],
             ];
         }
@@ -4,7 +4,11 @@ declare(strict_types=1);
 
 namespace App\Controllers;
 
-use App\Models\User;
+use App\Models\StorageUsage;
+use App\Models\Upload;
+use App\Upload\ImageStore;
+use App\Upload\QuotaExceededException;
+use Illuminate\Database\Capsule\Manager as Capsule;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
 use Psr\Http\Message\UploadedFileInterface;
@@ -14,6 +18,8 @@ use OpenApi\Attributes as OA;
 class UploadController
 {
     private string $uploadDir;
+    private string $incomingDir;
+    private ImageStore $images;
     private array $allowedMimeTypes = [
         'image/jpeg',
         'image/png',
@@ -24,12 +30,15 @@ class UploadController
     private int $maxUserStorage = 50 * 1024 * 1024; // 50MB per user
     private int $maxTotalStorage = 1024 * 1024 * 1024; // 1GB total
 
+    private const STORE_FAILED = '画像の保存に失敗しました';
+
     public function __construct()
     {
         $this->uploadDir = __DIR__ . '/../../public/uploads';
-        if (!is_dir($this->uploadDir)) {
-            mkdir($this->uploadDir, 0755, true);
-        }
+        // Unprocessed files (EXIF/GPS intact) are staged outside the web root, next to PHP's own
+        // upload temp files so moveTo() is a rename
+        $this->incomingDir = ini_get('upload_tmp_dir') ?: sys_get_temp_dir();
+        $this->images = new ImageStore($this->uploadDir);
     }
 
     #[OA\Post(
@@ -49,8 +58,9 @@ class UploadController
             )
         ),
         responses: [
-            new OA\Response(response: 200, description: 'アップロード成功'),
-            new OA\Response(response: 400, description: 'バリデーションエラー'),
+            new OA\Response(response: 200, description: 'アップロード成功（url は元画像、image に thumb / medium の URL とサイズ）'),
+            new OA\Response(response: 400, description: 'バリデーションエラー・容量不足'),
+            new OA\Response(response: 500, description: '画像の保存に失敗'),
         ]
     )]
     public function upload(Request $request, Response $response): Response
@@ -67,81 +77,17 @@ class UploadController
         /** @var UploadedFileInterface $uploadedFile */
         $uploadedFile = $uploadedFiles['image'];
 
-        // Check for upload errors
-        if ($uploadedFile->getError() !== UPLOAD_ERR_OK) {
-            return $this->jsonResponse($response, [
-                'error' => 'アップロード中にエラーが発生しました'
-            ], 400);
-        }
-
-        // Validate file size
-        $fileSize = $uploadedFile->getSize();
-        if ($fileSize > $this->maxFileSize) {
-            return $this->jsonResponse($response, [
-                'error' => 'ファイルサイズは5MB以内にしてください'
-            ], 400);
-        }
-
-        // Check user storage quota
-        $userUsedStorage = $this->getUserStorageUsage($userId);
-        if ($userUsedStorage + $fileSize > $this->maxUserStorage) {
-            $remainingMB = round(($this->maxUserStorage - $userUsedStorage) / 1024 / 1024, 1);
-            return $this->jsonResponse($response, [
-                'error' => "ストレージ容量が不足しています（残り: {$remainingMB}MB）"
-            ], 400);
-        }
-
-        // Check total storage
-        $totalUsedStorage = $this->getTotalStorageUsage();
-        if ($totalUsedStorage + $fileSize > $this->maxTotalStorage) {
-            return $this->jsonResponse($response, [
-                'error' => 'サーバーのストレージ容量が不足しています'
-            ], 400);
-        }
-
-        // Validate MIME type from client
-        $mimeType = $uploadedFile->getClientMediaType();
-        if (!in_array($mimeType, $this->allowedMimeTypes, true)) {
-            return $this->jsonResponse($response, [
-                'error' => '対応している形式: JPEG, PNG, GIF, WebP'
-            ], 400);
+        $result = $this->storeImage($uploadedFile, (int) $userId);
+        if (is_string($result)) {
+            return $this->jsonResponse($response, ['error' => $result], $result === self::STORE_FAILED ? 500 : 400);
         }
 
-        // Validate actual file content (magic bytes) - security against MIME spoofing
-        $stream = $uploadedFile->getStream();
-        $stream->rewind();
-        $header = $stream->read(12);
-        $stream->rewind();
-
-        $actualMimeType = $this->detectMimeFromMagicBytes($header);
-        if ($actualMimeType === null || !in_array($actualMimeType, $this->allowedMimeTypes, true)) {
-            return $this->jsonResponse($response, [
-                'error' => 'ファイル形式が不正です'
-            ], 400);
-        }
-
-        // Generate unique filename
-        $extension = $this->getExtension($actualMimeType);
-        $filename = $this->generateFilename($extension);
-        $filepath = $this->uploadDir . '/' . $filename;
-
-        // Move uploaded file
-        $uploadedFile->moveTo($filepath);
-
-        // Strip EXIF/metadata (GPS location, camera info, etc.) for privacy
-        $this->stripMetadata($filepath, $actualMimeType);
-
-        // Update user's storage usage (use actual file size after re-encoding)
-        $actualFileSize = filesize($filepath);
-        $this->updateUserStorageUsage($userId, $actualFileSize);
-
-        // Return URL
-        $baseUrl = $this->getBaseUrl($request);
-        $imageUrl = $baseUrl . '/uploads/' . $filename;
+        $image = $result->toImage($this->getBaseUrl($request));
 
         return $this->jsonResponse($response, [
-            'url' => $imageUrl,
-            'filename' => $filename,
+            'url' => $image['url'],
+            'filename' => ImageStore::relativePath($result->content_hash, $result->extension),
+            'image' => $image,
         ]);
     }
 
@@ -188,8 +134,8 @@ class UploadController
             ], 400);
         }
 
-        // Pre-check user storage quota
-        $userUsedStorage = $this->getUserStorageUsage($userId);
+        // Pre-check user storage quota (each image is still reserved on its own below)
+        $userUsedStorage = StorageUsage::used(StorageUsage::userScope((int) $userId));
         $totalUploadSize = array_sum(array_map(fn($f) => $f->getSize(), $images));
 
         if ($userUsedStorage + $totalUploadSize > $this->maxUserStorage) {
@@ -200,68 +146,106 @@ class UploadController
         }
 
         $urls = [];
+        $stored = [];
         $baseUrl = $this->getBaseUrl($request);
-        $totalAddedBytes = 0;
 
         foreach ($images as $uploadedFile) {
-            if ($uploadedFile->getError() !== UPLOAD_ERR_OK) {
+            $result = $this->storeImage($uploadedFile, (int) $userId);
+            if (is_string($result)) {
                 continue;
             }
 
-            if ($uploadedFile->getSize() > $this->maxFileSize) {
-                continue;
-            }
-
-            $mimeType = $uploadedFile->getClientMediaType();
-            if (!in_array($mimeType, $this->allowedMimeTypes, true)) {
-                continue;
-            }
-
-            // Validate magic bytes
-            $stream = $uploadedFile->getStream();
-            $stream->rewind();
-            $header = $stream->read(12);
-            $stream->rewind();
+            $image = $result->toImage($baseUrl);
+            $urls[] = $image['url'];
+            $stored[] = $image;
+        }
 
-            $actualMimeType = $this->detectMimeFromMagicBytes($header);
-            if ($actualMimeType === null || !in_array($actualMimeType, $this->allowedMimeTypes, true)) {
-                continue;
-            }
+        return $this->jsonResponse($response, [
+            'urls' => $urls,
+            'images' => $stored,
+            'count' => count($urls),
+        ]);
+    }
 
-            $extension = $this->getExtension($actualMimeType);
-            $filename = $this->generateFilename($extension);
-            $filepath = $this->uploadDir . '/' . $filename;
+    /**
+     * Validates one uploaded file and stores it under its content hash.
+     * An image already on the server is not processed again, and each user
+     * is charged for it only the first time they upload it.
+     *
+     * @return Upload|string the stored image, or an error message
+     */
+    private function storeImage(UploadedFileInterface $uploadedFile, int $userId): Upload|string
+    {
+        if ($uploadedFile->getError() !== UPLOAD_ERR_OK) {
+            return 'アップロード中にエラーが発生しました';
+        }
 
-            $uploadedFile->moveTo($filepath);
+        if ($uploadedFile->getSize() > $this->maxFileSize) {
+            return 'ファイルサイズは5MB以内にしてください';
+        }
 
-            // Strip EXIF/metadata for privacy
-            $this->stripMetadata($filepath, $actualMimeType);
+        $mimeType = $uploadedFile->getClientMediaType();
+        if (!in_array($mimeType, $this->allowedMimeTypes, true)) {
+            return '対応している形式: JPEG, PNG, GIF, WebP';
+        }
 
-            // Track actual file size after re-encoding
-            $totalAddedBytes += filesize($filepath);
+        // Validate actual file content (magic bytes) - security against MIME spoofing
+        $stream = $uploadedFile->getStream();
+        $stream->rewind();
+        $header = $stream->read(12);
+        $stream->rewind();
 
-            $urls[] = $baseUrl . '/uploads/' . $filename;
+        $actualMimeType = $this->detectMimeFromMagicBytes($header);
+        if ($actualMimeType === null || !in_array($actualMimeType, $this->allowedMimeTypes, true)) {
+            return 'ファイル形式が不正です';
         }
 
-        // Update user's storage usage
-        if ($totalAddedBytes > 0) {
-            $this->updateUserStorageUsage($userId, $totalAddedBytes);
+        // Cheap pre-check before hashing and resizing; reserve() below stays the authoritative check
+        $userScope = StorageUsage::userScope($userId);
+        $userUsedStorage = StorageUsage::used($userScope);
+        if ($userUsedStorage + $uploadedFile->getSize() > $this->maxUserStorage) {
+            $remainingMB = max(0, round(($this->maxUserStorage - $userUsedStorage) / 1024 / 1024, 1));
+            return "ストレージ容量が不足しています（残り: {$remainingMB}MB）";
         }
 
-        return $this->jsonResponse($response, [
-            'urls' => $urls,
-            'count' => count($urls),
-        ]);
-    }
+        $incomingPath = $this->incomingDir . '/sns2_upload_' . bin2hex(random_bytes(8));
+        $uploadedFile->moveTo($incomingPath);
 
-    private function generateFilename(string $extension): string
-    {
-        return sprintf(
-            '%s_%s.%s',
-            date('Ymd_His'),
-            bin2hex(random_bytes(8)),
-            $extension
-        );
+        try {
+            $hash = ImageStore::hashFile($incomingPath);
+            // Stripping metadata and resizing only happen the first time an image is seen
+            $stored = Upload::find($hash) === null
+                ? $this->images->store($incomingPath, $hash, $actualMimeType)
+                : null;
+        } catch (\RuntimeException $e) {
+            error_log('Upload store failed: ' . $e->getMessage());
+            return self::STORE_FAILED;
+        } finally {
+            @unlink($incomingPath);
+        }
+
+        try {
+            return Capsule::connection()->transaction(function () use ($hash, $stored, $userId, $userScope) {
+                if ($stored !== null && Upload::record($hash, $stored)
+                    && !StorageUsage::reserve(StorageUsage::TOTAL, $stored['bytes'], $this->maxTotalStorage)) {
+                    throw new QuotaExceededException('サーバーのストレージ容量が不足しています');
+                }
+
+                $upload = Upload::findOrFail($hash);
+                if ($upload->claim($userId) && !StorageUsage::reserve($userScope, $upload->bytes, $this->maxUserStorage)) {
+                    $remainingMB = max(0, round(($this->maxUserStorage - StorageUsage::used($userScope)) / 1024 / 1024, 1));
+                    throw new QuotaExceededException("ストレージ容量が不足しています（残り: {$remainingMB}MB）");
+                }
+
+                return $upload;
+            });
+        } catch (QuotaExceededException $e) {
+            // Keep the files if another upload recorded the same image in the meantime
+            if ($stored !== null && !Upload::whereKey($hash)->exists()) {
+                $this->images->delete($hash, $stored['extension']);
+            }
+            return $e->getMessage();
+        }
     }
 
     /**
@@ -292,17 +276,6 @@ class UploadController
         return null;
     }
 
-    private function getExtension(string $mimeType): string
-    {
-        return match ($mimeType) {
-            'image/jpeg' => 'jpg',
-            'image/png' => 'png',
-            'image/gif' => 'gif',
-            'image/webp' => 'webp',
-            default => 'bin',
-        };
-    }
-
     private function getBaseUrl(Request $request): string
     {
         $uri = $request->getUri();
@@ -318,53 +291,6 @@ class UploadController
         return $baseUrl;
     }
 
-    /**
-     * Get user's current storage usage from metadata field
-     */
-    private function getUserStorageUsage(int $userId): int
-    {
-        $user = User::find($userId);
-        if (!$user) {
-            return 0;
-        }
-
-        $metadata = json_decode($user->metadata ?? '{}', true) ?: [];
-        return (int) ($metadata['storage_used'] ?? 0);
-    }
-
-    /**
-     * Update user's storage usage
-     */
-    private function updateUserStorageUsage(int $userId, int $addedBytes): void
-    {
-        $user = User::find($userId);
-        if (!$user) {
-            return;
-        }
-
-        $metadata = json_decode($user->metadata ?? '{}', true) ?: [];
-        $metadata['storage_used'] = ($metadata['storage_used'] ?? 0) + $addedBytes;
-        $user->metadata = json_encode($metadata);
-        $user->save();
-    }
-
-    /**
-     * Get total storage usage by scanning uploads directory
-     */
-    private function getTotalStorageUsage(): int
-    {
-        $total = 0;
-        $files = glob($this->uploadDir . '/*');
-
-        foreach ($files as $file) {
-            if (is_file($file)) {
-                $total += filesize($file);
-            }
-        }
-
-        return $total;
-    }
-
     private function jsonResponse(Response $response, array $data, int $status = 200): Response
     {
         $response->getBody()->write(json_encode($data, JSON_UNESCAPED_UNICODE));
@@ -372,50 +298,4 @@ class UploadController
             ->withStatus($status)
             ->withHeader('Content-Type', 'application/json');
     }
-
-    /**
-     * Strip EXIF/metadata from image (GPS location, camera info, etc.) for privacy
-     * Re-encodes the image using GD to remove all metadata
-     */
-    private function stripMetadata(string $filepath, string $mimeType): void
-    {
-        // Check if GD is available
-        if (!extension_loaded('gd')) {
-            return; // Skip if GD not available
-        }
-
-        try {
-            // Load image based on type
-            $image = match ($mimeType) {
-                'image/jpeg' => imagecreatefromjpeg($filepath),
-                'image/png' => imagecreatefrompng($filepath),
-                'image/gif' => imagecreatefromgif($filepath),
-                'image/webp' => function_exists('imagecreatefromwebp') ? imagecreatefromwebp($filepath) : null,
-                default => null,
-            };
-
-            if ($image === null || $image === false) {
-                return;
-            }
-
-            // For PNG, preserve transparency
-            if ($mimeType === 'image/png') {
-                imagealphablending($image, false);
-                imagesavealpha($image, true);
-            }
-
-            // Re-encode to strip metadata
-            match ($mimeType) {
-                'image/jpeg' => imagejpeg($image, $filepath, 90), // 90% quality
-                'image/png' => imagepng($image, $filepath, 6), // compression level 6
-                'image/gif' => imagegif($image, $filepath),
-                'image/webp' => function_exists('imagewebp') ? imagewebp($image, $filepath, 90) : null,
-                default => null,
-            };
-
-            imagedestroy($image);
-        } catch (\Throwable $e) {
-            // Silently fail - original file is still valid
-        }
-    }
 }
@@ -0,0 +1,41 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Helpers;
+
+/**
+ * Keyset Pagination Cursor
+ *
+ * 一覧の「最後に返した投稿」の位置 (created_at, id) を不透明な文字列にする。
+ * クライアントは中身を解釈せず、next_cursor をそのまま次のリクエストに渡す。
+ */
+class Cursor
+{
+    /**
+     * (created_at, id) をURLセーフなbase64にエンコード
+     */
+    public static function encode(string $createdAt, int $id): string
+    {
+        $json = json_encode(['c' => $createdAt, 'i' => $id]);
+        return rtrim(strtr(base64_encode($json), '+/', '-_'), '=');
+    }
+
+    /**
+     * カーソルを [created_at, id] に戻す。不正な値なら null
+     */
+    public static function decode(string $cursor): ?array
+    {
+        $json = base64_decode(strtr($cursor, '-_', '+/'), true);
+        $data = $json === false ? null : json_decode($json, true);
+
+        if (!is_array($data) || !is_string($data['c'] ?? null) || !is_int($data['i'] ?? null)) {
+            return null;
+        }
+        if (strtotime($data['c']) === false) {
+            return null;
+        }
+
+        return [$data['c'], $data['i']];
+    }
+}
@@ -0,0 +1,48 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Logging;
+
+/**
+ * After Response
+ *
+ * レスポンス送信後（fastcgi_finish_request が使えればその後）に実行する処理のキュー。
+ * ログの書き出しやメトリクスの記録をレイテンシの外に出すために使う。
+ * 各処理の失敗は error_log に残して握りつぶし、後続の処理やレスポンスには影響させない。
+ */
+class AfterResponse
+{
+    /** @var callable[] */
+    private static array $tasks = [];
+    private static bool $registered = false;
+
+    public static function defer(callable $task): void
+    {
+        self::$tasks[] = $task;
+        if (!self::$registered) {
+            self::$registered = true;
+            register_shutdown_function([self::class, 'run']);
+        }
+    }
+
+    /**
+     * Shutdown hook: hand the response to the client first, then run the queued tasks
+     */
+    public static function run(): void
+    {
+        if (self::$tasks && function_exists('fastcgi_finish_request')) {
+            fastcgi_finish_request();
+        }
+
+        // Tasks may defer more work; keep draining until the queue is empty
+        while ($task = array_shift(self::$tasks)) {
+            try {
+                $task();
+            } catch (\Throwable $e) {
+                error_log('After-response task failed: ' . $e->getMessage());
+            }
+        }
+        self::$registered = false;
+    }
+}
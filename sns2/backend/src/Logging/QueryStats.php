@@ -0,0 +1,39 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Logging;
+
+/**
+ * Query Stats
+ *
+ * 現在のリクエストで実行したクエリ数とDB時間（Capsule の query listener から加算）。
+ * LoggingMiddleware がリクエスト開始時にリセットし、終了時に読み取る。
+ */
+class QueryStats
+{
+    private static int $count = 0;
+    private static float $milliseconds = 0.0;
+
+    public static function reset(): void
+    {
+        self::$count = 0;
+        self::$milliseconds = 0.0;
+    }
+
+    public static function record(float $milliseconds): void
+    {
+        self::$count++;
+        self::$milliseconds += $milliseconds;
+    }
+
+    public static function count(): int
+    {
+        return self::$count;
+    }
+
+    public static function milliseconds(): float
+    {
+        return self::$milliseconds;
+    }
+}
@@ -0,0 +1,32 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Logging;
+
+/**
+ * Request Context
+ *
+ * 内側のミドルウェアがリクエスト属性に付けた値のうち、ログに残すもの（認証ユーザーID）。
+ * 属性は内側のリクエストにしか付かないため、外側の LoggingMiddleware にはここ経由で渡す。
+ * LoggingMiddleware がリクエスト開始時にリセットする。
+ */
+class RequestContext
+{
+    private static ?int $userId = null;
+
+    public static function reset(): void
+    {
+        self::$userId = null;
+    }
+
+    public static function setUserId(int $userId): void
+    {
+        self::$userId = $userId;
+    }
+
+    public static function userId(): ?int
+    {
+        return self::$userId;
+    }
+}
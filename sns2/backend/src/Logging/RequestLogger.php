@@ -0,0 +1,82 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Logging;
+
+/**
+ * Request Logger
+ *
+ * JSON Lines のログをメモリに溜め、レスポンス送信後（fastcgi_finish_request が使えればその後）に
+ * 1回の追記でまとめて書き出す。出力先は REQUEST_LOG で切替:
+ * file（logs/requests-YYYY-MM-DD.log, デフォルト） / stdout / off
+ */
+class RequestLogger
+{
+    private static self|false|null $default = null;
+
+    /** @var string[] */
+    private array $buffer = [];
+    private bool $flushScheduled = false;
+
+    /**
+     * @param string $target 'stdout' またはログファイルを置くディレクトリ
+     * @param int $maxBuffered これ以上溜まったら途中でも書き出す行数
+     */
+    public function __construct(
+        private string $target,
+        private int $maxBuffered = 100
+    ) {
+    }
+
+    /**
+     * One logger per process, or null when REQUEST_LOG=off
+     */
+    public static function default(): ?self
+    {
+        if (self::$default === null) {
+            self::$default = match ($_ENV['REQUEST_LOG'] ?? 'file') {
+                'off' => false,
+                'stdout' => new self('stdout'),
+                default => new self(__DIR__ . '/../../logs'),
+            };
+        }
+        return self::$default ?: null;
+    }
+
+    public function write(array $entry): void
+    {
+        $this->buffer[] = json_encode($entry, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES | JSON_INVALID_UTF8_SUBSTITUTE);
+
+        if (count($this->buffer) >= $this->maxBuffered) {
+            $this->flush();
+        } elseif (!$this->flushScheduled) {
+            // Log I/O happens after the response has been handed to the client
+            $this->flushScheduled = true;
+            AfterResponse::defer(function () {
+                $this->flushScheduled = false;
+                $this->flush();
+            });
+        }
+    }
+
+    public function flush(): void
+    {
+        if (!$this->buffer) {
+            return;
+        }
+        $data = implode("\n", $this->buffer) . "\n";
+        $this->buffer = [];
+
+        if ($this->target === 'stdout') {
+            file_put_contents('php://stdout', $data);
+            return;
+        }
+
+        if (!is_dir($this->target)) {
+            mkdir($this->target, 0755, true);
+        }
+        // One appended write per flush; LOCK_EX keeps lines from concurrent workers whole
+        file_put_contents($this->target . '/requests-' . date('Y-m-d') . '.log', $data, FILE_APPEND | LOCK_EX);
+    }
+}
@@ -0,0 +1,78 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Metrics;
+
+/**
+ * APCu Metrics Store
+ *
+ * PHP-FPM / mod_php のワーカー間で共有されるAPCuメモリにカウンタを置き、apcu_inc で加算する。
+ * 合計値は整数カウンタに収めるため 1e-6 単位で保持する。
+ * 状態はサーバー再起動で消える。CLIで使う場合は apc.enable_cli=1 が必要。
+ */
+class ApcuMetricsStore implements MetricsStore
+{
+    private const PREFIX = 'metrics:';
+    private const SUM_SCALE = 1_000_000;
+    private const STATUS_CLASSES = ['1xx', '2xx', '3xx', '4xx', '5xx'];
+
+    public function __construct()
+    {
+        if (!function_exists('apcu_enabled') || !apcu_enabled()) {
+            throw new \RuntimeException('APCu is not available; use METRICS_STORE=sqlite');
+        }
+    }
+
+    public function observe(string $route, int $status, array $observations): void
+    {
+        // Route registry, so snapshot() knows which keys to read
+        apcu_add(self::PREFIX . 'route:' . $route, 1);
+        apcu_inc(self::PREFIX . "requests:{$route}:" . Metrics::statusClass($status));
+
+        foreach ($observations as $metric => $value) {
+            $bucket = Metrics::bucketIndex($metric, $value);
+            apcu_inc(self::PREFIX . "bucket:{$metric}:{$route}:{$bucket}");
+            apcu_inc(self::PREFIX . "sum:{$metric}:{$route}", (int) round($value * self::SUM_SCALE));
+        }
+    }
+
+    public function snapshot(): array
+    {
+        $routes = [];
+        foreach (new \APCUIterator('/^' . preg_quote(self::PREFIX . 'route:', '/') . '/', APC_ITER_KEY) as $entry) {
+            $routes[] = substr($entry['key'], strlen(self::PREFIX . 'route:'));
+        }
+        sort($routes);
+
+        $snapshot = ['requests' => [], 'histograms' => []];
+        foreach ($routes as $route) {
+            foreach (self::STATUS_CLASSES as $class) {
+                $count = apcu_fetch(self::PREFIX . "requests:{$route}:{$class}", $found);
+                if ($found) {
+                    $snapshot['requests'][$route][$class] = (int) $count;
+                }
+            }
+
+            foreach (Metrics::HISTOGRAMS as $metric => $bounds) {
+                $keys = [];
+                for ($i = 0; $i <= count($bounds); $i++) {
+                    $keys[] = self::PREFIX . "bucket:{$metric}:{$route}:{$i}";
+                }
+                $values = apcu_fetch($keys) ?: [];
+                $buckets = array_map(fn($key) => (int) ($values[$key] ?? 0), $keys);
+                $count = array_sum($buckets);
+                if ($count === 0) {
+                    continue;
+                }
+                $snapshot['histograms'][$metric][$route] = [
+                    'buckets' => $buckets,
+                    'sum' => (int) apcu_fetch(self::PREFIX . "sum:{$metric}:{$route}") / self::SUM_SCALE,
+                    'count' => $count,
+                ];
+            }
+        }
+
+        return $snapshot;
+    }
+}
@@ -0,0 +1,102 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Metrics;
+
+/**
+ * Metrics
+ *
+ * ルート別ヒストグラムの定義と、GET /metrics 用の Prometheus テキスト形式への変換。
+ * ストアは METRICS_STORE で切替: sqlite（デフォルト, WAL） / apcu / off
+ */
+class Metrics
+{
+    // Upper bounds of each histogram's buckets; values above the last go to +Inf
+    public const HISTOGRAMS = [
+        'http_request_duration_seconds' => [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+        'db_query_duration_seconds' => [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+        'db_queries_per_request' => [0, 1, 2, 3, 5, 10, 20, 50, 100],
+    ];
+
+    private const HELP = [
+        'http_request_duration_seconds' => 'Time spent in the route handler and inner middleware',
+        'db_query_duration_seconds' => 'Total database time per request',
+        'db_queries_per_request' => 'Database queries per request',
+    ];
+
+    private static MetricsStore|false|null $defaultStore = null;
+
+    /**
+     * One store per process, or null when METRICS_STORE=off
+     */
+    public static function defaultStore(): ?MetricsStore
+    {
+        if (self::$defaultStore === null) {
+            self::$defaultStore = match ($_ENV['METRICS_STORE'] ?? 'sqlite') {
+                'off' => false,
+                'apcu' => new ApcuMetricsStore(),
+                default => new SqliteMetricsStore(
+                    __DIR__ . '/../../' . ($_ENV['METRICS_DATABASE'] ?? 'database/metrics.sqlite')
+                ),
+            };
+        }
+        return self::$defaultStore ?: null;
+    }
+
+    /**
+     * Index of the bucket $value falls into; count($bounds) is the +Inf bucket
+     */
+    public static function bucketIndex(string $metric, float $value): int
+    {
+        foreach (self::HISTOGRAMS[$metric] as $i => $bound) {
+            if ($value <= $bound) {
+                return $i;
+            }
+        }
+        return count(self::HISTOGRAMS[$metric]);
+    }
+
+    public static function statusClass(int $status): string
+    {
+        return intdiv($status, 100) . 'xx';
+    }
+
+    /**
+     * snapshot() を Prometheus text exposition format (0.0.4) に変換
+     */
+    public static function render(array $snapshot): string
+    {
+        $lines = [
+            '# HELP http_requests_total Requests by route and status class',
+            '# TYPE http_requests_total counter',
+        ];
+        foreach ($snapshot['requests'] as $route => $statuses) {
+            foreach ($statuses as $status => $count) {
+                $lines[] = sprintf('http_requests_total{route="%s",status="%s"} %d', self::escape($route), $status, $count);
+            }
+        }
+
+        foreach (self::HISTOGRAMS as $metric => $bounds) {
+            $lines[] = "# HELP {$metric} " . self::HELP[$metric];
+            $lines[] = "# TYPE {$metric} histogram";
+            foreach ($snapshot['histograms'][$metric] ?? [] as $route => $histogram) {
+                $label = 'route="' . self::escape($route) . '"';
+                $cumulative = 0;
+                foreach ([...$bounds, '+Inf'] as $i => $bound) {
+                    $cumulative += $histogram['buckets'][$i] ?? 0;
+                    $lines[] = sprintf('%s_bucket{%s,le="%s"} %d', $metric, $label, $bound, $cumulative);
+                }
+                $lines[] = sprintf('%s_sum{%s} %s', $metric, $label, round($histogram['sum'], 6));
+                $lines[] = sprintf('%s_count{%s} %d', $metric, $label, $histogram['count']);
+            }
+        }
+
+        return implode("\n", $lines) . "\n";
+    }
+
+    private static function escape(string $value): string
+    {
+        return str_replace(['\\', '"', "\n"], ['\\\\', '\\"', '\\n'], $value);
+    }
+}
@@ -0,0 +1,33 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Metrics;
+
+/**
+ * Metrics Store
+ *
+ * ルートごとのリクエスト数とヒストグラムを保持するバックエンド。
+ * observe() は1リクエスト分を加算するだけで、集計は snapshot() 側で行う。
+ */
+interface MetricsStore
+{
+    /**
+     * 1リクエスト分の観測値を記録する
+     *
+     * @param string $route "GET /api/feeds/{id}" 形式のルート名
+     * @param array<string, float> $observations Metrics::HISTOGRAMS のメトリクス名 => 値
+     */
+    public function observe(string $route, int $status, array $observations): void;
+
+    /**
+     * 全ルートの累計
+     *
+     * @return array{
+     *     requests: array<string, array<string, int>>,
+     *     histograms: array<string, array<string, array{buckets: int[], sum: float, count: int}>>
+     * } requests はルート => ステータス区分 ("2xx") => 件数、
+     *   histograms はメトリクス名 => ルート => バケットごとの件数（非累積、最後が +Inf）
+     */
+    public function snapshot(): array;
+}
@@ -0,0 +1,136 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Metrics;
+
+use PDO;
+
+/**
+ * SQLite Metrics Store
+ *
+ * 専用のSQLiteファイル（WALモード）にルート・メトリクス・バケットごとの件数を1行で保持する。
+ * 1リクエスト分の加算は1トランザクションの UPSERT で行う。スキーマはファイル作成時に一度だけ作る。
+ */
+class SqliteMetricsStore implements MetricsStore
+{
+    private const SCHEMA_VERSION = 1;
+
+    private PDO $db;
+    private \PDOStatement $requestStatement;
+    private \PDOStatement $bucketStatement;
+    private \PDOStatement $sumStatement;
+
+    public function __construct(string $path)
+    {
+        $dir = dirname($path);
+        if (!is_dir($dir)) {
+            mkdir($dir, 0755, true);
+        }
+
+        $this->db = new PDO('sqlite:' . $path, null, null, [
+            PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+            PDO::ATTR_TIMEOUT => 5, // busy timeout while another process holds the write lock
+        ]);
+        $this->db->exec('PRAGMA synchronous = NORMAL');
+        // user_version is read from the file header, so checking it is cheaper than re-running the DDL
+        if ((int) $this->db->query('PRAGMA user_version')->fetchColumn() < self::SCHEMA_VERSION) {
+            $this->createSchema();
+        }
+
+        $this->requestStatement = $this->db->prepare(
+            'INSERT INTO metric_requests (route, status_class, count) VALUES (?, ?, 1)
+             ON CONFLICT (route, status_class) DO UPDATE SET count = count + 1'
+        );
+        $this->bucketStatement = $this->db->prepare(
+            'INSERT INTO metric_buckets (metric, route, bucket, count) VALUES (?, ?, ?, 1)
+             ON CONFLICT (metric, route, bucket) DO UPDATE SET count = count + 1'
+        );
+        $this->sumStatement = $this->db->prepare(
+            'INSERT INTO metric_sums (metric, route, sum) VALUES (?, ?, ?)
+             ON CONFLICT (metric, route) DO UPDATE SET sum = sum + excluded.sum'
+        );
+    }
+
+    public function observe(string $route, int $status, array $observations): void
+    {
+        // One write transaction per request instead of one per statement
+        $this->db->exec('BEGIN IMMEDIATE');
+        try {
+            $this->requestStatement->execute([$route, Metrics::statusClass($status)]);
+            foreach ($observations as $metric => $value) {
+                $this->bucketStatement->execute([$metric, $route, Metrics::bucketIndex($metric, $value)]);
+                $this->sumStatement->execute([$metric, $route, $value]);
+            }
+            $this->db->exec('COMMIT');
+        } catch (\Throwable $e) {
+            $this->db->exec('ROLLBACK');
+            throw $e;
+        }
+    }
+
+    private function createSchema(): void
+    {
+        // WAL is persistent, so it only needs to be set when the file is created
+        $this->db->exec('PRAGMA journal_mode = WAL');
+        $this->db->exec(
+            'CREATE TABLE IF NOT EXISTS metric_requests (
+                route TEXT NOT NULL,
+                status_class TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (route, status_class)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS metric_buckets (
+                metric TEXT NOT NULL,
+                route TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (metric, route, bucket)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS metric_sums (
+                metric TEXT NOT NULL,
+                route TEXT NOT NULL,
+                sum REAL NOT NULL,
+                PRIMARY KEY (metric, route)
+            ) WITHOUT ROWID;
+            PRAGMA user_version = ' . self::SCHEMA_VERSION
+        );
+    }
+
+    public function snapshot(): array
+    {
+        $snapshot = ['requests' => [], 'histograms' => []];
+
+        $rows = $this->db->query('SELECT route, status_class, count FROM metric_requests ORDER BY route, status_class');
+        foreach ($rows as $row) {
+            $snapshot['requests'][$row['route']][$row['status_class']] = (int) $row['count'];
+        }
+
+        $rows = $this->db->query('SELECT metric, route, bucket, count FROM metric_buckets ORDER BY metric, route, bucket');
+        foreach ($rows as $row) {
+            $metric = $row['metric'];
+            if (!isset(Metrics::HISTOGRAMS[$metric])) {
+                continue; // dropped from the definitions
+            }
+            $histogram = &$snapshot['histograms'][$metric][$row['route']];
+            $histogram ??= [
+                'buckets' => array_fill(0, count(Metrics::HISTOGRAMS[$metric]) + 1, 0),
+                'sum' => 0.0,
+                'count' => 0,
+            ];
+            if (isset($histogram['buckets'][$row['bucket']])) {
+                $histogram['buckets'][$row['bucket']] = (int) $row['count'];
+                $histogram['count'] += (int) $row['count'];
+            }
+            unset($histogram);
+        }
+
+        foreach ($this->db->query('SELECT metric, route, sum FROM metric_sums') as $row) {
+            if (isset($snapshot['histograms'][$row['metric']][$row['route']])) {
+                $snapshot['histograms'][$row['metric']][$row['route']]['sum'] = (float) $row['sum'];
+            }
+        }
+
+        return $snapshot;
+    }
+}
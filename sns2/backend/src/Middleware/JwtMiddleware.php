@@ -4,6 +4,7 @@ declare(strict_types=1);
 
 namespace App\Middleware;
 
+use App\Logging\RequestContext;
 use Firebase\JWT\JWT;
 use Firebase\JWT\Key;
 use Psr\Http\Message\ResponseInterface as Response;
@@ -38,6 +39,7 @@ class JwtMiddleware implements MiddlewareInterface
             // Add user info to request attributes
             $request = $request->withAttribute('user_id', $decoded->sub);
             $request = $request->withAttribute('user', $decoded);
+            RequestContext::setUserId((int) $decoded->sub);
 
             return $handler->handle($request);
         } catch (\Exception $e) {
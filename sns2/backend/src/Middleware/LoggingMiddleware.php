@@ -4,55 +4,143 @@ declare(strict_types=1);
 
 namespace App\Middleware;
 
+use App\Logging\AfterResponse;
+use App\Logging\QueryStats;
+use App\Logging\RequestContext;
+use App\Logging\RequestLogger;
+use App\Metrics\Metrics;
+use App\Metrics\MetricsStore;
 use Psr\Http\Message\ResponseInterface as Response;
 use Psr\Http\Message\ServerRequestInterface as Request;
 use Psr\Http\Server\MiddlewareInterface;
 use Psr\Http\Server\RequestHandlerInterface as RequestHandler;
+use Slim\Routing\RouteContext;
 
+/**
+ * Logging Middleware
+ *
+ * ルートごとの処理時間・クエリ数・DB時間をヒストグラムに記録し（全リクエスト、レスポンス送信後）、
+ * サンプリングしたリクエストを JSON Lines でログに残す（5xx と遅いリクエストは常に記録）
+ * リクエストボディは REQUEST_LOG_BODY_ROUTES に一致するルートだけ、マスクして記録する
+ * ルート名を得るためルーティングミドルウェアより内側、ボディを読むためボディパーサーより内側に登録すること
+ */
 class LoggingMiddleware implements MiddlewareInterface
 {
+    private const MASKED_KEYS = ['password', 'token', 'secret'];
+
+    private ?RequestLogger $logger;
+    private ?MetricsStore $metrics;
+    private float $sampleRate;
+    private float $slowMilliseconds;
+    /** @var string[] */
+    private array $bodyRoutes;
+
+    /**
+     * @param float|null $sampleRate 記録するリクエストの割合 (0..1)
+     * @param float|null $slowMilliseconds これ以上かかったリクエストはサンプリングに関係なく記録
+     * @param string[]|null $bodyRoutes ボディを記録するルート（"POST /api/auth/*" のような fnmatch パターン）
+     */
+    public function __construct(
+        ?RequestLogger $logger = null,
+        ?MetricsStore $metrics = null,
+        ?float $sampleRate = null,
+        ?float $slowMilliseconds = null,
+        ?array $bodyRoutes = null
+    ) {
+        $this->logger = $logger ?? RequestLogger::default();
+        $this->metrics = $metrics; // resolved after the response, so opening the store is off the latency path
+        $this->sampleRate = $sampleRate ?? (float) ($_ENV['REQUEST_LOG_SAMPLE'] ?? 1.0);
+        $this->slowMilliseconds = $slowMilliseconds ?? (float) ($_ENV['REQUEST_LOG_SLOW_MS'] ?? 1000);
+        $this->bodyRoutes = $bodyRoutes ?? array_filter(array_map('trim', explode(',', $_ENV['REQUEST_LOG_BODY_ROUTES'] ?? '')));
+    }
+
     public function process(Request $request, RequestHandler $handler): Response
     {
-        // Process the request first to ensure we have auth info if available
-        // Note: In Slim/PSR-15, if we want to log AFTER handling (to get response status), we do this:
+        QueryStats::reset();
+        RequestContext::reset();
+        $started = hrtime(true);
+
         $response = $handler->handle($request);
 
-        // Get user info from attribute (set by JwtMiddleware)
-        $userId = $request->getAttribute('user_id');
-        $userStr = $userId ? "User ID: {$userId}" : "Guest";
+        $milliseconds = (hrtime(true) - $started) / 1e6;
+        $status = $response->getStatusCode();
+        $route = self::routeName($request);
 
-        // Get request body
-        $body = $request->getParsedBody();
-        // Mask passwords
-        if (is_array($body)) {
-            array_walk_recursive($body, function (&$value, $key) {
-                if (stripos($key, 'password') !== false) {
-                    $value = '********';
-                }
+        if ($route !== 'GET /metrics') {
+            $observations = [
+                'http_request_duration_seconds' => $milliseconds / 1000,
+                'db_query_duration_seconds' => QueryStats::milliseconds() / 1000,
+                'db_queries_per_request' => QueryStats::count(),
+            ];
+            // A failing store must not turn a good response into a 500; AfterResponse logs and drops errors
+            AfterResponse::defer(function () use ($route, $status, $observations) {
+                ($this->metrics ?? Metrics::defaultStore())?->observe($route, $status, $observations);
             });
-            $bodyStr = json_encode($body, JSON_UNESCAPED_UNICODE);
-        } else {
-            $bodyStr = '(Body not parsable or empty)';
         }
 
-        $method = $request->getMethod();
-        $uri = (string) $request->getUri();
-        $status = $response->getStatusCode();
-        $timestamp = date('Y-m-d H:i:s');
+        if ($this->logger === null) {
+            return $response;
+        }
 
-        // Log to stdout
-        $logMessage = sprintf(
-            "[%s] %s %s (%s) - Status: %d - Body: %s" . PHP_EOL,
-            $timestamp,
-            $method,
-            $uri,
-            $userStr,
-            $status,
-            $bodyStr
-        );
+        // Sampled lines are an unbiased subset; forced ones (errors, slow) are extra and flagged
+        $sampled = $this->sampleRate >= 1 || mt_rand() / mt_getrandmax() < $this->sampleRate;
+        if (!$sampled && $status < 500 && $milliseconds < $this->slowMilliseconds) {
+            return $response;
+        }
 
-        file_put_contents('php://stdout', $logMessage);
+        $entry = [
+            'ts' => date('c'),
+            'method' => $request->getMethod(),
+            'route' => $route,
+            'path' => $request->getUri()->getPath(),
+            'status' => $status,
+            'user_id' => RequestContext::userId(),
+            'duration_ms' => round($milliseconds, 2),
+            'db_queries' => QueryStats::count(),
+            'db_ms' => round(QueryStats::milliseconds(), 2),
+            'sampled' => $sampled,
+            'sample_rate' => $this->sampleRate,
+        ];
+        if ($this->logsBody($route)) {
+            $entry['body'] = self::mask($request->getParsedBody());
+        }
+        $this->logger->write($entry);
 
         return $response;
     }
+
+    /**
+     * "GET /api/feeds/{id}" — the route pattern, so ids do not split the histograms
+     */
+    private static function routeName(Request $request): string
+    {
+        $route = $request->getAttribute(RouteContext::ROUTE);
+        return $request->getMethod() . ' ' . ($route ? $route->getPattern() : 'unmatched');
+    }
+
+    private function logsBody(string $route): bool
+    {
+        foreach ($this->bodyRoutes as $pattern) {
+            if (fnmatch($pattern, $route)) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    private static function mask(mixed $body): mixed
+    {
+        if (!is_array($body)) {
+            return null;
+        }
+        array_walk_recursive($body, function (&$value, $key) {
+            foreach (self::MASKED_KEYS as $masked) {
+                if (stripos((string) $key, $masked) !== false) {
+                    $value = '********';
+                    return;
+                }
+            }
+        });
+        return $body;
+    }
 }
@@ -8,35 +8,65 @@ use Psr\Http\Message\ResponseInterface;
 use Psr\Http\Message\ServerRequestInterface;
 use Psr\Http\Server\MiddlewareInterface;
 use Psr\Http\Server\RequestHandlerInterface;
+use App\RateLimit\ApcuRateLimitStore;
+use App\RateLimit\RateLimitStore;
+use App\RateLimit\SqliteRateLimitStore;
 use Slim\Psr7\Response;
 
 /**
  * Rate Limiting Middleware
  * 
  * IPアドレスベースのレート制限を実装
- * SQLiteベースのシンプルな実装（本番ではRedis推奨）
+ * GCRA（トークンバケット相当）で、判定と消費はストアへの1回のアトミック操作
+ * ストアは RATE_LIMIT_STORE で切替: sqlite（デフォルト, WAL） / apcu
+ * $cost を渡すとリクエストごとの重み（バッチの件数など）で消費する
  */
 class RateLimitMiddleware implements MiddlewareInterface
 {
-    private string $storageFile;
+    private static ?RateLimitStore $defaultStore = null;
+
+    private RateLimitStore $store;
     private int $maxRequests;
     private int $windowSeconds;
     private string $identifier;
+    /** @var (\Closure(ServerRequestInterface): int)|null */
+    private ?\Closure $cost;
 
     /**
      * @param int $maxRequests ウィンドウ内の最大リクエスト数
      * @param int $windowSeconds 時間ウィンドウ（秒）
      * @param string $identifier レート制限の識別子（エンドポイントグループ名）
+     * @param RateLimitStore|null $store 省略時は環境変数で選んだ共有ストア
+     * @param \Closure|null $cost リクエストの重みを返す関数（省略時は1リクエスト=1）。$maxRequests 以下に収めること
      */
     public function __construct(
         int $maxRequests = 60,
         int $windowSeconds = 60,
-        string $identifier = 'default'
+        string $identifier = 'default',
+        ?RateLimitStore $store = null,
+        ?\Closure $cost = null
     ) {
         $this->maxRequests = $maxRequests;
         $this->windowSeconds = $windowSeconds;
         $this->identifier = $identifier;
-        $this->storageFile = __DIR__ . '/../../database/rate_limits.json';
+        $this->store = $store ?? self::defaultStore();
+        $this->cost = $cost;
+    }
+
+    /**
+     * One store (and one SQLite connection) per process, shared by every route group
+     */
+    public static function defaultStore(): RateLimitStore
+    {
+        if (self::$defaultStore === null) {
+            self::$defaultStore = match ($_ENV['RATE_LIMIT_STORE'] ?? 'sqlite') {
+                'apcu' => new ApcuRateLimitStore(),
+                default => new SqliteRateLimitStore(
+                    __DIR__ . '/../../' . ($_ENV['RATE_LIMIT_DATABASE'] ?? 'database/rate_limits.sqlite')
+                ),
+            };
+        }
+        return self::$defaultStore;
     }
 
     public function process(ServerRequestInterface $request, RequestHandlerInterface $handler): ResponseInterface
@@ -44,65 +74,37 @@ class RateLimitMiddleware implements MiddlewareInterface
         $clientIp = $this->getClientIp($request);
         $key = $this->identifier . ':' . $clientIp;
 
-        $rateLimitData = $this->getRateLimitData();
-        $now = time();
-
-        // Clean expired entries
-        $rateLimitData = $this->cleanExpired($rateLimitData, $now);
-
-        // Get or initialize client's request count
-        if (!isset($rateLimitData[$key])) {
-            $rateLimitData[$key] = [
-                'count' => 0,
-                'window_start' => $now,
-            ];
-        }
-
-        $clientData = $rateLimitData[$key];
-
-        // Check if window has expired
-        if (($now - $clientData['window_start']) >= $this->windowSeconds) {
-            $clientData = [
-                'count' => 0,
-                'window_start' => $now,
-            ];
-        }
+        // A cost above the limit could never be admitted, so it is capped there
+        $cost = $this->cost ? min($this->maxRequests, max(1, ($this->cost)($request))) : 1;
+        $result = $this->store->hit($key, $this->maxRequests, $this->windowSeconds, $cost);
 
         // Check rate limit
-        if ($clientData['count'] >= $this->maxRequests) {
-            $retryAfter = $this->windowSeconds - ($now - $clientData['window_start']);
-
+        if (!$result->allowed) {
             $response = new Response(429);
             $response = $response
                 ->withHeader('Content-Type', 'application/json')
                 ->withHeader('X-RateLimit-Limit', (string) $this->maxRequests)
                 ->withHeader('X-RateLimit-Remaining', '0')
-                ->withHeader('X-RateLimit-Reset', (string) ($clientData['window_start'] + $this->windowSeconds))
-                ->withHeader('Retry-After', (string) $retryAfter);
+                ->withHeader('X-RateLimit-Reset', (string) $result->resetAt)
+                ->withHeader('Retry-After', (string) $result->retryAfter);
 
             $response->getBody()->write(json_encode([
                 'error' => 'Rate limit exceeded',
                 'message' => 'リクエストが多すぎます。しばらくお待ちください。',
-                'retry_after' => $retryAfter,
+                'retry_after' => $result->retryAfter,
             ]));
 
             return $response;
         }
 
-        // Increment request count
-        $clientData['count']++;
-        $rateLimitData[$key] = $clientData;
-        $this->saveRateLimitData($rateLimitData);
-
         // Process request
         $response = $handler->handle($request);
 
         // Add rate limit headers
-        $remaining = $this->maxRequests - $clientData['count'];
         return $response
             ->withHeader('X-RateLimit-Limit', (string) $this->maxRequests)
-            ->withHeader('X-RateLimit-Remaining', (string) max(0, $remaining))
-            ->withHeader('X-RateLimit-Reset', (string) ($clientData['window_start'] + $this->windowSeconds));
+            ->withHeader('X-RateLimit-Remaining', (string) $result->remaining)
+            ->withHeader('X-RateLimit-Reset', (string) $result->resetAt);
     }
 
     private function getClientIp(ServerRequestInterface $request): string
@@ -120,55 +122,4 @@ class RateLimitMiddleware implements MiddlewareInterface
 
         return $serverParams['REMOTE_ADDR'] ?? '127.0.0.1';
     }
-
-    private function getRateLimitData(): array
-    {
-        if (!file_exists($this->storageFile)) {
-            return [];
-        }
-
-        // Use file locking to prevent race conditions
-        $handle = fopen($this->storageFile, 'r');
-        if ($handle === false) {
-            return [];
-        }
-
-        flock($handle, LOCK_SH); // Shared lock for reading
-        $content = stream_get_contents($handle);
-        flock($handle, LOCK_UN);
-        fclose($handle);
-
-        return json_decode($content, true) ?? [];
-    }
-
-    private function saveRateLimitData(array $data): void
-    {
-        $dir = dirname($this->storageFile);
-        if (!is_dir($dir)) {
-            mkdir($dir, 0755, true);
-        }
-
-        // Use file locking to prevent race conditions
-        $handle = fopen($this->storageFile, 'c'); // Open for writing, create if not exists
-        if ($handle === false) {
-            return;
-        }
-
-        flock($handle, LOCK_EX); // Exclusive lock for writing
-        ftruncate($handle, 0);
-        fwrite($handle, json_encode($data));
-        fflush($handle);
-        flock($handle, LOCK_UN);
-        fclose($handle);
-    }
-
-    private function cleanExpired(array $data, int $now): array
-    {
-        foreach ($data as $key => $value) {
-            if (($now - $value['window_start']) >= $this->windowSeconds * 2) {
-                unset($data[$key]);
-            }
-        }
-        return $data;
-    }
 }
@@ -0,0 +1,160 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Middleware;
+
+use App\Cache\ResponseCache;
+use App\Models\Reaction;
+use Psr\Http\Message\ResponseInterface;
+use Psr\Http\Message\ServerRequestInterface;
+use Psr\Http\Server\MiddlewareInterface;
+use Psr\Http\Server\RequestHandlerInterface;
+use Slim\Psr7\Response;
+
+/**
+ * Response Cache Middleware
+ *
+ * 一覧API (GET /feeds, /blogs, /qa) のレスポンスをキャッシュし、ETag / If-None-Match で 304 を返す
+ * ユーザーごとに異なる user_reactions はキャッシュから外し、返す直前に1クエリで埋め直す
+ * それ以外の書き込みリクエストが成功したらコンテンツバージョンを進めてキャッシュを無効化する
+ * RESPONSE_CACHE=off で無効
+ */
+class ResponseCacheMiddleware implements MiddlewareInterface
+{
+    private static ?ResponseCache $defaultCache = null;
+
+    private ?ResponseCache $cache;
+
+    /**
+     * @param string[] $cachedPaths キャッシュするGETのパス
+     * @param string[] $ignoredPaths 成功してもバージョンを進めない書き込みのパス接頭辞
+     */
+    public function __construct(
+        private array $cachedPaths = ['/api/feeds', '/api/blogs', '/api/qa'],
+        private array $ignoredPaths = ['/api/upload'],
+        ?ResponseCache $cache = null
+    ) {
+        $this->cache = $cache;
+    }
+
+    public static function defaultCache(): ?ResponseCache
+    {
+        if (($_ENV['RESPONSE_CACHE'] ?? 'on') === 'off') {
+            return null;
+        }
+        if (self::$defaultCache === null) {
+            self::$defaultCache = new ResponseCache(
+                __DIR__ . '/../../' . ($_ENV['RESPONSE_CACHE_DATABASE'] ?? 'database/response_cache.sqlite'),
+                (int) ($_ENV['RESPONSE_CACHE_TTL'] ?? 60),
+                (int) ($_ENV['RESPONSE_CACHE_MAX_ENTRIES'] ?? 1000)
+            );
+        }
+        return self::$defaultCache;
+    }
+
+    public function process(ServerRequestInterface $request, RequestHandlerInterface $handler): ResponseInterface
+    {
+        $path = $request->getUri()->getPath();
+        $isGet = $request->getMethod() === 'GET';
+
+        // The cache file is only opened by requests that read or invalidate it
+        if (($isGet && !in_array($path, $this->cachedPaths, true)) || (!$isGet && $this->isIgnored($path))) {
+            return $handler->handle($request);
+        }
+        $cache = $this->cache ??= self::defaultCache();
+        if ($cache === null) {
+            return $handler->handle($request);
+        }
+
+        if (!$isGet) {
+            $response = $handler->handle($request);
+            if ($response->getStatusCode() < 400) {
+                // After the handler, so the write is committed before readers can re-cache
+                $cache->bumpVersion();
+            }
+            return $response;
+        }
+
+        $userId = $request->getAttribute('user_id');
+        $version = $cache->version();
+        $key = $this->cacheKey($path, $request->getQueryParams());
+
+        // Reaction writes bump the version, so version + viewer identifies the viewer's payload.
+        // The TTL epoch bounds how long writes made outside the app (scripts) keep producing 304s.
+        $etag = 'W/"' . substr(sha1($version . '|' . $cache->epoch() . '|' . $key . '|' . $userId), 0, 20) . '"';
+        if (in_array($etag, array_map('trim', explode(',', $request->getHeaderLine('If-None-Match'))), true)) {
+            return $this->withCacheHeaders(new Response(304), $etag);
+        }
+
+        $shared = $cache->get($key, $version);
+        if ($shared !== null) {
+            $payload = $this->withUserReactions($shared, $userId);
+            $response = new Response(200);
+            $response->getBody()->write(json_encode($payload, JSON_UNESCAPED_UNICODE));
+            return $this->withCacheHeaders($response, $etag)
+                ->withHeader('Content-Type', 'application/json')
+                ->withHeader('X-Cache', 'HIT');
+        }
+
+        $response = $handler->handle($request);
+        if ($response->getStatusCode() !== 200) {
+            return $response;
+        }
+
+        $payload = json_decode((string) $response->getBody(), true);
+        if (is_array($payload) && isset($payload['data']) && is_array($payload['data'])) {
+            $cache->put($key, $version, $this->withoutUserReactions($payload));
+        }
+
+        return $this->withCacheHeaders($response, $etag)->withHeader('X-Cache', 'MISS');
+    }
+
+    private function cacheKey(string $path, array $query): string
+    {
+        ksort($query);
+        return $path . '?' . http_build_query($query);
+    }
+
+    private function isIgnored(string $path): bool
+    {
+        foreach ($this->ignoredPaths as $prefix) {
+            if (str_starts_with($path, $prefix)) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    private function withoutUserReactions(array $payload): array
+    {
+        foreach ($payload['data'] as &$item) {
+            unset($item['user_reactions']);
+        }
+        return $payload;
+    }
+
+    /**
+     * The viewer's own reactions for every post on the page, in one indexed query
+     */
+    private function withUserReactions(array $payload, mixed $userId): array
+    {
+        $ids = array_column($payload['data'], 'id');
+        $mine = $userId && $ids
+            ? Reaction::where('user_id', $userId)->whereIn('post_id', $ids)->get(['post_id', 'emoji'])->groupBy('post_id')
+            : collect();
+
+        foreach ($payload['data'] as &$item) {
+            $item['user_reactions'] = isset($mine[$item['id']]) ? $mine[$item['id']]->pluck('emoji')->values()->all() : [];
+        }
+        return $payload;
+    }
+
+    private function withCacheHeaders(ResponseInterface $response, string $etag): ResponseInterface
+    {
+        return $response
+            ->withHeader('ETag', $etag)
+            ->withHeader('Cache-Control', 'private, no-cache')
+            ->withHeader('Vary', 'Authorization');
+    }
+}
@@ -4,6 +4,7 @@ declare(strict_types=1);
 
 namespace App\Models;
 
+use App\Search\SearchIndex;
 use Illuminate\Database\Eloquent\Model;
 use Illuminate\Database\Eloquent\Relations\BelongsTo;
 use Illuminate\Database\Eloquent\Relations\HasMany;
@@ -34,6 +35,20 @@ class Post extends Model
         'updated_at' => 'datetime',
     ];
 
+    protected static function booted(): void
+    {
+        // Keep the search index in step with the text of each post
+        static::saved(function (Post $post) {
+            if ($post->wasRecentlyCreated || $post->wasChanged(['title', 'content_short', 'content_long'])) {
+                SearchIndex::index($post);
+            }
+        });
+
+        static::deleted(function (Post $post) {
+            SearchIndex::remove([$post->id]);
+        });
+    }
+
     // Relationships
 
     public function user(): BelongsTo
@@ -61,6 +76,11 @@ class Post extends Model
         return $this->hasMany(Reaction::class);
     }
 
+    public function reactionCounts(): HasMany
+    {
+        return $this->hasMany(PostReactionCount::class);
+    }
+
     public function quotesAsSource(): HasMany
     {
         return $this->hasMany(Quote::class, 'source_post_id');
@@ -71,6 +91,19 @@ class Post extends Model
         return $this->hasMany(Quote::class, 'quoting_post_id');
     }
 
+    /**
+     * Eager loads for listing reactions: the per-emoji totals, and `reactions`
+     * narrowed to the viewer's own rows (one indexed lookup for the whole page).
+     * $path prefixes nested relations, e.g. 'answers.'.
+     */
+    public static function reactionRelations(?int $viewerId, string $path = ''): array
+    {
+        return [
+            $path . 'reactionCounts',
+            $path . 'reactions' => fn($query) => $query->where('user_id', $viewerId),
+        ];
+    }
+
     // Scopes
 
     public function scopeFeed(Builder $query): Builder
@@ -93,14 +126,48 @@ class Post extends Model
         return $query->orderBy('created_at', 'desc');
     }
 
+    /**
+     * Keyset pagination: posts strictly older than (created_at, id), newest first.
+     * Served by the (type, created_at) index, so the cost does not grow with depth.
+     */
+    public function scopeBefore(Builder $query, ?string $createdAt, ?int $id): Builder
+    {
+        if ($createdAt !== null) {
+            $query->where(function (Builder $q) use ($createdAt, $id) {
+                $q->where('created_at', '<', $createdAt)
+                    ->orWhere(function (Builder $q) use ($createdAt, $id) {
+                        $q->where('created_at', $createdAt)->where('id', '<', $id);
+                    });
+            });
+        }
+
+        return $query->orderBy('created_at', 'desc')->orderBy('id', 'desc');
+    }
+
+    /**
+     * Keyset pagination the other way: posts strictly newer than (created_at, id), oldest first.
+     * Used for answer threads, which read in the order they were written.
+     */
+    public function scopeAfter(Builder $query, ?string $createdAt, ?int $id): Builder
+    {
+        if ($createdAt !== null) {
+            $query->where(function (Builder $q) use ($createdAt, $id) {
+                $q->where('created_at', '>', $createdAt)
+                    ->orWhere(function (Builder $q) use ($createdAt, $id) {
+                        $q->where('created_at', $createdAt)->where('id', '>', $id);
+                    });
+            });
+        }
+
+        return $query->orderBy('created_at')->orderBy('id');
+    }
+
     // Accessors
 
     public function getReactionCountsAttribute(): array
     {
-        return $this->reactions()
-            ->selectRaw('emoji, COUNT(*) as count')
-            ->groupBy('emoji')
-            ->pluck('count', 'emoji')
-            ->toArray();
+        $counts = $this->relationLoaded('reactionCounts') ? $this->reactionCounts : $this->reactionCounts()->get();
+
+        return $counts->pluck('reaction_count', 'emoji')->toArray();
     }
 }
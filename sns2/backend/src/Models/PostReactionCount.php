@@ -0,0 +1,84 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Database\Eloquent\Relations\BelongsTo;
+use Illuminate\Database\Query\Expression;
+
+/**
+ * Per-post, per-emoji reaction totals, updated in the same transaction as the
+ * reaction row so listings never have to count reactions.
+ * database/rebuild_reaction_counts.php recomputes them if they ever drift.
+ */
+class PostReactionCount extends Model
+{
+    public $timestamps = false;
+    public $incrementing = false;
+
+    protected $primaryKey = null;
+
+    protected $fillable = [
+        'post_id',
+        'emoji',
+        'reaction_count',
+    ];
+
+    protected $casts = [
+        'reaction_count' => 'integer',
+    ];
+
+    public static function recordAdded(int $postId, string $emoji): void
+    {
+        static::query()->upsert(
+            [['post_id' => $postId, 'emoji' => $emoji, 'reaction_count' => 1]],
+            ['post_id', 'emoji'],
+            ['reaction_count' => new Expression('reaction_count + 1')]
+        );
+    }
+
+    public static function recordRemoved(int $postId, string $emoji): void
+    {
+        $row = static::query()->where('post_id', $postId)->where('emoji', $emoji);
+        // The column is unsigned; a count already at zero (drift) must not underflow
+        (clone $row)->where('reaction_count', '>', 0)->decrement('reaction_count');
+        // Keep only emojis that are still in use
+        $row->where('reaction_count', '<=', 0)->delete();
+    }
+
+    /**
+     * [['emoji' => '👍', 'count' => 3], ...] for one post, as the reaction endpoints return it
+     */
+    public static function forPost(int $postId): array
+    {
+        return static::query()
+            ->where('post_id', $postId)
+            ->get()
+            ->map(fn($row) => ['emoji' => $row->emoji, 'count' => $row->reaction_count])
+            ->all();
+    }
+
+    /**
+     * forPost() for several posts in one query: [post_id => [['emoji' => ..., 'count' => ...], ...]]
+     * Posts without reactions map to an empty list.
+     */
+    public static function forPosts(array $postIds): array
+    {
+        $counts = array_fill_keys($postIds, []);
+        static::query()
+            ->whereIn('post_id', $postIds)
+            ->get()
+            ->each(function ($row) use (&$counts) {
+                $counts[$row->post_id][] = ['emoji' => $row->emoji, 'count' => $row->reaction_count];
+            });
+
+        return $counts;
+    }
+
+    public function post(): BelongsTo
+    {
+        return $this->belongsTo(Post::class);
+    }
+}
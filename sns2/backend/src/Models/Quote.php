@@ -6,6 +6,7 @@ namespace App\Models;
 
 use Illuminate\Database\Eloquent\Model;
 use Illuminate\Database\Eloquent\Relations\BelongsTo;
+use Illuminate\Support\Carbon;
 
 class Quote extends Model
 {
@@ -25,7 +26,7 @@ class Quote extends Model
         parent::boot();
 
         static::creating(function ($quote) {
-            $quote->created_at = now();
+            $quote->created_at = Carbon::now();
         });
     }
 
@@ -6,6 +6,7 @@ namespace App\Models;
 
 use Illuminate\Database\Eloquent\Model;
 use Illuminate\Database\Eloquent\Relations\BelongsTo;
+use Illuminate\Support\Carbon;
 
 class Reaction extends Model
 {
@@ -26,10 +27,26 @@ class Reaction extends Model
         parent::boot();
 
         static::creating(function ($reaction) {
-            $reaction->created_at = now();
+            $reaction->created_at = Carbon::now();
         });
     }
 
+    /**
+     * The user's reaction row for this emoji. reactions.emoji compares under utf8mb4_unicode_ci on
+     * MySQL, where distinct emoji can be equal, so the byte-identical row wins when there is one;
+     * callers must use the returned row's emoji, not the requested one
+     */
+    public static function findFor(int $userId, int $postId, string $emoji): ?self
+    {
+        $candidates = static::query()
+            ->where('user_id', $userId)
+            ->where('post_id', $postId)
+            ->where('emoji', $emoji)
+            ->get();
+
+        return $candidates->first(fn($reaction) => $reaction->emoji === $emoji) ?? $candidates->first();
+    }
+
     public function user(): BelongsTo
     {
         return $this->belongsTo(User::class);
@@ -0,0 +1,58 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+
+/**
+ * Storage quota ledger: bytes used per user ("user:<id>") and by the whole
+ * server ("total"), moved by each upload instead of summing files on every
+ * request. database/rebuild_storage_usage.php recomputes it if it drifts.
+ */
+class StorageUsage extends Model
+{
+    public const TOTAL = 'total';
+
+    protected $table = 'storage_usage';
+
+    public $timestamps = false;
+    public $incrementing = false;
+
+    protected $primaryKey = 'scope';
+    protected $keyType = 'string';
+
+    protected $fillable = [
+        'scope',
+        'bytes_used',
+    ];
+
+    protected $casts = [
+        'bytes_used' => 'integer',
+    ];
+
+    public static function userScope(int $userId): string
+    {
+        return 'user:' . $userId;
+    }
+
+    public static function used(string $scope): int
+    {
+        return (int) static::query()->whereKey($scope)->value('bytes_used');
+    }
+
+    /**
+     * Adds $bytes to the scope only if it stays within $limit, as one
+     * conditional UPDATE so concurrent uploads cannot overshoot the quota.
+     */
+    public static function reserve(string $scope, int $bytes, int $limit): bool
+    {
+        static::query()->insertOrIgnore(['scope' => $scope, 'bytes_used' => 0]);
+
+        return static::query()
+            ->whereKey($scope)
+            ->where('bytes_used', '<=', $limit - $bytes)
+            ->increment('bytes_used', $bytes) === 1;
+    }
+}
@@ -0,0 +1,102 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Models;
+
+use App\Upload\ImageStore;
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Support\Carbon;
+
+/**
+ * One stored image, keyed by the SHA-256 of the uploaded file. Users who
+ * uploaded it are listed in upload_owners; each is charged for it once.
+ */
+class Upload extends Model
+{
+    public const OWNERS_TABLE = 'upload_owners';
+
+    public $timestamps = false;
+    public $incrementing = false;
+
+    protected $primaryKey = 'content_hash';
+    protected $keyType = 'string';
+
+    protected $fillable = [
+        'content_hash',
+        'extension',
+        'width',
+        'height',
+        'bytes',
+        'has_variants',
+    ];
+
+    protected $casts = [
+        'width' => 'integer',
+        'height' => 'integer',
+        'bytes' => 'integer',
+        'has_variants' => 'boolean',
+        'created_at' => 'datetime',
+    ];
+
+    /**
+     * Inserts the row unless another request stored the same image first.
+     * Returns true only for the request that actually created it.
+     */
+    public static function record(string $hash, array $stored): bool
+    {
+        return static::query()->insertOrIgnore([
+            'content_hash' => $hash,
+            'extension' => $stored['extension'],
+            'width' => $stored['width'],
+            'height' => $stored['height'],
+            'bytes' => $stored['bytes'],
+            'has_variants' => $stored['has_variants'],
+            'created_at' => Carbon::now(),
+        ]) === 1;
+    }
+
+    /**
+     * Records $userId as an owner; true the first time this user uploads the image
+     */
+    public function claim(int $userId): bool
+    {
+        return $this->getConnection()->table(self::OWNERS_TABLE)->insertOrIgnore([
+            'user_id' => $userId,
+            'content_hash' => $this->content_hash,
+            'created_at' => Carbon::now(),
+        ]) === 1;
+    }
+
+    /**
+     * ['url' => ..., 'medium' => ..., 'thumb' => ..., 'width' => ..., 'height' => ...]
+     */
+    public function toImage(string $baseUrl): array
+    {
+        return ImageStore::urls($baseUrl, $this->content_hash, $this->extension, $this->has_variants) + [
+            'width' => $this->width,
+            'height' => $this->height,
+        ];
+    }
+
+    /**
+     * Sized variants for image URLs as stored in post metadata, in one query.
+     * URLs this server did not produce map to themselves at every size.
+     */
+    public static function describeUrls(array $urls): array
+    {
+        $hashes = array_filter(array_map([ImageStore::class, 'hashFromUrl'], $urls));
+        $uploads = $hashes
+            ? static::query()->whereIn('content_hash', array_unique($hashes))->get()->keyBy('content_hash')
+            : collect();
+
+        $images = [];
+        foreach ($urls as $i => $url) {
+            $upload = isset($hashes[$i]) ? $uploads->get($hashes[$i]) : null;
+            $images[] = $upload !== null
+                ? $upload->toImage(substr($url, 0, strrpos($url, '/uploads/')))
+                : ['url' => $url, 'medium' => $url, 'thumb' => $url, 'width' => null, 'height' => null];
+        }
+        return $images;
+    }
+}
@@ -0,0 +1,57 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\RateLimit;
+
+/**
+ * APCu Rate Limit Store
+ *
+ * PHP-FPM / mod_php のワーカー間で共有されるAPCuメモリにTAT（マイクロ秒の整数）を置く。
+ * 更新は apcu_cas による比較交換なので、同時リクエストでも加算が失われない。
+ * 状態はサーバー再起動で消える。CLIで使う場合は apc.enable_cli=1 が必要。
+ */
+class ApcuRateLimitStore implements RateLimitStore
+{
+    private const PREFIX = 'rate_limit:';
+
+    public function __construct()
+    {
+        if (!function_exists('apcu_enabled') || !apcu_enabled()) {
+            throw new \RuntimeException('APCu is not available; use RATE_LIMIT_STORE=sqlite');
+        }
+    }
+
+    public function hit(string $key, int $limit, int $windowSeconds, int $cost = 1): RateLimitResult
+    {
+        $apcuKey = self::PREFIX . $key;
+        $window = $windowSeconds * 1_000_000;
+        $costTime = intdiv($cost * $window, $limit);
+
+        while (true) {
+            $now = (int) (microtime(true) * 1_000_000);
+            $stored = apcu_fetch($apcuKey, $found);
+            $tat = $found ? max((int) $stored, $now) : $now;
+            $allowed = $tat + $costTime - $now <= $window;
+
+            if (!$allowed) {
+                break;
+            }
+
+            $newTat = $tat + $costTime;
+            // No TTL: apcu_cas keeps the creation time, so a TTL would expire busy buckets early.
+            // A stale entry just means a full bucket; APCu's own expunge reclaims the memory.
+            $swapped = $found
+                ? apcu_cas($apcuKey, (int) $stored, $newTat)
+                : apcu_add($apcuKey, $newTat);
+
+            if ($swapped) {
+                $tat = $newTat;
+                break;
+            }
+            // Another worker updated the bucket in between; retry with its value
+        }
+
+        return RateLimitResult::fromTat($allowed, $tat / 1_000_000, $now / 1_000_000, $limit, $windowSeconds, $cost);
+    }
+}
@@ -0,0 +1,37 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\RateLimit;
+
+/**
+ * Rate Limit Result
+ *
+ * GCRA（トークンバケットと等価）の判定結果。
+ * TAT (theoretical arrival time) はバケットが満杯に戻る時刻。
+ */
+final class RateLimitResult
+{
+    public function __construct(
+        public readonly bool $allowed,
+        public readonly int $limit,
+        public readonly int $remaining,
+        public readonly int $resetAt,
+        public readonly int $retryAfter,
+    ) {
+    }
+
+    /**
+     * TAT から結果を組み立てる（時刻はすべて秒）
+     */
+    public static function fromTat(bool $allowed, float $tat, float $now, int $limit, int $windowSeconds, int $cost): self
+    {
+        $interval = $windowSeconds / $limit;
+        $tat = max($tat, $now);
+        // Requests left = unused part of the window, in units of one request's interval
+        $remaining = (int) floor(($windowSeconds - ($tat - $now)) / $interval + 1e-9);
+        $retryAfter = $allowed ? 0 : max(1, (int) ceil($tat + $cost * $interval - $windowSeconds - $now));
+
+        return new self($allowed, $limit, max(0, $remaining), (int) ceil($tat), $retryAfter);
+    }
+}
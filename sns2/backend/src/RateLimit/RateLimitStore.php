@@ -0,0 +1,22 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\RateLimit;
+
+/**
+ * Rate Limit Store
+ *
+ * レート制限の状態を保持するバックエンド。
+ * hit() は「判定と消費」を1回のアトミックな操作で行うこと。
+ */
+interface RateLimitStore
+{
+    /**
+     * $key に $cost 回分のリクエストを記録する
+     *
+     * @param int $limit ウィンドウ内の最大リクエスト数（バースト上限）
+     * @param int $windowSeconds 時間ウィンドウ（秒）
+     */
+    public function hit(string $key, int $limit, int $windowSeconds, int $cost = 1): RateLimitResult;
+}
@@ -0,0 +1,85 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\RateLimit;
+
+use PDO;
+
+/**
+ * SQLite Rate Limit Store
+ *
+ * 専用のSQLiteファイル（WALモード）にキーごとのTAT（マイクロ秒）を1行で保持する。
+ * 判定と更新は1本の UPSERT ... RETURNING で行うため、
+ * 複数プロセスから同時に叩かれてもカウントが欠けない。
+ */
+class SqliteRateLimitStore implements RateLimitStore
+{
+    // Expired rows mean "bucket full" and can go; purge on roughly one hit in this many
+    private const PURGE_EVERY = 500;
+
+    private PDO $db;
+    private \PDOStatement $hitStatement;
+
+    public function __construct(string $path)
+    {
+        $dir = dirname($path);
+        if (!is_dir($dir)) {
+            mkdir($dir, 0755, true);
+        }
+
+        $this->db = new PDO('sqlite:' . $path, null, null, [
+            PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
+            PDO::ATTR_TIMEOUT => 5, // busy timeout while another process holds the write lock
+        ]);
+        $this->db->exec('PRAGMA journal_mode = WAL');
+        $this->db->exec('PRAGMA synchronous = NORMAL');
+        $this->db->exec(
+            'CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                bucket_key TEXT PRIMARY KEY,
+                tat INTEGER NOT NULL,
+                allowed INTEGER NOT NULL
+            ) WITHOUT ROWID'
+        );
+
+        // GCRA in one statement: the bucket may advance only if the request fits in the window.
+        // SET expressions all see the row as it was before this update.
+        $this->hitStatement = $this->db->prepare(
+            'INSERT INTO rate_limit_buckets (bucket_key, tat, allowed)
+             VALUES (:key, CASE WHEN :cost_time <= :window THEN :now + :cost_time ELSE :now END, :cost_time <= :window)
+             ON CONFLICT (bucket_key) DO UPDATE SET
+                tat = CASE WHEN MAX(tat, :now) + :cost_time - :now <= :window THEN MAX(tat, :now) + :cost_time ELSE tat END,
+                allowed = MAX(tat, :now) + :cost_time - :now <= :window
+             RETURNING tat, allowed'
+        );
+    }
+
+    public function hit(string $key, int $limit, int $windowSeconds, int $cost = 1): RateLimitResult
+    {
+        $nowMicros = (int) (microtime(true) * 1_000_000);
+
+        // Integers throughout: PDO binds everything else as text, which SQLite compares as strings
+        $this->hitStatement->bindValue(':key', $key, PDO::PARAM_STR);
+        $this->hitStatement->bindValue(':now', $nowMicros, PDO::PARAM_INT);
+        $this->hitStatement->bindValue(':cost_time', intdiv($cost * $windowSeconds * 1_000_000, $limit), PDO::PARAM_INT);
+        $this->hitStatement->bindValue(':window', $windowSeconds * 1_000_000, PDO::PARAM_INT);
+        $this->hitStatement->execute();
+        $row = $this->hitStatement->fetch(PDO::FETCH_ASSOC);
+        $this->hitStatement->closeCursor();
+
+        if (mt_rand(1, self::PURGE_EVERY) === 1) {
+            $purge = $this->db->prepare('DELETE FROM rate_limit_buckets WHERE tat < :now');
+            $purge->bindValue(':now', $nowMicros, PDO::PARAM_INT);
+            $purge->execute();
+        }
+
+        return RateLimitResult::fromTat(
+            (bool) $row['allowed'],
+            (int) $row['tat'] / 1_000_000,
+            $nowMicros / 1_000_000,
+            $limit,
+            $windowSeconds,
+            $cost
+        );
+    }
+}
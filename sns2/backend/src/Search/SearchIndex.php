@@ -0,0 +1,116 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Search;
+
+use App\Models\Post;
+use Illuminate\Database\Capsule\Manager as Capsule;
+
+/**
+ * Post Search Index
+ *
+ * search_tokens テーブルに (token, post_id, weight) の転置インデックスを持つ。
+ * 投稿の作成・更新・削除時に Post モデルのイベントから差分更新される。
+ * weight はタイトル中の出現を TITLE_WEIGHT 倍した出現回数で、検索順位に使う。
+ */
+class SearchIndex
+{
+    public const TABLE = 'search_tokens';
+    public const TITLE_WEIGHT = 3;
+
+    // Keeps multi-row inserts under SQLite's bound-variable limit (3 columns per row)
+    private const INSERT_CHUNK = 300;
+    // Long queries are cut off rather than joining dozens of posting lists
+    private const MAX_TERMS = 16;
+    // Matches counted exactly; beyond this the total is reported as a lower bound ("1000+")
+    private const MAX_COUNTED = 1000;
+
+    public static function index(Post $post): void
+    {
+        self::indexMany([$post]);
+    }
+
+    /**
+     * 投稿のトークンを入れ替える（既存分は削除してから挿入）
+     */
+    public static function indexMany(iterable $posts): void
+    {
+        $ids = [];
+        $rows = [];
+        foreach ($posts as $post) {
+            $ids[] = $post->id;
+            $weights = Tokenizer::tokenize(($post->content_short ?? '') . "\n" . ($post->content_long ?? ''));
+            foreach (Tokenizer::tokenize($post->title ?? '') as $token => $count) {
+                $weights[$token] = ($weights[$token] ?? 0) + $count * self::TITLE_WEIGHT;
+            }
+            foreach ($weights as $token => $weight) {
+                $rows[] = ['token' => (string) $token, 'post_id' => $post->id, 'weight' => $weight];
+            }
+        }
+
+        if (!$ids) {
+            return;
+        }
+
+        Capsule::connection()->transaction(function () use ($ids, $rows) {
+            Capsule::table(self::TABLE)->whereIn('post_id', $ids)->delete();
+            foreach (array_chunk($rows, self::INSERT_CHUNK) as $chunk) {
+                Capsule::table(self::TABLE)->insert($chunk);
+            }
+        });
+    }
+
+    public static function remove(array $postIds): void
+    {
+        if ($postIds) {
+            Capsule::table(self::TABLE)->whereIn('post_id', $postIds)->delete();
+        }
+    }
+
+    /**
+     * 全ての検索語を含む投稿をスコア順に返す: ['ids' => [...], 'total' => int, 'total_capped' => bool]
+     * total は MAX_COUNTED 件（深いページではそのページ末尾）までの件数で、それを超えると total_capped が true
+     * 索引に載る語が一つもない（記号だけ等）場合は null
+     */
+    public static function search(string $query, int $page, int $perPage): ?array
+    {
+        $terms = array_slice(Tokenizer::queryTerms($query), 0, self::MAX_TERMS);
+        if (!$terms) {
+            return null;
+        }
+
+        // One posting-list scan per term, tagged with the term number, so HAVING can require all of them
+        $parts = [];
+        $bindings = [];
+        foreach ($terms as $i => $term) {
+            if ($term['prefix']) {
+                // Range instead of LIKE so both SQLite and MySQL walk the primary key
+                $parts[] = "SELECT post_id, weight, {$i} AS term FROM " . self::TABLE . " WHERE token >= ? AND token < ?";
+                $bindings[] = $term['token'];
+                $bindings[] = $term['token'] . "\u{10FFFF}";
+            } else {
+                $parts[] = "SELECT post_id, weight, {$i} AS term FROM " . self::TABLE . " WHERE token = ?";
+                $bindings[] = $term['token'];
+            }
+        }
+
+        $matches = 'SELECT post_id, SUM(weight) AS score FROM (' . implode(' UNION ALL ', $parts) . ') hits'
+            . ' GROUP BY post_id HAVING COUNT(DISTINCT term) = ' . count($terms);
+
+        // One aggregation for both the page and the total: fetch ids up to the count limit plus one
+        // and slice the page out in PHP, instead of re-running the aggregation as COUNT(*)
+        $limit = max(self::MAX_COUNTED, $page * $perPage);
+        $rows = Capsule::connection()->select(
+            "{$matches} ORDER BY score DESC, post_id DESC LIMIT ?",
+            [...$bindings, $limit + 1]
+        );
+        $capped = count($rows) > $limit;
+
+        return [
+            'ids' => array_map(fn($row) => (int) $row->post_id, array_slice($rows, ($page - 1) * $perPage, $perPage)),
+            'total' => $capped ? $limit : count($rows),
+            'total_capped' => $capped,
+        ];
+    }
+}
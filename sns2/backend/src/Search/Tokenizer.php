@@ -0,0 +1,82 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Search;
+
+/**
+ * Search Tokenizer
+ *
+ * 日本語（漢字・ひらがな・カタカナ）の連続部分は2文字ずつのバイグラムに、
+ * それ以外の英数字は単語単位に分割する。
+ * 各CJK連続部分の末尾1文字も単独トークンとして持つため、
+ * どの文字も必ずいずれかのトークンの先頭に現れ、1文字検索は前方一致で引ける。
+ */
+class Tokenizer
+{
+    public const MAX_TOKEN_LENGTH = 32;
+
+    private const CJK = '\p{Han}\p{Hiragana}\p{Katakana}ー々〆ヵヶ';
+
+    /**
+     * 文書用: トークン => 出現回数
+     */
+    public static function tokenize(string $text): array
+    {
+        $counts = [];
+        foreach (self::runs($text) as [$run, $isCjk]) {
+            foreach ($isCjk ? self::bigrams($run) : [mb_substr($run, 0, self::MAX_TOKEN_LENGTH)] as $token) {
+                $counts[$token] = ($counts[$token] ?? 0) + 1;
+            }
+        }
+        return $counts;
+    }
+
+    /**
+     * 検索語用: [['token' => string, 'prefix' => bool], ...]
+     *
+     * 2文字以上のCJKはバイグラムの完全一致（全て含む投稿のみヒット）、
+     * 1文字のCJKと英数字の単語は前方一致で照合する。
+     */
+    public static function queryTerms(string $query): array
+    {
+        $terms = [];
+        foreach (self::runs($query) as [$run, $isCjk]) {
+            if ($isCjk && mb_strlen($run) > 1) {
+                for ($i = 0, $n = mb_strlen($run) - 1; $i < $n; $i++) {
+                    $terms[] = ['token' => mb_substr($run, $i, 2), 'prefix' => false];
+                }
+            } else {
+                $terms[] = ['token' => mb_substr($run, 0, self::MAX_TOKEN_LENGTH), 'prefix' => true];
+            }
+        }
+        return array_values(array_unique($terms, SORT_REGULAR));
+    }
+
+    /**
+     * 正規化した上で CJK 連続部分と英数字の単語に分ける: [[文字列, CJKか], ...]
+     */
+    private static function runs(string $text): array
+    {
+        // 投稿は保存時にHTMLエスケープされているので元の文字に戻す
+        $text = html_entity_decode($text, ENT_QUOTES | ENT_HTML5, 'UTF-8');
+        // 半角カナ→全角、全角英数→半角、大文字→小文字
+        $text = mb_strtolower(mb_convert_kana($text, 'KVas', 'UTF-8'), 'UTF-8');
+
+        $cjk = self::CJK;
+        preg_match_all("/([{$cjk}]+)|((?:(?![{$cjk}])[\\p{L}\\p{N}_])+)/u", $text, $matches, PREG_SET_ORDER);
+
+        return array_map(fn($m) => isset($m[2]) ? [$m[2], false] : [$m[1], true], $matches);
+    }
+
+    private static function bigrams(string $run): array
+    {
+        $chars = mb_str_split($run);
+        $tokens = [];
+        for ($i = 0, $n = count($chars) - 1; $i < $n; $i++) {
+            $tokens[] = $chars[$i] . $chars[$i + 1];
+        }
+        $tokens[] = end($chars);
+        return $tokens;
+    }
+}
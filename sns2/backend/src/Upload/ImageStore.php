@@ -0,0 +1,218 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Upload;
+
+/**
+ * Content-Addressed Image Store
+ *
+ * 画像は内容の SHA-256 をファイル名にして uploads/<先頭2文字>/<hash>.<ext> に置く。
+ * 同じ画像は何度アップロードされても1つだけ保存され、URLも変わらないので長期キャッシュできる。
+ * 保存時にメタデータ（EXIF/GPS）を落とし、一覧用の thumb と詳細用の medium を WebP で書き出す。
+ */
+class ImageStore
+{
+    // Longest edge in pixels; thumb covers feed cards at 2x, medium the detail view
+    public const VARIANTS = [
+        'thumb' => ['size' => 480, 'quality' => 75],
+        'medium' => ['size' => 1280, 'quality' => 82],
+    ];
+
+    private const URL_PATTERN = '#/uploads/[0-9a-f]{2}/([0-9a-f]{64})\.(jpg|png|gif|webp)$#';
+
+    public function __construct(private string $rootDir)
+    {
+    }
+
+    public static function hashFile(string $path): string
+    {
+        return hash_file('sha256', $path);
+    }
+
+    /**
+     * Content hash of an uploaded image URL, or null for URLs this store did not produce
+     */
+    public static function hashFromUrl(string $url): ?string
+    {
+        $path = parse_url($url, PHP_URL_PATH);
+        return is_string($path) && preg_match(self::URL_PATTERN, $path, $m) ? $m[1] : null;
+    }
+
+    /**
+     * ['url' => 元画像, 'medium' => ..., 'thumb' => ...]; without variants every size is the original
+     */
+    public static function urls(string $baseUrl, string $hash, string $extension, bool $hasVariants): array
+    {
+        $original = $baseUrl . '/uploads/' . self::relativePath($hash, $extension);
+        $urls = ['url' => $original];
+        foreach (array_keys(self::VARIANTS) as $variant) {
+            $urls[$variant] = $hasVariants
+                ? $baseUrl . '/uploads/' . self::relativePath($hash, 'webp', $variant)
+                : $original;
+        }
+        return $urls;
+    }
+
+    public static function relativePath(string $hash, string $extension, ?string $variant = null): string
+    {
+        return substr($hash, 0, 2) . '/' . $hash . ($variant !== null ? '_' . $variant : '') . '.' . $extension;
+    }
+
+    /**
+     * 一時ファイルの画像をメタデータを落として保存し、派生画像を作る
+     *
+     * Every file is written under a temporary name and renamed into place, so a
+     * concurrent upload of the same image never sees a half-written file.
+     *
+     * @return array{extension: string, width: int, height: int, bytes: int, has_variants: bool}
+     */
+    public function store(string $sourcePath, string $hash, string $mimeType): array
+    {
+        $extension = self::extensionFor($mimeType);
+        $dir = $this->rootDir . '/' . substr($hash, 0, 2);
+        if (!is_dir($dir)) {
+            @mkdir($dir, 0755, true);
+        }
+
+        $image = $this->load($sourcePath, $mimeType);
+        [$width, $height] = $image !== null
+            ? [imagesx($image), imagesy($image)]
+            : array_slice(getimagesize($sourcePath) ?: [0, 0], 0, 2);
+
+        $originalPath = $this->rootDir . '/' . self::relativePath($hash, $extension);
+        // Re-encoding strips EXIF/GPS; without GD the file is kept as uploaded
+        $this->writeAtomically($originalPath, fn(string $tmp) => $image !== null
+            ? $this->encode($image, $tmp, $mimeType)
+            : copy($sourcePath, $tmp));
+        $bytes = filesize($originalPath);
+
+        // GIFs keep their animation by serving the original at every size
+        $hasVariants = $image !== null && $mimeType !== 'image/gif' && function_exists('imagewebp');
+        if ($hasVariants) {
+            foreach (self::VARIANTS as $variant => $spec) {
+                $path = $this->rootDir . '/' . self::relativePath($hash, 'webp', $variant);
+                $resized = $this->fit($image, $spec['size']);
+                $this->writeAtomically($path, fn(string $tmp) => imagewebp($resized, $tmp, $spec['quality']));
+                if ($resized !== $image) {
+                    imagedestroy($resized);
+                }
+                $bytes += filesize($path);
+            }
+        }
+
+        if ($image !== null) {
+            imagedestroy($image);
+        }
+
+        return [
+            'extension' => $extension,
+            'width' => (int) $width,
+            'height' => (int) $height,
+            'bytes' => $bytes,
+            'has_variants' => $hasVariants,
+        ];
+    }
+
+    /**
+     * Removes an image and its variants (used when its upload is rolled back)
+     */
+    public function delete(string $hash, string $extension): void
+    {
+        $paths = [self::relativePath($hash, $extension)];
+        foreach (array_keys(self::VARIANTS) as $variant) {
+            $paths[] = self::relativePath($hash, 'webp', $variant);
+        }
+        foreach ($paths as $path) {
+            if (is_file($this->rootDir . '/' . $path)) {
+                @unlink($this->rootDir . '/' . $path);
+            }
+        }
+    }
+
+    public static function extensionFor(string $mimeType): string
+    {
+        return match ($mimeType) {
+            'image/jpeg' => 'jpg',
+            'image/png' => 'png',
+            'image/gif' => 'gif',
+            'image/webp' => 'webp',
+            default => 'bin',
+        };
+    }
+
+    private function load(string $path, string $mimeType): ?\GdImage
+    {
+        if (!extension_loaded('gd')) {
+            return null;
+        }
+
+        try {
+            $image = match ($mimeType) {
+                'image/jpeg' => @imagecreatefromjpeg($path),
+                'image/png' => @imagecreatefrompng($path),
+                'image/gif' => @imagecreatefromgif($path),
+                // Animated WebP cannot be decoded by GD and is kept as uploaded
+                'image/webp' => function_exists('imagecreatefromwebp') ? @imagecreatefromwebp($path) : false,
+                default => false,
+            };
+        } catch (\Throwable $e) {
+            return null;
+        }
+
+        if ($image === false) {
+            return null;
+        }
+
+        // WebP needs truecolor; GIFs stay palette images so imagegif keeps their colours
+        if ($mimeType !== 'image/gif' && !imageistruecolor($image)) {
+            imagepalettetotruecolor($image);
+        }
+
+        // Preserve transparency through re-encoding and resizing
+        imagealphablending($image, false);
+        imagesavealpha($image, true);
+        return $image;
+    }
+
+    private function encode(\GdImage $image, string $path, string $mimeType): bool
+    {
+        return match ($mimeType) {
+            'image/jpeg' => imagejpeg($image, $path, 90),
+            'image/png' => imagepng($image, $path, 6),
+            'image/gif' => imagegif($image, $path),
+            'image/webp' => imagewebp($image, $path, 90),
+            default => false,
+        };
+    }
+
+    /**
+     * Scales the image down so its longest edge is at most $size (never up)
+     */
+    private function fit(\GdImage $image, int $size): \GdImage
+    {
+        $width = imagesx($image);
+        $height = imagesy($image);
+        $scale = $size / max($width, $height);
+        if ($scale >= 1) {
+            return $image;
+        }
+
+        $newWidth = max(1, (int) round($width * $scale));
+        $newHeight = max(1, (int) round($height * $scale));
+        $resized = imagecreatetruecolor($newWidth, $newHeight);
+        imagealphablending($resized, false);
+        imagesavealpha($resized, true);
+        imagecopyresampled($resized, $image, 0, 0, 0, 0, $newWidth, $newHeight, $width, $height);
+        return $resized;
+    }
+
+    private function writeAtomically(string $path, callable $write): void
+    {
+        $tmp = $path . '.' . bin2hex(random_bytes(4)) . '.tmp';
+        if (!$write($tmp) || !rename($tmp, $path)) {
+            @unlink($tmp);
+            throw new \RuntimeException("Failed to write {$path}");
+        }
+    }
+}
@@ -0,0 +1,12 @@
+<?php
+
+declare(strict_types=1);
+
+namespace App\Upload;
+
+/**
+ * ストレージ容量超過（メッセージはそのままAPIのエラーとして返す）
+ */
+class QuotaExceededException extends \RuntimeException
+{
+}
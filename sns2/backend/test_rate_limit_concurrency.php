@@ -0,0 +1,96 @@
+<?php
+// Stress test: many processes hit one rate-limit key at once; the number of
+// allowed requests must equal the limit exactly (nothing lost, nothing extra).
+// Run: php test_rate_limit_concurrency.php [workers] [hits_per_worker]
+// APCu is tested too when run with: php -d apc.enable_cli=1 ...
+
+declare(strict_types=1);
+
+require __DIR__ . '/vendor/autoload.php';
+
+use App\RateLimit\ApcuRateLimitStore;
+use App\RateLimit\SqliteRateLimitStore;
+
+if (!function_exists('pcntl_fork')) {
+    die("pcntl extension is required\n");
+}
+
+$workers = (int) ($argv[1] ?? 16);
+$hitsPerWorker = (int) ($argv[2] ?? 200);
+$total = $workers * $hitsPerWorker;
+// A long window means no refill during the test, so the expected counts are exact
+$window = 86400;
+
+$sqlitePath = sys_get_temp_dir() . '/rate_limit_stress_' . getmypid() . '.sqlite';
+$stores = ['sqlite' => fn() => new SqliteRateLimitStore($sqlitePath)];
+if (function_exists('apcu_enabled') && apcu_enabled()) {
+    $stores['apcu'] = fn() => new ApcuRateLimitStore();
+}
+
+function runWorkers(callable $makeStore, string $key, int $limit, int $window, int $workers, int $hits): int
+{
+    $files = [];
+    for ($w = 0; $w < $workers; $w++) {
+        $files[$w] = tempnam(sys_get_temp_dir(), 'rl');
+        $pid = pcntl_fork();
+        if ($pid === 0) {
+            $store = $makeStore(); // Each process opens its own connection
+            $allowed = 0;
+            for ($i = 0; $i < $hits; $i++) {
+                $allowed += (int) $store->hit($key, $limit, $window)->allowed;
+            }
+            file_put_contents($files[$w], (string) $allowed);
+            exit(0);
+        }
+    }
+    while (pcntl_wait($status) > 0) {
+    }
+
+    $allowed = 0;
+    foreach ($files as $file) {
+        $allowed += (int) file_get_contents($file);
+        unlink($file);
+    }
+    return $allowed;
+}
+
+echo "=== Rate Limit Concurrency Test ===\n";
+echo "$workers processes x $hitsPerWorker hits = $total requests per case\n\n";
+
+$failed = false;
+foreach ($stores as $name => $makeStore) {
+    $cases = [
+        'over limit' => intdiv($total, 3),  // most requests must be rejected
+        'under limit' => $total + 10,      // every request must be allowed
+    ];
+    foreach ($cases as $label => $limit) {
+        $key = "stress:$label:" . uniqid();
+        $start = microtime(true);
+        $allowed = runWorkers($makeStore, $key, $limit, $window, $workers, $hitsPerWorker);
+        $elapsed = microtime(true) - $start;
+
+        $expected = min($total, $limit);
+        $remaining = $makeStore()->hit($key, $limit, $window)->remaining;
+        $expectedRemaining = max(0, $limit - $total - 1);
+        $ok = $allowed === $expected && $remaining === $expectedRemaining;
+        $failed = $failed || !$ok;
+
+        printf(
+            "[%s] %-5s %-11s allowed %d / expected %d, remaining %d / expected %d, %.0f req/s\n",
+            $ok ? 'PASS' : 'FAIL',
+            $name,
+            $label,
+            $allowed,
+            $expected,
+            $remaining,
+            $expectedRemaining,
+            $total / $elapsed
+        );
+    }
+}
+
+foreach (glob($sqlitePath . '*') as $file) {
+    unlink($file);
+}
+
+exit($failed ? 1 : 0);
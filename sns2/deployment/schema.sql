@@ -66,4 +66,52 @@ CREATE TABLE IF NOT EXISTS `reactions` (
   CONSTRAINT `reactions_post_id_foreign` FOREIGN KEY (`post_id`) REFERENCES `posts` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Reaction Counts Table (per post and emoji; run backend/database/rebuild_reaction_counts.php after import)
+CREATE TABLE IF NOT EXISTS `post_reaction_counts` (
+  `post_id` bigint(20) unsigned NOT NULL,
+  `emoji` varchar(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `reaction_count` int(10) unsigned NOT NULL DEFAULT 0,
+  PRIMARY KEY (`post_id`, `emoji`),
+  CONSTRAINT `post_reaction_counts_post_id_foreign` FOREIGN KEY (`post_id`) REFERENCES `posts` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Search Index Table (CJK bigram / word tokens; run backend/database/rebuild_search_index.php after import)
+CREATE TABLE IF NOT EXISTS `search_tokens` (
+  `token` varchar(32) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+  `post_id` bigint(20) unsigned NOT NULL,
+  `weight` int(10) unsigned NOT NULL,
+  PRIMARY KEY (`token`, `post_id`),
+  KEY `search_tokens_post_id_index` (`post_id`),
+  CONSTRAINT `search_tokens_post_id_foreign` FOREIGN KEY (`post_id`) REFERENCES `posts` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Uploads Table (content-addressed images; one row per stored file)
+CREATE TABLE IF NOT EXISTS `uploads` (
+  `content_hash` char(64) NOT NULL COMMENT 'SHA-256 of the uploaded file',
+  `extension` varchar(8) NOT NULL,
+  `width` int(10) unsigned NOT NULL,
+  `height` int(10) unsigned NOT NULL,
+  `bytes` bigint(20) unsigned NOT NULL COMMENT 'Original + thumb/medium variants on disk',
+  `has_variants` tinyint(1) NOT NULL DEFAULT 0,
+  `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`content_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Upload Owners Table (each user is charged once per image)
+CREATE TABLE IF NOT EXISTS `upload_owners` (
+  `user_id` bigint(20) unsigned NOT NULL,
+  `content_hash` char(64) NOT NULL,
+  `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`, `content_hash`),
+  CONSTRAINT `upload_owners_user_id_foreign` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE,
+  CONSTRAINT `upload_owners_content_hash_foreign` FOREIGN KEY (`content_hash`) REFERENCES `uploads` (`content_hash`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Storage Usage Table (quota ledger: "user:<id>" and "total"; run backend/database/rebuild_storage_usage.php after import)
+CREATE TABLE IF NOT EXISTS `storage_usage` (
+  `scope` varchar(32) NOT NULL,
+  `bytes_used` bigint(20) unsigned NOT NULL DEFAULT 0,
+  PRIMARY KEY (`scope`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 SET foreign_key_checks = 1;
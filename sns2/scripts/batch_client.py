@@ -0,0 +1,209 @@
+"""Client for sns2's batch write endpoints.
+
+POST /api/batch/posts and POST /api/batch/reactions take up to 100 items per
+request and apply them in one transaction. This client splits any number of
+items into such requests over one keep-alive connection, waits out 429s
+(batch items are rate limited per item, 300 a minute by default) and returns
+one result per input item, with `index` pointing into the input:
+
+    client = BatchClient("http://localhost:8080/api")
+    client.login("test@example.com", "password123")
+    results = client.create_posts([{"type": "feed", "content": "hello"}, ...])
+    ids = [r["data"]["id"] for r in results if r["status"] == 201]
+    client.react([{"post_id": i, "emoji": "👍"} for i in ids])           # toggles
+
+From the command line, with one JSON item per line:
+
+    python batch_client.py posts items.jsonl --email test@example.com --password password123
+    python batch_client.py reactions reactions.jsonl --token $TOKEN --out results.jsonl
+
+`atomic=True` makes each request all-or-nothing; a batch split over several
+requests is only atomic per chunk. A chunk is resent on a new connection only
+if it never reached the server; if the connection drops after it was sent,
+the error is raised rather than risking applying the chunk twice.
+Standard library only.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import select
+import sys
+import time
+from urllib.parse import urlsplit
+
+MAX_ITEMS = 100  # BatchController::MAX_ITEMS
+DEFAULT_API = "http://localhost:8080/api"
+
+
+class BatchError(Exception):
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+
+
+class BatchClient:
+    def __init__(self, base_url=DEFAULT_API, token=None, chunk_size=MAX_ITEMS, timeout=30.0, max_wait=120.0):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+        self.chunk_size = min(chunk_size, MAX_ITEMS)
+        self.timeout = timeout
+        self.max_wait = max_wait  # total seconds to spend waiting on 429s before giving up
+        self._conn = None
+        self._used = False
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def login(self, email, password):
+        status, _, body = self._request("/auth/login", {"email": email, "password": password})
+        if status != 200:
+            raise BatchError(status, body)
+        self.token = json.loads(body)["token"]
+        return self.token
+
+    def create_posts(self, items, atomic=False):
+        """Items like {"type": "feed"|"blog"|"qa", "content": ..., "title": ..., "image_urls": [...]}."""
+        return list(self.iter_results("/batch/posts", items, atomic))
+
+    def react(self, items, atomic=False):
+        """Items like {"post_id": 1, "emoji": "👍", "action": "toggle"|"add"|"remove"}."""
+        return list(self.iter_results("/batch/reactions", items, atomic))
+
+    def iter_results(self, path, items, atomic=False):
+        """Streams results chunk by chunk, so a large item file never has to fit in memory."""
+        items = iter(items)
+        offset = 0
+        while True:
+            chunk = list(itertools.islice(items, self.chunk_size))
+            if not chunk:
+                return
+            for result in self._send_chunk(path, chunk, atomic):
+                result["index"] += offset
+                yield result
+            offset += len(chunk)
+
+    def _send_chunk(self, path, chunk, atomic):
+        waited = 0.0
+        while True:
+            status, headers, body = self._request(path, {"items": chunk, "atomic": atomic})
+            if status == 429:
+                delay = float(headers.get("retry-after") or 1)
+                if waited + delay > self.max_wait:
+                    raise BatchError(status, body)
+                time.sleep(delay)
+                waited += delay
+                continue
+            # 422 is an atomic chunk that was rolled back; its results say which item failed
+            if status not in (200, 422):
+                raise BatchError(status, body)
+            return json.loads(body)["results"]
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self._conn = cls(self.host, self.port, timeout=self.timeout)
+        self._used = False
+
+    def _dropped(self):
+        """True if the server closed the idle connection (readable with nothing pending means EOF)."""
+        sock = self._conn.sock
+        if sock is None:
+            return True
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable)
+
+    def _request(self, path, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        for attempt in range(2):
+            if self._conn is not None and self._dropped():
+                self.close()
+            if self._conn is None:
+                self._connect()
+            reused = self._used
+            try:
+                self._conn.request("POST", self.prefix + path, body=body, headers=headers)
+            except (ConnectionResetError, BrokenPipeError):
+                # Nothing reached the server, so sending again cannot apply the batch twice
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            try:
+                response = self._conn.getresponse()
+                data = response.read().decode("utf-8", "replace")
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The batch was sent and may have been applied; resending could duplicate it
+                self.close()
+                raise
+            self._used = True
+            if response.will_close:
+                self.close()
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+
+
+def read_items(path):
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send posts or reactions to sns2's batch endpoints")
+    parser.add_argument("kind", choices=["posts", "reactions"])
+    parser.add_argument("items", help="JSON Lines file with one item per line ('-' for stdin)")
+    parser.add_argument("--api", default=DEFAULT_API, help=f"API base URL (default: {DEFAULT_API})")
+    parser.add_argument("--token", help="Bearer token (or use --email/--password)")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--chunk-size", type=int, default=MAX_ITEMS)
+    parser.add_argument("--atomic", action="store_true", help="All-or-nothing per chunk")
+    parser.add_argument("--out", help="Write one result per line to this file")
+    args = parser.parse_args()
+
+    with BatchClient(args.api, token=args.token, chunk_size=args.chunk_size) as client:
+        if not args.token:
+            if not (args.email and args.password):
+                raise SystemExit("pass --token, or --email and --password")
+            client.login(args.email, args.password)
+
+        out = open(args.out, "w", encoding="utf-8") if args.out else None
+        started = time.perf_counter()
+        counts = {}
+        try:
+            for result in client.iter_results(f"/batch/{args.kind}", read_items(args.items), args.atomic):
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                if out:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        finally:
+            if out:
+                out.close()
+
+    total = sum(counts.values())
+    by_status = ", ".join(f"{status}: {n:,}" for status, n in sorted(counts.items()))
+    print(f"{total:,} items in {time.perf_counter() - started:.1f}s ({by_status})")
+    if any(status >= 400 for status in counts):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Release build of the sns2 frontend into sns2/deployment/.
+
+Takes the Vite output (frontend/dist after `npm run build`) and prepares it
+for a shared host that cannot compress on the fly:
+
+* every file under assets/ gets a content-hash name. Vite's own hashed
+  chunk names (`HomeView-_yYW9i5Y.js`) already are one and are kept; other
+  files become `name.<sha256[:10]>.ext`, and references to them in
+  index.html and the other assets are rewritten;
+* brotli (.br) and gzip (.gz) variants are written next to each
+  compressible file, index.html included, when they save at least 10%;
+* `.htaccess` serves those variants by Accept-Encoding, marks assets/ as
+  immutable for a year and keeps index.html revalidated on every load;
+* the assets of the previous release are kept for one more release, so
+  open tabs can still lazy-load the chunks their old index.html points at;
+* a size report compares raw / gzip / brotli sizes per asset and for the
+  initial load (what index.html pulls in) with the previous release.
+
+    cd frontend && npm run build && cd ..
+    python scripts/build_release.py
+    python scripts/build_release.py --dist path/to/dist --report-json sizes.json
+
+Brotli needs `pip install brotli`; without it only gzip variants are made.
+The release manifest (.release_manifest.json) stays local: deploy_ftp.py
+does not upload it.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+DIST_DIR = ROOT / "frontend" / "dist"
+DEPLOY_DIR = ROOT / "deployment"
+MANIFEST_NAME = ".release_manifest.json"
+ASSETS = "assets"
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".ico", ".wasm"}
+TEXT = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map"}  # may reference other assets
+MIN_COMPRESS_SIZE = 256  # bytes; below this the headers cost more than compression saves
+MIN_SAVING = 0.10
+# Vite/Rollup `[name]-[hash].[ext]` and our own `[name].[hash].[ext]`
+HASHED_NAME = re.compile(r"^(?P<stem>.+?)(?:-[A-Za-z0-9_-]{8}|\.[0-9a-f]{10})(?P<ext>\.[^.]+)$")
+
+HTACCESS = """\
+# Generated by scripts/build_release.py; edit the template there
+Options -MultiViews
+
+# scripts/deploy_ftp.py keeps its manifest of deployed file hashes in the web root
+<Files ".deploy_manifest.json">
+  Require all denied
+</Files>
+
+<IfModule mod_rewrite.c>
+  RewriteEngine On
+  RewriteBase /sns_2a/
+
+  # API requests
+  RewriteRule ^api/(.*)$ api/public/index.php [L,QSA]
+
+  # Precompressed variants from the release build: brotli first, then gzip
+  RewriteCond %{{HTTP:Accept-Encoding}} \\bbr\\b
+  RewriteCond %{{REQUEST_FILENAME}}.br -f
+  RewriteRule ^(.*\\.(?:{extensions}))$ $1.br [L]
+  RewriteCond %{{HTTP:Accept-Encoding}} \\bgzip\\b
+  RewriteCond %{{REQUEST_FILENAME}}.gz -f
+  RewriteRule ^(.*\\.(?:{extensions}))$ $1.gz [L]
+
+  # All other requests -> index.html (SPA)
+  RewriteCond %{{REQUEST_FILENAME}} !-f
+  RewriteCond %{{REQUEST_FILENAME}} !-d
+  RewriteRule ^(.*)$ index.html [L]
+</IfModule>
+
+# foo.js.br is foo.js with Content-Encoding: br (mod_mime reads both extensions)
+<IfModule mod_mime.c>
+  RemoveType .br .gz
+  AddEncoding br .br
+  AddEncoding gzip .gz
+  AddType "text/javascript; charset=utf-8" .js .mjs
+  AddType "text/css; charset=utf-8" .css
+  AddType "text/html; charset=utf-8" .html
+  AddType image/svg+xml .svg
+  AddType application/wasm .wasm
+</IfModule>
+
+<FilesMatch "\\.(br|gz)$">
+  # Already compressed: keep mod_deflate from compressing again
+  SetEnv no-gzip 1
+  SetEnv no-brotli 1
+</FilesMatch>
+
+<IfModule mod_headers.c>
+  <FilesMatch "\\.(?:{extensions})(\\.br|\\.gz)?$">
+    Header append Vary Accept-Encoding
+  </FilesMatch>
+  # The entry point names the current asset hashes, so it must be revalidated every time
+  <FilesMatch "^index\\.html(\\.br|\\.gz)?$">
+    Header set Cache-Control "no-cache"
+  </FilesMatch>
+</IfModule>
+"""
+
+ASSETS_HTACCESS = """\
+# Generated by scripts/build_release.py; file names change with their content
+<IfModule mod_headers.c>
+  Header set Cache-Control "public, max-age=31536000, immutable"
+</IfModule>
+<IfModule mod_expires.c>
+  ExpiresActive On
+  ExpiresDefault "access plus 1 year"
+</IfModule>
+"""
+
+
+def short_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def logical_name(name):
+    """`assets/HomeView-_yYW9i5Y.js` -> `assets/HomeView.js`, to match assets across releases."""
+    path = Path(name)
+    match = HASHED_NAME.match(path.name)
+    return (path.parent / (match["stem"] + match["ext"])).as_posix() if match else name
+
+
+def read_dist(dist):
+    if not (dist / "index.html").is_file():
+        raise SystemExit(f"{dist}/index.html not found; run `npm run build` in frontend/ first")
+    files = {"index.html": (dist / "index.html").read_bytes()}
+    for path in sorted((dist / ASSETS).rglob("*")):
+        if path.is_file() and path.suffix not in (".br", ".gz") and not path.name.startswith("."):
+            files[path.relative_to(dist).as_posix()] = path.read_bytes()
+    return files
+
+
+def rewrite_references(data, renames):
+    """Replaces old asset file names with new ones where they appear as a URL path segment."""
+    text = data.decode("utf-8")
+    for old, new in renames.items():
+        text = re.sub(r"(?<=[/\"'`(=])" + re.escape(Path(old).name) + r"(?=[\"'`)?#\s]|$)", Path(new).name, text)
+    return text.encode("utf-8")
+
+
+def fingerprint(files):
+    """Content-hash names for assets that lack one. Assets are renamed after everything they
+    reference, so a hash covers the final bytes; returns (files, renames)."""
+    pending = {name for name in files if name != "index.html" and not HASHED_NAME.match(Path(name).name)}
+    renames = {}
+
+    def references(name):
+        if Path(name).suffix not in TEXT:
+            return set()
+        text = files[name].decode("utf-8", errors="replace")
+        return {other for other in pending if other != name and Path(other).name in text}
+
+    while pending:
+        ready = [name for name in sorted(pending) if not references(name)]
+        if not ready:
+            raise SystemExit(f"Unhashed assets reference each other in a cycle: {', '.join(sorted(pending))}")
+        for name in ready:
+            data = rewrite_references(files[name], renames) if Path(name).suffix in TEXT else files[name]
+            path = Path(name)
+            new_name = (path.parent / f"{path.stem}.{short_hash(data)}{path.suffix}").as_posix()
+            renames[name] = new_name
+            files[name] = data
+            pending.discard(name)
+
+    result = {}
+    for name, data in files.items():
+        if Path(name).suffix in TEXT and renames:
+            rewritten = rewrite_references(data, renames)
+            if rewritten != data and name != "index.html" and name not in renames:
+                # A Vite-hashed chunk pointing at an unhashed file: its name no longer tracks its bytes
+                print(f"warning: {name} references renamed assets; its hash is Vite's, not ours", file=sys.stderr)
+            data = rewritten
+        result[renames.get(name, name)] = data
+    return result, renames
+
+
+def compressed_variants(name, data):
+    """{".gz": bytes, ".br": bytes} for variants that save at least MIN_SAVING."""
+    if Path(name).suffix not in COMPRESSIBLE or len(data) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {ext: body for ext, body in variants.items() if len(body) <= len(data) * (1 - MIN_SAVING)}
+
+
+def describe(files, variants):
+    return {
+        name: {
+            "logical": logical_name(name),
+            "raw": len(data),
+            "gzip": len(variants[name].get(".gz", data)),
+            "brotli": len(variants[name][".br"]) if ".br" in variants[name] else None,
+        }
+        for name, data in files.items()
+    }
+
+
+def initial_load(index_html, sizes):
+    """Assets index.html loads directly (entry script, stylesheets, modulepreloads)."""
+    text = index_html.decode("utf-8")
+    return sorted(name for name in sizes if name != "index.html" and Path(name).name in text)
+
+
+def load_manifest(deploy_dir):
+    try:
+        return json.loads((deploy_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    # First release with this script: describe what is deployed now
+    try:
+        previous = read_dist(deploy_dir)
+    except SystemExit:
+        return {"files": {}, "initial": []}
+    sizes = describe(previous, {name: compressed_variants(name, data) for name, data in previous.items()})
+    return {"files": sizes, "initial": initial_load(previous["index.html"], sizes)}
+
+
+def write_release(deploy_dir, files, variants, keep):
+    """Writes index.html and assets/, keeping the previous release's assets and removing older ones."""
+    assets_dir = deploy_dir / ASSETS
+    assets_dir.mkdir(parents=True, exist_ok=True)
+    wanted = set(files) | set(keep)
+    for path in sorted(assets_dir.rglob("*")):
+        if not path.is_file() or path.name == ".htaccess":
+            continue
+        rel = path.relative_to(deploy_dir).as_posix()
+        base = rel[:-3] if rel.endswith((".br", ".gz")) else rel
+        if base not in wanted:
+            path.unlink()
+
+    for name, data in files.items():
+        target = deploy_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        for ext in (".gz", ".br"):
+            variant = target.with_name(target.name + ext)
+            if ext in variants[name]:
+                variant.write_bytes(variants[name][ext])
+            elif variant.exists():
+                variant.unlink()  # stale variant of an earlier build
+
+    (deploy_dir / ".htaccess").write_text(
+        HTACCESS.format(extensions="|".join(sorted(ext.lstrip(".") for ext in COMPRESSIBLE))), encoding="utf-8"
+    )
+    (assets_dir / ".htaccess").write_text(ASSETS_HTACCESS, encoding="utf-8")
+
+
+def _kb(size):
+    return "-" if size is None else f"{size / 1024:.1f}"
+
+
+def _delta(now, before):
+    if now is None or before is None:
+        return ""
+    diff = now - before
+    return f"{'+' if diff >= 0 else '-'}{abs(diff) / 1024:.1f}" if diff else "0"
+
+
+def _totals(sizes, names):
+    totals = {"raw": 0, "gzip": 0, "brotli": 0}
+    for name in names:
+        entry = sizes[name]
+        totals["raw"] += entry["raw"]
+        totals["gzip"] += entry["gzip"]
+        totals["brotli"] += entry["brotli"] if entry["brotli"] is not None else entry["gzip"]
+    return totals
+
+
+def size_report(current, previous):
+    before = {entry["logical"]: entry for entry in previous["files"].values()}
+    now = {entry["logical"]: entry for entry in current["files"].values()}
+    rows = []
+    for logical in sorted(set(before) | set(now), key=lambda n: -(now.get(n) or before[n])["raw"]):
+        cur, old = now.get(logical), before.get(logical)
+        status = "new" if old is None else "removed" if cur is None else ""
+        rows.append([
+            logical,
+            _kb(cur and cur["raw"]), _kb(cur and cur["gzip"]), _kb(cur and cur["brotli"]),
+            _delta(cur and cur["gzip"], old and old["gzip"]) if not status else status,
+        ])
+
+    lines = []
+    headers = ["asset", "raw KB", "gzip KB", "br KB", "gzip vs prev"]
+    widths = [max(len(str(r[i])) for r in rows + [headers]) for i in range(len(headers))]
+    for r in [headers] + rows:
+        lines.append("  ".join(str(c).ljust(w) if i == 0 else str(c).rjust(w) for i, (c, w) in enumerate(zip(r, widths))))
+
+    for label, key in (("Total", None), ("Initial load", "initial")):
+        cur = _totals(current["files"], current[key] if key else current["files"])
+        old = _totals(previous["files"], previous[key] if key else previous["files"])
+        lines.append(
+            f"{label}: {_kb(cur['raw'])} KB raw, {_kb(cur['gzip'])} KB gzip, {_kb(cur['brotli'])} KB br"
+            f" (gzip {_delta(cur['gzip'], old['gzip']) or '0'} KB vs previous release)"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint, precompress and stage the sns2 frontend release")
+    parser.add_argument("--dist", type=Path, default=DIST_DIR, help=f"Vite build output (default: {DIST_DIR})")
+    parser.add_argument("--out", type=Path, default=DEPLOY_DIR, help=f"Release directory (default: {DEPLOY_DIR})")
+    parser.add_argument("--report-json", type=Path, help="Also write the size comparison as JSON")
+    args = parser.parse_args()
+
+    if brotli is None:
+        print("brotli module not installed (pip install brotli); writing gzip variants only", file=sys.stderr)
+
+    files, renames = fingerprint(read_dist(args.dist))
+    variants = {name: compressed_variants(name, data) for name, data in files.items()}
+    previous = load_manifest(args.out)
+    current = {"files": describe(files, variants), "initial": initial_load(files["index.html"], files)}
+
+    write_release(args.out, files, variants, keep=[n for n in previous["files"] if n.startswith(ASSETS + "/")])
+    (args.out / MANIFEST_NAME).write_text(json.dumps(current, indent=1, sort_keys=True), encoding="utf-8")
+
+    print(f"Release written to {args.out} ({len(files)} files, {len(renames)} fingerprinted here)")
+    print(size_report(current, previous))
+    if args.report_json:
+        args.report_json.write_text(json.dumps({"current": current, "previous": previous}, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
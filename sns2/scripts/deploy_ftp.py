@@ -1,34 +1,293 @@
+"""Incremental FTP deploy of sns2/deployment/.
+
+A manifest of content hashes (.deploy_manifest.json) is kept next to the
+site on the server; the root .htaccess denies web access to it. Each run hashes the local tree, uploads only new or
+changed files over a small pool of parallel FTP connections, then swaps them
+into place and prunes files that earlier deploys shipped but that no longer
+exist locally. Uploads go to `<name>.part` first and are renamed only once
+every file has arrived, which keeps the half-deployed window to the rename
+phase. An interrupted run resumes its `.part` uploads (FTP REST) on the next
+run.
+
+Settings come from the environment:
+
+    FTP_HOST, FTP_USER, FTP_PASS, FTP_DIR   (required)
+    FTP_PORT                                (default 21)
+
+To try it locally against pyftpdlib:
+
+    python -m pyftpdlib -p 2121 -w -u deploy -P deploy -d /tmp/ftproot
+    FTP_HOST=127.0.0.1 FTP_PORT=2121 FTP_USER=deploy FTP_PASS=deploy FTP_DIR=/ \\
+        python deploy_ftp.py --dry-run
+"""
+
+import argparse
+import fnmatch
 import ftplib
+import hashlib
+import io
+import json
 import os
+import queue
 import sys
+import threading
+from pathlib import Path
+
+LOCAL_ROOT = Path(__file__).resolve().parents[1] / "deployment"
+MANIFEST_NAME = ".deploy_manifest.json"
+STATE_FILE = Path(__file__).resolve().parent / ".deploy_state.json"
+PART_SUFFIX = ".part"
+BLOCK_SIZE = 64 * 1024
+
+# Server-side data that must never be overwritten by a deploy
+DEFAULT_EXCLUDES = [
+    "api/.env",
+    "api/database/*.sqlite",
+    "api/database/*.sqlite-*",
+    "api/database/rate_limits.json",
+    "api/logs/*",
+    ".release_manifest.json",  # build_release.py's size baseline, local only
+]
+# Directories the PHP app writes to; 777 is usually required on shared hosts without suPHP
+WRITABLE_DIRS = ["api/logs", "api/public/uploads"]
+
+
+def load_settings():
+    missing = [name for name in ("FTP_HOST", "FTP_USER", "FTP_PASS", "FTP_DIR") if not os.environ.get(name)]
+    if missing:
+        raise SystemExit(f"Missing environment variables: {', '.join(missing)}")
+    return {
+        "host": os.environ["FTP_HOST"],
+        "port": int(os.environ.get("FTP_PORT", "21")),
+        "user": os.environ["FTP_USER"],
+        "password": os.environ["FTP_PASS"],
+        "root": os.environ["FTP_DIR"].rstrip("/"),
+    }
+
+
+def connect(settings):
+    ftp = ftplib.FTP()
+    ftp.connect(settings["host"], settings["port"], timeout=30)
+    ftp.login(settings["user"], settings["password"])
+    return ftp
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(root, excludes):
+    manifest = {}
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(root).as_posix()
+        if any(fnmatch.fnmatch(rel, pattern) for pattern in excludes):
+            continue
+        manifest[rel] = {"sha256": file_sha256(path), "size": path.stat().st_size}
+    return manifest
+
+
+def fetch_remote_manifest(ftp, settings):
+    buffer = io.BytesIO()
+    try:
+        ftp.retrbinary(f"RETR {settings['root']}/{MANIFEST_NAME}", buffer.write)
+    except ftplib.error_perm:
+        return {}  # First incremental deploy: everything counts as new
+    return json.loads(buffer.getvalue().decode("utf-8"))
+
+
+def store_remote_manifest(ftp, settings, manifest):
+    data = json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8")
+    ftp.storbinary(f"STOR {settings['root']}/{MANIFEST_NAME}", io.BytesIO(data))
+
+
+def load_state():
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
 
-# FTP Settings
-FTP_HOST = "s325.xrea.com"
-FTP_USER = "hgyujhgj"
-FTP_PASS = "rXSa64KCv3LR"
-FTP_DIR = "/public_html/hgyujhgj.shop/sns_2a"
+class RemoteDirs:
+    """Creates remote directories once, shared by all upload workers."""
 
-def upload_file():
+    def __init__(self, root):
+        self.root = root
+        self.known = set()
+        self.lock = threading.Lock()
+
+    def ensure(self, ftp, rel_dir):
+        path = self.root
+        for part in [p for p in rel_dir.split("/") if p]:
+            path = f"{path}/{part}"
+            with self.lock:
+                if path in self.known:
+                    continue
+                self.known.add(path)
+            try:
+                ftp.mkd(path)
+            except ftplib.error_perm:
+                pass  # Already exists
+
+
+def remote_size(ftp, path):
     try:
-        print(f"Connecting to {FTP_HOST}...")
-        ftp = ftplib.FTP(FTP_HOST)
-        ftp.login(FTP_USER, FTP_PASS)
-        print("Logged in successfully.")
+        ftp.voidcmd("TYPE I")
+        return ftp.size(path)
+    except ftplib.error_perm:
+        return None
+
+
+def upload_one(ftp, settings, dirs, rel, entry, state, state_lock):
+    local = LOCAL_ROOT / rel
+    dirs.ensure(ftp, os.path.dirname(rel))
+    part = f"{settings['root']}/{rel}{PART_SUFFIX}"
+
+    # Resume only if the .part on the server belongs to this exact content
+    offset = 0
+    if state.get(rel) == entry["sha256"]:
+        offset = remote_size(ftp, part) or 0
+        if offset > entry["size"]:
+            offset = 0
+    with state_lock:
+        state[rel] = entry["sha256"]
+        save_state(state)
+
+    if offset == entry["size"]:
+        return "already uploaded"
+    with open(local, "rb") as f:
+        f.seek(offset)
+        ftp.storbinary(f"STOR {part}", f, BLOCK_SIZE, rest=offset or None)
+    return f"resumed at {offset} bytes" if offset else "uploaded"
 
+
+def upload_all(settings, changed, manifest, connections):
+    state = load_state()
+    state_lock = threading.Lock()
+    dirs = RemoteDirs(settings["root"])
+    jobs = queue.Queue()
+    for rel in changed:
+        jobs.put(rel)
+    failures = []
+
+    def worker():
+        ftp = connect(settings)
         try:
-            print("Setting permissions for logs and uploads...")
-            # 777 or 755. Using 777 for writable dirs usually required on shared hosts without suPHP
-            ftp.voidcmd(f"SITE CHMOD 777 {FTP_DIR}/api/logs")
-            ftp.voidcmd(f"SITE CHMOD 777 {FTP_DIR}/api/public/uploads")
-            print("Permissions set successfully.")
-        except Exception as e:
-            print(f"Error setting permissions: {e}")
+            while True:
+                try:
+                    rel = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    result = upload_one(ftp, settings, dirs, rel, manifest[rel], state, state_lock)
+                    print(f"  {rel}: {result}")
+                except ftplib.all_errors as e:
+                    failures.append((rel, e))
+                    print(f"  {rel}: FAILED ({e})")
+        finally:
+            try:
+                ftp.quit()
+            except ftplib.all_errors:
+                ftp.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(connections, len(changed))))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return failures
+
+
+def set_permissions(ftp, settings):
+    dirs = RemoteDirs(settings["root"])
+    for rel in WRITABLE_DIRS:
+        dirs.ensure(ftp, rel)
+        try:
+            ftp.voidcmd(f"SITE CHMOD 777 {settings['root']}/{rel}")
+        except ftplib.all_errors as e:
+            print(f"Error setting permissions on {rel}: {e}")
+
 
+def deploy(args):
+    settings = load_settings()
+    excludes = DEFAULT_EXCLUDES + args.exclude
+
+    print(f"Hashing {LOCAL_ROOT}...")
+    manifest = build_manifest(LOCAL_ROOT, excludes)
+
+    print(f"Connecting to {settings['host']}:{settings['port']}...")
+    ftp = connect(settings)
+    remote = fetch_remote_manifest(ftp, settings)
+
+    changed = [rel for rel, entry in manifest.items() if remote.get(rel, {}).get("sha256") != entry["sha256"]]
+    removed = [
+        rel for rel in remote
+        if rel not in manifest and not any(fnmatch.fnmatch(rel, pattern) for pattern in excludes)
+    ] if args.prune else []
+    changed_bytes = sum(manifest[rel]["size"] for rel in changed)
+    print(f"{len(changed)} new/changed files ({changed_bytes / 1024:.1f} KB), "
+          f"{len(removed)} to prune, {len(manifest) - len(changed)} unchanged")
+
+    if args.dry_run:
+        for rel in changed:
+            print(f"  upload {rel}")
+        for rel in removed:
+            print(f"  delete {rel}")
         ftp.quit()
+        return
+
+    if changed:
+        ftp.quit()  # Workers open their own sessions; avoid an idle timeout on this one
+        print(f"Uploading over {args.connections} connections...")
+        failures = upload_all(settings, changed, manifest, args.connections)
+        if failures:
+            raise SystemExit(f"{len(failures)} uploads failed; re-run to resume them")
+        ftp = connect(settings)
+
+    # Swap phase: everything is on the server, so move it into place back to back
+    for rel in changed:
+        ftp.rename(f"{settings['root']}/{rel}{PART_SUFFIX}", f"{settings['root']}/{rel}")
+    for rel in removed:
+        try:
+            ftp.delete(f"{settings['root']}/{rel}")
+        except ftplib.error_perm as e:
+            print(f"  could not delete {rel}: {e}")
 
-    except Exception as e:
+    # Files outside the manifest (excluded ones) are left alone on later runs
+    store_remote_manifest(ftp, settings, manifest)
+    save_state({})
+
+    print("Setting permissions for logs and uploads...")
+    set_permissions(ftp, settings)
+    ftp.quit()
+    print("Deploy complete.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental FTP deploy of sns2/deployment")
+    parser.add_argument("--connections", type=int, default=4, help="Parallel FTP sessions for uploads")
+    parser.add_argument("--exclude", action="append", default=[], help="Extra glob (relative path) to skip")
+    parser.add_argument("--no-prune", dest="prune", action="store_false", help="Keep files removed locally")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without touching the server")
+    args = parser.parse_args()
+
+    try:
+        deploy(args)
+    except ftplib.all_errors as e:
         print(f"FTP Error: {e}")
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    upload_file()
+    main()
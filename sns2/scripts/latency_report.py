@@ -0,0 +1,209 @@
+"""Per-route latency report from the sns2 request logs.
+
+LoggingMiddleware appends one JSON object per request to
+backend/logs/requests-YYYY-MM-DD.log. This script streams those files
+(plain or .gz) line by line and prints, for every route, the request count,
+error rate, and p50/p95/p99 of the handler time, DB time and query count:
+
+    python latency_report.py                          # every file in backend/logs
+    python latency_report.py ../backend/logs/requests-2025-06-0*.log --route "GET /api/feeds*"
+    python latency_report.py --since 2025-06-01T09:00 --sort p99 --json > report.json
+
+Memory stays flat however large the logs are: values go into log-scaled
+buckets (about 1% relative error on the percentiles) rather than lists.
+
+Logs may be sampled (REQUEST_LOG_SAMPLE < 1). Only lines with
+"sampled": true feed the percentiles, since 5xx and slow requests are
+logged regardless of sampling and would skew them; counts are scaled by
+1 / sample_rate to estimate real traffic. `--include-forced` adds the
+forced lines back, which is what you want when looking for outliers.
+"""
+
+import argparse
+import fnmatch
+import gzip
+import json
+import math
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+LOG_DIR = Path(__file__).resolve().parents[1] / "backend" / "logs"
+LOG_PATTERN = "requests-*.log*"
+PERCENTILES = (50, 95, 99)
+METRICS = ("duration_ms", "db_ms", "db_queries")
+BUCKET_GROWTH = 1.02  # neighbouring bucket bounds differ by 2%, so a bucket's midpoint is within 1%
+
+
+class Histogram:
+    """Log-bucketed histogram; percentile() returns the bucket's geometric midpoint."""
+
+    def __init__(self):
+        self.buckets = defaultdict(float)
+        self.count = 0.0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, value, weight=1.0):
+        # Bucket 0 holds zero (no queries, or sub-0.01ms DB time)
+        index = 0 if value < 0.01 else 1 + int(math.log(value / 0.01, BUCKET_GROWTH))
+        self.buckets[index] += weight
+        self.count += weight
+        self.total += value * weight
+        self.maximum = max(self.maximum, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = self.count * p / 100
+        seen = 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                if index == 0:
+                    return 0.0
+                low = 0.01 * BUCKET_GROWTH ** (index - 1)
+                return min(low * math.sqrt(BUCKET_GROWTH), self.maximum)
+        return self.maximum
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0.0  # estimated, scaled by 1 / sample_rate
+        self.lines = 0
+        self.errors = 0.0
+        self.histograms = {metric: Histogram() for metric in METRICS}
+
+    def add(self, entry, use_for_percentiles):
+        rate = entry.get("sample_rate") or 1.0
+        self.lines += 1
+        if entry.get("sampled", True):
+            weight = 1.0 / rate
+            self.requests += weight
+            if entry.get("status", 200) >= 500:
+                self.errors += weight
+        if use_for_percentiles:
+            for metric in METRICS:
+                if entry.get(metric) is not None:
+                    self.histograms[metric].add(float(entry[metric]))
+
+    def summary(self):
+        row = {
+            "requests": round(self.requests),
+            "log_lines": self.lines,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+        }
+        for metric, histogram in self.histograms.items():
+            row[metric] = {f"p{p}": _round(histogram.percentile(p)) for p in PERCENTILES}
+            row[metric]["mean"] = _round(histogram.mean)
+            row[metric]["max"] = _round(histogram.maximum if histogram.count else None)
+        return row
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def log_files(paths):
+    if not paths:
+        paths = [LOG_DIR]
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.glob(LOG_PATTERN))
+        else:
+            yield path
+
+
+def read_entries(files):
+    for path in files:
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crashed worker
+                if isinstance(entry, dict) and "route" in entry:
+                    yield entry
+
+
+def build_report(entries, route_pattern=None, since=None, until=None, include_forced=False):
+    routes = defaultdict(RouteStats)
+    for entry in entries:
+        if route_pattern and not fnmatch.fnmatch(entry["route"], route_pattern):
+            continue
+        ts = entry.get("ts", "")
+        # ISO 8601 strings compare in time order (same offset), so a prefix like 2025-06-01T09 works
+        if (since and ts < since) or (until and ts >= until):
+            continue
+        routes[entry["route"]].add(entry, include_forced or entry.get("sampled", True))
+    return {route: stats.summary() for route, stats in routes.items()}
+
+
+def format_table(report):
+    headers = ["route", "requests", "err%", "p50 ms", "p95 ms", "p99 ms", "db p95 ms", "queries p95"]
+    rows = []
+    for route, row in report.items():
+        d, db, q = row["duration_ms"], row["db_ms"], row["db_queries"]
+        rows.append([
+            route,
+            f"{row['requests']:,}",
+            f"{row['error_rate'] * 100:.1f}",
+            *(_cell(d[f"p{p}"]) for p in PERCENTILES),
+            _cell(db["p95"]),
+            _cell(q["p95"], digits=0),
+        ])
+    widths = [max(len(str(r[i])) for r in rows + [headers]) for i in range(len(headers))]
+    lines = ["  ".join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(headers, widths)))]
+    for r in rows:
+        lines.append("  ".join(str(c).ljust(w) if i == 0 else str(c).rjust(w) for i, (c, w) in enumerate(zip(r, widths))))
+    return "\n".join(lines)
+
+
+def _cell(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def sort_report(report, sort):
+    if sort == "route":
+        key = lambda item: item[0]
+    elif sort == "requests":
+        key = lambda item: -item[1]["requests"]
+    else:
+        key = lambda item: -(item[1]["duration_ms"][sort] or 0)
+    return dict(sorted(report.items(), key=key))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-route p50/p95/p99 from sns2 request logs")
+    parser.add_argument("paths", nargs="*", help=f"Log files or directories (default: {LOG_DIR})")
+    parser.add_argument("--route", help='Only routes matching this pattern, e.g. "GET /api/qa*"')
+    parser.add_argument("--since", help="ISO timestamp or prefix; lines before it are skipped")
+    parser.add_argument("--until", help="ISO timestamp or prefix; lines from it on are skipped")
+    parser.add_argument("--sort", choices=["p99", "p95", "p50", "requests", "route"], default="p99")
+    parser.add_argument("--include-forced", action="store_true",
+                        help="Also use error/slow lines logged outside the sample for percentiles")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    files = list(log_files(args.paths))
+    if not files:
+        raise SystemExit("No log files found")
+
+    report = build_report(read_entries(files), args.route, args.since, args.until, args.include_forced)
+    report = sort_report(report, args.sort)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    elif report:
+        print(format_table(report))
+    else:
+        print("No matching requests")
+
+
+if __name__ == "__main__":
+    main()